@@ -0,0 +1,5 @@
+"""
+Benchmarks for the calculator pipeline.
+
+Run them from the src directory, e.g. `python -m benchmarks.bench_lexer`.
+"""
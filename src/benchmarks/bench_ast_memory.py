@@ -0,0 +1,41 @@
+import gc
+import sys
+import tracemalloc
+from main.lexer import scan_and_tokenize_input
+from main.parser import parse_list_of_tokens
+from .legacy import copy_into_original_nodes
+
+"""
+Measures with tracemalloc how much memory a parsed tree holds: the tree the parser builds now (__slots__ node classes,
+flat chain nodes) against the same expression in the original node classes and tree shape.
+
+Usage: python -m benchmarks.bench_ast_memory [token_count]
+"""
+
+DEFAULT_TOKEN_COUNT = 1_000_000
+
+
+def measure_retained_bytes(build):
+    gc.collect()
+    tracemalloc.start()
+    built = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return built, retained
+
+
+def main():
+    token_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TOKEN_COUNT
+    user_input = "12 + 3 * (45 - 6) / 7 - " * (token_count // 12) + "1"
+    tokens = scan_and_tokenize_input(user_input).tokens
+
+    syntax_tree, slots_bytes = measure_retained_bytes(lambda: parse_list_of_tokens(tokens).syntax_tree)
+    _, dict_bytes = measure_retained_bytes(lambda: copy_into_original_nodes(syntax_tree))
+
+    print(f"{len(tokens)} tokens")
+    print(f"{'original nodes':<16} {dict_bytes / 1e6:>10.1f} MB {dict_bytes / len(tokens):>8.1f} B/token")
+    print(f"{'current nodes':<16} {slots_bytes / 1e6:>10.1f} MB {slots_bytes / len(tokens):>8.1f} B/token")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import os
+import sys
+import random
+from main.batch import evaluate_many
+from .timing import time_best_of
+
+"""
+Measures evaluate_many throughput for an increasing number of worker processes.
+
+Usage: python -m benchmarks.bench_batch [expression_count]
+"""
+
+DEFAULT_EXPRESSION_COUNT = 1_000_000
+
+
+def generate_expressions(count: int):
+    generator = random.Random(0)
+    templates = ["{0} + {1} * {2}", "({0} - {1}) / {2}", "-{0} * ({1} + {2})", "{0} / ({1} - {1})"]
+    return [generator.choice(templates).format(generator.randint(0, 999), generator.randint(1, 999),
+                                               generator.randint(1, 99)) for _ in range(count)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_EXPRESSION_COUNT
+    expressions = generate_expressions(count)
+    worker_counts = sorted({1, 2, 4, 8, os.cpu_count() or 1})
+
+    print(f"{count} expressions on {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'seconds':>10} {'expr/s':>12} {'speedup':>9}")
+    single_worker_seconds = None
+    for workers in worker_counts:
+        seconds = time_best_of(lambda: evaluate_many(expressions, workers=workers), 1)
+        single_worker_seconds = single_worker_seconds or seconds
+        print(f"{workers:>8} {seconds:>10.3f} {count / seconds:>12.0f} {single_worker_seconds / seconds:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import sys
+from main.integers import convert_literal_to_integer, format_integer
+from main.pipeline import evaluate_expression
+from .timing import time_best_of
+
+"""
+Big-number workloads: literal conversion, formatting and full-pipeline evaluation of huge operands.
+
+The built-in int() baseline needs the interpreter-wide string conversion limit lifted, which this benchmark does for
+itself only.
+"""
+
+DIGIT_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def main():
+    digit_counts = DIGIT_COUNTS if len(sys.argv) < 2 else [int(count) for count in sys.argv[1:]]
+    sys.set_int_max_str_digits(0)
+
+    print(f"{'digits':>10} {'int() (s)':>11} {'convert (s)':>12} {'str() (s)':>11} {'format (s)':>11} "
+          f"{'a*b/c (s)':>11}")
+    for digit_count in digit_counts:
+        digits = ("1234567890" * (digit_count // 10 + 1))[:digit_count]
+        value = int(digits)
+        builtin_conversion = time_best_of(lambda: int(digits), 1)
+        conversion = time_best_of(lambda: convert_literal_to_integer(digits), 1)
+        builtin_formatting = time_best_of(lambda: str(value), 1)
+        formatting = time_best_of(lambda: format_integer(value), 1)
+        expression = f"{digits} * {digits[::-1]} / {digits[: digit_count // 2]}"
+        evaluation = time_best_of(lambda: evaluate_expression(expression), 1)
+        print(f"{digit_count:>10} {builtin_conversion:>11.4f} {conversion:>12.4f} {builtin_formatting:>11.4f} "
+              f"{formatting:>11.4f} {evaluation:>11.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+from main.lexer import scan_and_tokenize_input
+from main.parser import parse_list_of_tokens
+from main.interpreter import interpret_node
+from main.compiler import compile_syntax_tree
+from .timing import time_best_of
+
+"""
+Compares repeated evaluation of one parsed tree through interpret_node against its compiled form.
+
+Compilation is a one-off cost per tree and is reported separately.
+"""
+
+EXPRESSIONS = {
+    "repl one-liner": "7 + 3 * (10 / (12 / (3 + 1) - 1))",
+    "flat chain, 1k terms": " + ".join(f"{n} * 3 / 2" for n in range(1, 1001)),
+    "nested, depth 200": "(" * 200 + "1" + " + 2) * 3" * 200,
+}
+EVALUATIONS = 200
+
+
+def main():
+    print(f"{'workload':<24} {'interpret (s)':>14} {'compiled (s)':>14} {'speedup':>9} {'compile (s)':>12}")
+    for name, expression in EXPRESSIONS.items():
+        syntax_tree = parse_list_of_tokens(scan_and_tokenize_input(expression).tokens).syntax_tree
+        compile_seconds = time_best_of(lambda: compile_syntax_tree(syntax_tree), 1)
+        compiled_expression = compile_syntax_tree(syntax_tree).compiled_expression
+        assert compiled_expression.evaluate() == interpret_node(syntax_tree)
+
+        def run_interpreter():
+            for _ in range(EVALUATIONS):
+                interpret_node(syntax_tree)
+
+        def run_compiled():
+            for _ in range(EVALUATIONS):
+                compiled_expression.evaluate()
+
+        interpreted = time_best_of(run_interpreter)
+        compiled = time_best_of(run_compiled)
+        print(f"{name:<24} {interpreted:>14.4f} {compiled:>14.4f} {interpreted / compiled:>8.1f}x {compile_seconds:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import sysconfig
+from main.batch import evaluate_concurrently
+from .bench_batch import generate_expressions
+from .timing import time_best_of
+
+"""
+Measures evaluate_concurrently throughput for an increasing number of threads.
+
+On a regular build the GIL lets one thread run at a time, so the numbers show the cost of contention; on a
+free-threaded build (python3.13t or later) they show the parallel speedup.
+
+Usage: python -m benchmarks.bench_concurrent [expression_count]
+"""
+
+DEFAULT_EXPRESSION_COUNT = 200_000
+
+
+def describe_build() -> str:
+    if not sysconfig.get_config_var("Py_GIL_DISABLED"):
+        return "regular build (GIL)"
+    # the GIL can be turned back on at run time, e.g. by PYTHON_GIL=1 or an extension that does not support free-threading
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    return "free-threaded build, GIL " + ("re-enabled" if gil_enabled else "disabled")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_EXPRESSION_COUNT
+    expressions = generate_expressions(count)
+    thread_counts = sorted({1, 2, 4, 8, os.cpu_count() or 1})
+
+    print(f"{count} expressions on {os.cpu_count()} cores, Python {sys.version.split()[0]}, {describe_build()}")
+    print(f"{'threads':>8} {'seconds':>10} {'expr/s':>12} {'speedup':>9}")
+    single_thread_seconds = None
+    for threads in thread_counts:
+        seconds = time_best_of(lambda: evaluate_concurrently(expressions, threads=threads), 1)
+        single_thread_seconds = single_thread_seconds or seconds
+        print(f"{threads:>8} {seconds:>10.3f} {count / seconds:>12.0f} {single_thread_seconds / seconds:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
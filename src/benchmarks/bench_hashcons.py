@@ -0,0 +1,40 @@
+from main.lexer import scan_input_into_token_stream
+from main.parser import parse_list_of_tokens
+from main.interpreter import interpret_node
+from .timing import time_best_of
+
+"""
+Compares parsing and evaluating machine-generated expressions that repeat the same groups, with and without interning
+identical subtrees (intern_subtrees) and memoizing shared nested expressions.
+"""
+
+
+def generate_doubling_expression(levels: int) -> str:
+    expression = "(12/(3+1)-1)"
+    for level in range(levels):
+        expression = f"({expression} + {expression} * {level % 3})"
+    return expression
+
+
+def main():
+    print(f"{'levels':>7} {'chars':>10} {'plain (s)':>10} {'interned (s)':>13} {'eval plain':>11} "
+          f"{'eval memo':>10} {'deduplicated':>13}")
+    for levels in (8, 12, 16):
+        expression = generate_doubling_expression(levels)
+        tokens = scan_input_into_token_stream(expression).tokens
+        plain_tree = parse_list_of_tokens(tokens).syntax_tree
+        interned_result = parse_list_of_tokens(tokens, intern_subtrees=True)
+        assert interpret_node(plain_tree) == interpret_node(interned_result.syntax_tree,
+                                                            memoize_nested_expressions=True)
+
+        plain_parse = time_best_of(lambda: parse_list_of_tokens(tokens))
+        interned_parse = time_best_of(lambda: parse_list_of_tokens(tokens, intern_subtrees=True))
+        plain_evaluation = time_best_of(lambda: interpret_node(plain_tree))
+        memoized_evaluation = time_best_of(lambda: interpret_node(interned_result.syntax_tree,
+                                                                  memoize_nested_expressions=True))
+        print(f"{levels:>7} {len(expression):>10} {plain_parse:>10.4f} {interned_parse:>13.4f} "
+              f"{plain_evaluation:>11.4f} {memoized_evaluation:>10.5f} {interned_result.deduplicated_node_count:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import random
+import sys
+import time
+from main.incremental import IncrementalSession
+from main.pipeline import evaluate_expression
+
+"""
+Latency per keystroke-sized edit on a large expression: IncrementalSession versus re-running the whole pipeline.
+
+Usage: python -m benchmarks.bench_incremental [size_in_bytes]
+"""
+
+DEFAULT_SIZE_IN_BYTES = 100_000
+EDIT_COUNT = 200
+
+
+def generate_grouped_expression(size_in_bytes: int) -> str:
+    generator = random.Random(0)
+    groups = []
+    length = 0
+    while length < size_in_bytes:
+        a, b, c, d = (generator.randint(1, 99) for _ in range(4))
+        group = f"(({a} + {b}) * ({c} - {d} / 3) + ({a} * {d}))"
+        groups.append(group)
+        length += len(group) + 3
+    return " + ".join(groups)
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE_IN_BYTES
+    source = generate_grouped_expression(size)
+    session = IncrementalSession(source)
+    generator = random.Random(1)
+
+    incremental_seconds = []
+    full_seconds = []
+    for _ in range(EDIT_COUNT):
+        # replace one digit with another, like a keystroke in an editor
+        offset = generator.randrange(len(session.source))
+        while not session.source[offset].isdigit():
+            offset += 1
+        digit = str(generator.randint(1, 9))
+
+        start = time.perf_counter()
+        result = session.apply_edit(offset, 1, digit)
+        incremental_seconds.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        expected = evaluate_expression(session.source)
+        full_seconds.append(time.perf_counter() - start)
+        assert result == expected
+
+    incremental_seconds.sort()
+    full_seconds.sort()
+    print(f"{len(source)} bytes, {EDIT_COUNT} single-character edits")
+    print(f"{'':<14} {'median (ms)':>12} {'p99 (ms)':>10}")
+    for name, seconds in (("incremental", incremental_seconds), ("full pipeline", full_seconds)):
+        print(f"{name:<14} {seconds[len(seconds) // 2] * 1e3:>12.2f} {seconds[int(len(seconds) * 0.99)] * 1e3:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import sys
+from main.lexer import scan_and_tokenize_input
+from .timing import time_best_of, generate_flat_expression
+
+"""
+Shows how scan_and_tokenize_input scales from 1 KB to 10 MB of input.
+
+A linear scanner keeps the nanoseconds-per-byte column roughly flat as the input grows.
+"""
+
+SIZES_IN_BYTES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def main():
+    sizes = SIZES_IN_BYTES if len(sys.argv) < 2 else [int(size) for size in sys.argv[1:]]
+    print(f"{'bytes':>12} {'tokens':>10} {'seconds':>10} {'ns/byte':>10}")
+    for size in sizes:
+        user_input = generate_flat_expression(size)
+        repeat = 3 if size <= 1_000_000 else 1
+        seconds = time_best_of(lambda: scan_and_tokenize_input(user_input), repeat)
+        token_count = len(scan_and_tokenize_input(user_input).tokens)
+        print(f"{len(user_input):>12} {token_count:>10} {seconds:>10.4f} {seconds / len(user_input) * 1e9:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
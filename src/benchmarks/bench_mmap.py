@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+import tempfile
+from .timing import generate_flat_expression
+
+"""
+Compares evaluating one large expression file through the memory-mapped stream evaluator against reading it into a
+str for the tree pipeline. Each run happens in a fresh process so that its peak resident memory can be compared.
+
+Usage: python -m benchmarks.bench_mmap [size_in_bytes ...]
+"""
+
+DEFAULT_SIZES_IN_BYTES = [1_000_000, 4_000_000, 16_000_000]
+
+RUNNERS = {
+    "tree pipeline": "from main.pipeline import evaluate_expression\n"
+                     "with open(path) as input_file: evaluate_expression(input_file.read())",
+    "mmap stream": "from main.stream_evaluator import evaluate_mapped_file\n"
+                   "evaluate_mapped_file(path)",
+}
+
+MEASURE = """
+import resource, sys, time
+path = sys.argv[1]
+start = time.perf_counter()
+{runner}
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def main():
+    sizes = [int(argument) for argument in sys.argv[1:]] or DEFAULT_SIZES_IN_BYTES
+    source_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    print(f"{'size (MB)':>10} {'mode':<14} {'seconds':>9} {'peak RSS (MB)':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = os.path.join(directory, "expression.txt")
+            with open(path, "w") as expression_file:
+                expression_file.write(generate_flat_expression(size))
+            for name, runner in RUNNERS.items():
+                completed = subprocess.run([sys.executable, "-c", MEASURE.format(runner=runner), path],
+                                           cwd=source_directory, capture_output=True, text=True, check=True)
+                seconds, peak_kilobytes = completed.stdout.split()
+                print(f"{size / 1e6:>10.0f} {name:<14} {float(seconds):>9.2f} {int(peak_kilobytes) / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
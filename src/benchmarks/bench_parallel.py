@@ -0,0 +1,42 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from main.pipeline import evaluate_expression
+from main.parallel import evaluate_in_parallel
+from .timing import time_best_of
+
+"""
+Measures evaluate_in_parallel on one expression with many top-level terms against the single-process pipeline
+(lexing, parse_list_of_tokens and interpret_node), for an increasing number of worker processes.
+
+Usage: python -m benchmarks.bench_parallel [term_count]
+"""
+
+DEFAULT_TERM_COUNT = 1_000_000
+
+
+def generate_expression(term_count: int) -> str:
+    return " - ".join(f"{index % 997} * (3 - {index % 7}) / 2" if index % 2 else str(index)
+                      for index in range(term_count))
+
+
+def main():
+    term_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TERM_COUNT
+    expression = generate_expression(term_count)
+    expected = evaluate_expression(expression)
+    single_process = time_best_of(lambda: evaluate_expression(expression), 1)
+
+    print(f"{term_count} terms, {len(expression) / 1e6:.1f} MB, on {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'seconds':>10} {'speedup':>9}")
+    print(f"{'single':>8} {single_process:>10.3f} {1:>8.2f}x")
+    for workers in sorted({1, 2, 4, 8, os.cpu_count() or 1}):
+        with ProcessPoolExecutor(workers) as executor:
+            # start the workers before timing
+            list(executor.map(abs, range(workers)))
+            assert evaluate_in_parallel(expression, workers, executor, threshold_length=0) == expected
+            seconds = time_best_of(lambda: evaluate_in_parallel(expression, workers, executor, threshold_length=0), 1)
+        print(f"{workers:>8} {seconds:>10.3f} {single_process / seconds:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import sys
+from main.lexer import scan_and_tokenize_input
+from main.parser import parse_list_of_tokens
+from .legacy import parse_list_of_tokens_by_slicing
+from .timing import time_best_of
+
+"""
+Before/after comparison of the slicing parser and the cursor-based parse_list_of_tokens on flat expressions.
+
+The slicing parser is quadratic, so it is only timed up to LEGACY_TOKEN_LIMIT tokens.
+"""
+
+TOKEN_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+LEGACY_TOKEN_LIMIT = 20_000
+
+
+def generate_tokens(token_count: int):
+    chunk = "1 + 2 * 3 - 4 / 5 + "
+    chunk_token_count = 10
+    user_input = chunk * max(1, token_count // chunk_token_count) + "1"
+    return scan_and_tokenize_input(user_input).tokens
+
+
+def main():
+    token_counts = TOKEN_COUNTS if len(sys.argv) < 2 else [int(count) for count in sys.argv[1:]]
+    print(f"{'tokens':>10} {'before (s)':>12} {'after (s)':>12} {'after ns/token':>16}")
+    for token_count in token_counts:
+        tokens = generate_tokens(token_count)
+        after = time_best_of(lambda: parse_list_of_tokens(tokens), 1 if token_count >= 1_000_000 else 3)
+        if len(tokens) <= LEGACY_TOKEN_LIMIT:
+            before = f"{time_best_of(lambda: parse_list_of_tokens_by_slicing(tokens), 1):>12.4f}"
+        else:
+            before = f"{'skipped':>12}"
+        print(f"{len(tokens):>10} {before} {after:>12.4f} {after / len(tokens) * 1e9:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
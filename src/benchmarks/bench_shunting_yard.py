@@ -0,0 +1,39 @@
+from main.lexer import scan_input_into_token_stream
+from main.parser import parse_list_of_tokens
+from main.interpreter import interpret_node
+from main.stream_evaluator import evaluate_tokens_by_shunting_yard
+from .timing import time_best_of, generate_flat_expression
+
+"""
+Compares evaluating lexed tokens through the syntax tree (parse_list_of_tokens and interpret_node) against the
+shunting-yard engine, which evaluates the tokens without building a tree.
+"""
+
+WORKLOADS = {
+    "repl one-liner x2000": ["7 + 3 * (10 / (12 / (3 + 1) - 1))"] * 2000,
+    "flat, 100 KB": [generate_flat_expression(100_000)],
+    "flat, 1 MB": [generate_flat_expression(1_000_000)],
+    "nested, depth 200": ["(" * 200 + "1" + " + 2) * 3" * 200],
+}
+
+
+def main():
+    print(f"{'workload':<22} {'tree (s)':>10} {'shunting-yard (s)':>18} {'speedup':>9}")
+    for name, expressions in WORKLOADS.items():
+        token_streams = [scan_input_into_token_stream(expression).tokens for expression in expressions]
+
+        def run_tree():
+            for tokens in token_streams:
+                interpret_node(parse_list_of_tokens(tokens).syntax_tree)
+
+        def run_shunting_yard():
+            for tokens in token_streams:
+                evaluate_tokens_by_shunting_yard(tokens)
+
+        tree = time_best_of(run_tree)
+        shunting_yard = time_best_of(run_shunting_yard)
+        print(f"{name:<22} {tree:>10.4f} {shunting_yard:>18.4f} {tree / shunting_yard:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
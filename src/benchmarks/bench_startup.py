@@ -0,0 +1,79 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+"""
+Measures the cold start of the one-shot CLI (python src/main.py -e "<expression>") against a bare interpreter start,
+and lists the modules it imports with -X importtime.
+
+Exits with status 1 when the one-shot path costs more than STARTUP_BUDGET_SECONDS over a bare interpreter, or when it
+imports one of the modules the fast path must avoid, so it can run as a regression check.
+
+Usage: python -m benchmarks.bench_startup [runs]
+"""
+
+# median time the one-shot path may add to `python -c pass`
+STARTUP_BUDGET_SECONDS = 0.015
+
+# modules that would mean the fast path pulled in the full pipeline or the CLI
+FORBIDDEN_MODULES = ("re", "typing", "dataclasses", "argparse", "asyncio", "main.pipeline")
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+EXPRESSION = "7 + 3 * (10 / (12 / (3 + 1) - 1))"
+
+
+def imported_modules(arguments: List[str]) -> Dict[str, int]:
+    """
+    Returns the self import time in microseconds of every module imported by running python with arguments.
+    """
+
+    completed = subprocess.run([sys.executable, "-X", "importtime"] + arguments, capture_output=True, text=True)
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, _, name = line[len("import time:"):].split("|")
+        if self_time.strip().isdigit():
+            modules[name.strip()] = int(self_time)
+    return modules
+
+
+def median_run_seconds(arguments: List[str], runs: int, stdin: str = "") -> float:
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, input=stdin, capture_output=True, text=True, check=False)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    baseline_modules = imported_modules(["-c", "pass"])
+    one_shot_modules = imported_modules([MAIN_SCRIPT, "-e", EXPRESSION])
+    added_modules = {name: micros for name, micros in one_shot_modules.items() if name not in baseline_modules}
+    print("modules imported by the one-shot path beyond a bare interpreter:")
+    for name, micros in sorted(added_modules.items(), key=lambda item: -item[1]):
+        print(f"  {name:<30} {micros:>8} us")
+
+    bare = median_run_seconds(["-c", "pass"], runs)
+    one_shot = median_run_seconds([MAIN_SCRIPT, "-e", EXPRESSION], runs)
+    full = median_run_seconds([MAIN_SCRIPT, "--no-cache", "--batch"], runs, stdin=EXPRESSION + "\n")
+    print(f"{'bare interpreter':<18} {bare * 1000:>8.2f} ms")
+    print(f"{'one-shot -e':<18} {one_shot * 1000:>8.2f} ms  (+{(one_shot - bare) * 1000:.2f} ms)")
+    print(f"{'full pipeline':<18} {full * 1000:>8.2f} ms  (+{(full - bare) * 1000:.2f} ms)")
+
+    failures = [f"imports {name}" for name in FORBIDDEN_MODULES if name in added_modules]
+    if one_shot - bare > STARTUP_BUDGET_SECONDS:
+        failures.append(f"exceeds the startup budget of {STARTUP_BUDGET_SECONDS * 1000:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: one-shot path {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import sys
+import tracemalloc
+from main.lexer import scan_and_tokenize_input, scan_input_into_token_stream
+from main.parser import parse_list_of_tokens
+from .timing import time_best_of, generate_flat_expression
+
+"""
+Compares lists of Token objects with TokenStream arrays: lexing time, parsing time and memory held by the tokens.
+
+Usage: python -m benchmarks.bench_token_stream [size_in_bytes]
+"""
+
+DEFAULT_SIZE_IN_BYTES = 1_000_000
+
+
+def measure_retained_bytes(build):
+    tracemalloc.start()
+    built = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return built, retained
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE_IN_BYTES
+    user_input = generate_flat_expression(size)
+
+    print(f"{'format':<14} {'lex (s)':>10} {'parse (s)':>10} {'token MB':>10}")
+    for name, scan in (("Token list", scan_and_tokenize_input), ("TokenStream", scan_input_into_token_stream)):
+        tokens, retained = measure_retained_bytes(lambda: scan(user_input).tokens)
+        lexing = time_best_of(lambda: scan(user_input))
+        parsing = time_best_of(lambda: parse_list_of_tokens(tokens))
+        print(f"{name:<14} {lexing:>10.4f} {parsing:>10.4f} {retained / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
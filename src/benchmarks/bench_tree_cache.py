@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+from main.lexer import scan_input_into_token_stream
+from main.parser import parse_list_of_tokens
+from main.tree_cache import SyntaxTreeCache
+from .timing import time_best_of, generate_flat_expression
+
+"""
+Compares loading a parsed tree from the on-disk SyntaxTreeCache (hash the file, memory-map the stored tree, rebuild
+the nodes) against reading, lexing and parsing the same expression file again.
+
+Usage: python -m benchmarks.bench_tree_cache [size_in_bytes ...]
+"""
+
+DEFAULT_SIZES_IN_BYTES = [100_000, 1_000_000, 4_000_000]
+
+
+def parse_file(path: str):
+    with open(path, encoding="utf-8") as input_file:
+        return parse_list_of_tokens(scan_input_into_token_stream(input_file.read()).tokens)
+
+
+def main():
+    sizes = [int(argument) for argument in sys.argv[1:]] or DEFAULT_SIZES_IN_BYTES
+
+    print(f"{'size (MB)':>10} {'tree (MB)':>10} {'re-parse (s)':>13} {'cache load (s)':>15} {'speedup':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = SyntaxTreeCache(os.path.join(directory, "trees"))
+        for size in sizes:
+            path = os.path.join(directory, "expression.txt")
+            with open(path, "w", encoding="utf-8") as expression_file:
+                expression_file.write(generate_flat_expression(size))
+
+            # the first call parses and stores the tree
+            cache.parse_file(path)
+            with open(path, "rb") as expression_file:
+                tree_size = os.path.getsize(cache.path_for(expression_file.read()))
+
+            parse_seconds = time_best_of(lambda: parse_file(path))
+            load_seconds = time_best_of(lambda: cache.parse_file(path))
+            print(f"{size / 1e6:>10.1f} {tree_size / 1e6:>10.1f} {parse_seconds:>13.3f} {load_seconds:>15.3f} "
+                  f"{parse_seconds / load_seconds:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
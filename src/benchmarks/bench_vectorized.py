@@ -0,0 +1,41 @@
+import sys
+import numpy as np
+from main.lexer import scan_and_tokenize_input
+from main.parser import parse_list_of_tokens
+from main.interpreter import interpret_node
+from main.vectorized import evaluate_vectorized
+from .timing import time_best_of
+
+"""
+Compares evaluate_vectorized over whole columns against looping interpret_node once per row. Requires NumPy.
+
+Usage: python -m benchmarks.bench_vectorized [row_count]
+"""
+
+DEFAULT_ROW_COUNT = 1_000_000
+FORMULA = "(price * quantity - discount) / (quantity + 1) + -tax * 3"
+# the per-row loop is timed on this many rows and extrapolated
+LOOPED_ROW_COUNT = 20_000
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROW_COUNT
+    generator = np.random.default_rng(0)
+    columns = {name: generator.integers(-1000, 1000, row_count, dtype=np.int64)
+               for name in ("price", "quantity", "discount", "tax")}
+    syntax_tree = parse_list_of_tokens(scan_and_tokenize_input(FORMULA).tokens).syntax_tree
+
+    vectorized = time_best_of(lambda: evaluate_vectorized(syntax_tree, columns))
+
+    looped_rows = min(row_count, LOOPED_ROW_COUNT)
+    rows = [{name: int(column[row]) for name, column in columns.items()} for row in range(looped_rows)]
+    looped = time_best_of(lambda: [interpret_node(syntax_tree, row) for row in rows], 1) * row_count / looped_rows
+
+    print(f"{row_count} rows of {FORMULA}")
+    print(f"interpret_node per row: {looped:>8.3f} s (extrapolated from {looped_rows} rows)")
+    print(f"evaluate_vectorized:    {vectorized:>8.3f} s")
+    print(f"speedup:                {looped / vectorized:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
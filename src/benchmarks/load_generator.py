@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import List, Optional
+from main.server import EvaluationServer, DEFAULT_HOST, MAX_REQUEST_LENGTH
+
+"""
+Load generator for the evaluation server: opens several connections, pipelines requests on each of them and reports
+requests per second with p50 and p99 latency.
+
+Without --port or --unix-socket it starts a server in this process on a temporary Unix socket.
+
+Usage: python -m benchmarks.load_generator [--connections N] [--requests N] [--pipeline N] [--large-every N]
+"""
+
+SMALL_EXPRESSIONS = ["7 + 3 * (10 / (12 / (3 + 1) - 1))", "-(2+3)*-4", "100/5/2", "1 / 0"]
+
+
+def generate_large_expression(term_count: int = 20_000) -> str:
+    return " + ".join(str(index % 1000) for index in range(term_count))
+
+
+async def open_connection(host: Optional[str], port: Optional[int], unix_path: Optional[str]):
+    if unix_path is not None:
+        return await asyncio.open_unix_connection(unix_path, limit=MAX_REQUEST_LENGTH)
+    return await asyncio.open_connection(host, port, limit=MAX_REQUEST_LENGTH)
+
+
+async def run_connection(host: Optional[str], port: Optional[int], unix_path: Optional[str], request_count: int,
+                         pipeline_depth: int, large_every: int, latencies: List[float]) -> None:
+    """
+    Sends request_count requests, keeping up to pipeline_depth of them unanswered at a time.
+    """
+
+    reader, writer = await open_connection(host, port, unix_path)
+    large_expression = generate_large_expression() if large_every else ""
+    send_times: asyncio.Queue = asyncio.Queue(pipeline_depth)
+
+    async def send_requests():
+        for index in range(request_count):
+            if large_every and index % large_every == large_every - 1:
+                expression = large_expression
+            else:
+                expression = SMALL_EXPRESSIONS[index % len(SMALL_EXPRESSIONS)]
+            await send_times.put(time.perf_counter())
+            writer.write(expression.encode("utf-8") + b"\n")
+            await writer.drain()
+
+    sender = asyncio.create_task(send_requests())
+    for _ in range(request_count):
+        await reader.readline()
+        latencies.append(time.perf_counter() - send_times.get_nowait())
+    await sender
+    writer.close()
+    await writer.wait_closed()
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def generate_load(arguments: argparse.Namespace) -> None:
+    server = None
+    host, port, unix_path = arguments.host, arguments.port, arguments.unix_socket
+    if port is None and unix_path is None:
+        unix_path = os.path.join(tempfile.mkdtemp(), "calculator.sock")
+        server = EvaluationServer()
+        await server.start(None, None, unix_path)
+
+    latencies: List[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_connection(host, port, unix_path, arguments.requests, arguments.pipeline,
+                                          arguments.large_every, latencies)
+                           for _ in range(arguments.connections)))
+    seconds = time.perf_counter() - start
+
+    if server is not None:
+        await server.close()
+
+    latencies.sort()
+    print(f"{len(latencies)} requests over {arguments.connections} connections in {seconds:.3f}s")
+    print(f"{len(latencies) / seconds:.0f} requests/s, p50 {percentile(latencies, 0.50) * 1000:.3f}ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.3f}ms")
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Generate load against the evaluation server.")
+    argument_parser.add_argument("--host", default=DEFAULT_HOST)
+    argument_parser.add_argument("--port", type=int)
+    argument_parser.add_argument("--unix-socket")
+    argument_parser.add_argument("--connections", type=int, default=8)
+    argument_parser.add_argument("--requests", type=int, default=20_000, help="requests per connection")
+    argument_parser.add_argument("--pipeline", type=int, default=64, help="unanswered requests per connection")
+    argument_parser.add_argument("--large-every", type=int, default=0,
+                                 help="make every Nth request a large expression (default: never)")
+    asyncio.run(generate_load(argument_parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
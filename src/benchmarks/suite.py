@@ -0,0 +1,164 @@
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+from main.lexer import scan_and_tokenize_input
+from main.parser import parse_list_of_tokens
+from main.interpreter import interpret_node
+
+"""
+Benchmark suite timing scan_and_tokenize_input, parse_list_of_tokens and interpret_node separately over families of
+generated workloads, and recording the peak memory of each stage.
+
+Runs offline. Results are written as JSON and can be compared with a stored baseline:
+
+    python -m benchmarks.suite --output current.json
+    python -m benchmarks.suite --baseline baseline.json
+"""
+
+# deep nesting is capped while the parser recurses per parenthesis level (four frames each); a deeper group is reported
+# as NESTING_TOO_DEEP. The cap is recorded under "capped_workloads" in the results, so they do not look complete.
+NESTING_DEPTH = 200
+
+
+def generate_flat_additions(scale: int) -> str:
+    return " + ".join(str(index % 1000) for index in range(scale))
+
+
+def generate_multiplication_chain(scale: int) -> str:
+    return "1000000" + "".join(" * 7 / 3" if index % 2 else " / 2 * 5" for index in range(scale // 2))
+
+
+def generate_deep_nesting(scale: int) -> str:
+    depth = min(scale, NESTING_DEPTH)
+    nested = "(" * depth + "1" + " + 1)" * depth
+    return " + ".join([nested] * max(1, scale // depth))
+
+
+def describe_nesting_cap(scale: int) -> Dict[str, object]:
+    """
+    Records the depth deep_nesting asked for, the depth it measured, and whether one group at the asked depth parses
+    yet (once it does, NESTING_DEPTH can be raised).
+    """
+
+    tokens = scan_and_tokenize_input("(" * scale + "1" + ")" * scale).tokens
+    return {
+        "requested_depth": scale,
+        "measured_depth": NESTING_DEPTH,
+        "parses_at_requested_depth": parse_list_of_tokens(tokens).was_successful,
+    }
+
+
+def generate_unary_stacking(scale: int) -> str:
+    return " - ".join("- " * 8 + "5" for _ in range(max(1, scale // 9)))
+
+
+def generate_big_literals(scale: int) -> str:
+    digits = "1234567890" * max(1, scale // 40)
+    return f"{digits} * {digits[::-1]} / {digits[:len(digits) // 2]} - {digits}"
+
+
+def generate_one_liners(scale: int) -> List[str]:
+    return ["7 + 3 * (10 / (12 / (3 + 1) - 1))", "-(2+3)*-4", "100/5/2", "2+3*4-5*(6-4)"] * max(1, scale // 40)
+
+
+# every workload is a list of expressions; most families are a single large expression
+WORKLOADS: Dict[str, Callable[[int], List[str]]] = {
+    "flat_additions": lambda scale: [generate_flat_additions(scale)],
+    "multiplication_chain": lambda scale: [generate_multiplication_chain(scale)],
+    "deep_nesting": lambda scale: [generate_deep_nesting(scale)],
+    "unary_stacking": lambda scale: [generate_unary_stacking(scale)],
+    "big_literals": lambda scale: [generate_big_literals(scale)],
+    "repl_one_liners": generate_one_liners,
+}
+
+
+def measure_stage(stage: Callable[[object], object], inputs: List[object], repeat: int) -> Dict[str, float]:
+    """
+    Returns the best wall-clock time of running stage over every input, and the peak memory of one run.
+    """
+
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        for stage_input in inputs:
+            stage(stage_input)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    for stage_input in inputs:
+        stage(stage_input)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def run_workload(expressions: List[str], repeat: int) -> Dict[str, Dict[str, float]]:
+    token_lists = [scan_and_tokenize_input(expression).tokens for expression in expressions]
+    syntax_trees = [parse_list_of_tokens(tokens).syntax_tree for tokens in token_lists]
+    return {
+        "lexer": measure_stage(scan_and_tokenize_input, expressions, repeat),
+        "parser": measure_stage(parse_list_of_tokens, token_lists, repeat),
+        "interpreter": measure_stage(interpret_node, syntax_trees, repeat),
+    }
+
+
+def compare_with_baseline(results: Dict, baseline: Dict) -> None:
+    print(f"{'workload':<22} {'stage':<12} {'baseline (s)':>13} {'current (s)':>12} {'ratio':>7} "
+          f"{'peak ratio':>11}")
+    for workload, stages in results["workloads"].items():
+        for stage, measurement in stages.items():
+            baseline_measurement = baseline.get("workloads", {}).get(workload, {}).get(stage)
+            if baseline_measurement is None:
+                continue
+            ratio = measurement["seconds"] / baseline_measurement["seconds"]
+            peak_ratio = measurement["peak_bytes"] / max(baseline_measurement["peak_bytes"], 1)
+            print(f"{workload:<22} {stage:<12} {baseline_measurement['seconds']:>13.4f} "
+                  f"{measurement['seconds']:>12.4f} {ratio:>6.2f}x {peak_ratio:>10.2f}x")
+    for workload, cap in results.get("capped_workloads", {}).items():
+        print(f"{workload}: capped at depth {cap['measured_depth']} of {cap['requested_depth']}")
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Benchmark every stage of the calculator pipeline.")
+    argument_parser.add_argument("--scale", type=int, default=20_000,
+                                 help="approximate number of terms per workload (default: %(default)s)")
+    argument_parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (default: %(default)s)")
+    argument_parser.add_argument("--workload", action="append", choices=sorted(WORKLOADS),
+                                 help="only run this workload (may be repeated)")
+    argument_parser.add_argument("--output", help="write the results to this JSON file")
+    argument_parser.add_argument("--baseline", help="compare the results with this JSON file")
+    arguments = argument_parser.parse_args()
+
+    results = {
+        "python": sys.version,
+        "platform": platform.platform(),
+        "scale": arguments.scale,
+        "workloads": {},
+        "capped_workloads": {},
+    }
+    for name in arguments.workload or WORKLOADS:
+        results["workloads"][name] = run_workload(WORKLOADS[name](arguments.scale), arguments.repeat)
+    if "deep_nesting" in results["workloads"] and arguments.scale > NESTING_DEPTH:
+        results["capped_workloads"]["deep_nesting"] = describe_nesting_cap(arguments.scale)
+
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            compare_with_baseline(results, json.load(baseline_file))
+    elif not arguments.output:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
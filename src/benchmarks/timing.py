@@ -0,0 +1,25 @@
+import time
+from typing import Callable
+
+
+def time_best_of(function: Callable[[], object], repeat: int = 3) -> float:
+    """
+    Runs function repeat times and returns the fastest wall-clock time in seconds.
+    """
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def generate_flat_expression(size_in_bytes: int) -> str:
+    """
+    Generates a machine-style expression of roughly size_in_bytes characters, mixing every operator and parentheses.
+    """
+
+    chunk = "12 + 3 * (45 - 6) / 7 - "
+    repeats = max(1, size_in_bytes // len(chunk))
+    return chunk * repeats + "1"
@@ -1,28 +1,147 @@
-from main.lexer import scan_and_tokenize_input
-from main.parser import parse_list_of_tokens, ParserResult
-from main.interpreter import interpret_node, InterpreterResult
-from main.ast import LexerResult
+import sys
+
+# one-shot evaluation (-e "<expression>") is only handled here, and returns before the rest of the CLI and the pipeline
+# are imported
+if __name__ == "__main__" and len(sys.argv) == 3 and sys.argv[1] == "-e":
+    from main.oneshot import run_one_shot
+    sys.exit(run_one_shot(sys.argv[2]))
+
+import argparse
+from main.interpreter import InterpreterResult, interpret_node
+from main.pipeline import ENGINES, evaluate_expression
+from main.cache import EvaluationCache, DEFAULT_CACHE_CAPACITY
+from main.streaming import evaluate_stream
+from main.integers import format_integer
+from main.instrumentation import instrumentation
+from main.stream_evaluator import evaluate_mapped_file
+from main.spreadsheet import SpreadsheetSession, StatementResult
+from main.tree_cache import SyntaxTreeCache, DEFAULT_MAX_CACHE_BYTES
+
+
+def parse_command_line_arguments() -> argparse.Namespace:
+    argument_parser = argparse.ArgumentParser(description="A small, arithmetic interpreter.")
+    # listed for --help only: "-e EXPRESSION" is evaluated at the top of this file before argparse is imported
+    argument_parser.add_argument("-e", metavar="EXPRESSION", dest="expression",
+                                 help="evaluate EXPRESSION, print its result and exit (must be the only option)")
+    argument_parser.add_argument("--engine", choices=sorted(ENGINES), default="tree",
+                                 help="how expressions are evaluated (default: %(default)s)")
+    argument_parser.add_argument("--no-cache", action="store_true",
+                                 help="evaluate every expression from scratch instead of using the result cache")
+    argument_parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_CAPACITY,
+                                 help="maximum number of cached results (default: %(default)s)")
+    argument_parser.add_argument("--batch", nargs="?", const="-", metavar="FILE",
+                                 help="evaluate one expression per line of FILE (or stdin) instead of starting the REPL")
+    argument_parser.add_argument("--mmap", metavar="FILE",
+                                 help="memory-map FILE and evaluate the single expression it holds as a stream")
+    argument_parser.add_argument("--progress", action="store_true", help="report progress of --mmap on stderr")
+    argument_parser.add_argument("--file", metavar="FILE",
+                                 help="evaluate the single expression in FILE with the tree pipeline")
+    argument_parser.add_argument("--tree-cache", metavar="DIRECTORY",
+                                 help="keep the parsed tree of every --file in DIRECTORY, so later runs skip parsing")
+    argument_parser.add_argument("--tree-cache-size", type=int, default=DEFAULT_MAX_CACHE_BYTES // 2 ** 20,
+                                 metavar="MIB", help="maximum size of --tree-cache in MiB (default: %(default)s)")
+    argument_parser.add_argument("--instrument", action="store_true",
+                                 help="record per-stage timings and counters, printed by the :stats REPL command")
+    argument_parser.add_argument("--serve", action="store_true",
+                                 help="serve one expression per request line over TCP (and --unix-socket, if given)")
+    argument_parser.add_argument("--host", help="address to serve on (default: 127.0.0.1)")
+    argument_parser.add_argument("--port", type=int, help="port to serve on (default: 7341)")
+    argument_parser.add_argument("--unix-socket", metavar="PATH", help="also serve on this Unix domain socket")
+    argument_parser.add_argument("--workers", type=int,
+                                 help="worker processes for large expressions (default: one per core)")
+    arguments = argument_parser.parse_args()
+    if arguments.expression is not None:
+        argument_parser.error("-e must be the only option: main.py -e EXPRESSION")
+    return arguments
+
+
+def print_progress(offset: int, total: int) -> None:
+    print(f"\r{offset / 2 ** 20:.0f} of {total / 2 ** 20:.0f} MiB ({100 * offset / max(total, 1):.1f}%)",
+          end="" if offset < total else "\n", file=sys.stderr, flush=True)
+
+
+def print_result(interpreter_result: InterpreterResult) -> None:
+    if not interpreter_result.was_successful:
+        print(interpreter_result.error_message)
+        return
+    print(format_integer(interpreter_result.output))
+
+
+def print_statement_result(session: SpreadsheetSession, statement_result: StatementResult) -> None:
+    if statement_result.assigned_name is None:
+        print_result(statement_result.result)
+        return
+    for name in statement_result.recomputed_names:
+        interpreter_result = session.value_of(name)
+        if interpreter_result.was_successful:
+            print(f"{name} = {format_integer(interpreter_result.output)}")
+        else:
+            print(f"{name}: {interpreter_result.error_message}")
+
 
 def main():
+    arguments = parse_command_line_arguments()
+    if arguments.instrument:
+        instrumentation.enable()
+    if arguments.mmap is not None:
+        print_result(evaluate_mapped_file(arguments.mmap, progress=print_progress if arguments.progress else None))
+        return
+
+    if arguments.file is not None:
+        if arguments.tree_cache is not None:
+            tree_cache = SyntaxTreeCache(arguments.tree_cache, arguments.tree_cache_size * 2 ** 20)
+            parser_result = tree_cache.parse_file(arguments.file)
+            if not parser_result.was_successful:
+                print(parser_result.error_message)
+                return
+            print_result(interpret_node(parser_result.syntax_tree))
+            return
+        with open(arguments.file, encoding="utf-8", errors="replace") as input_file:
+            print_result(evaluate_expression(input_file.read()))
+        return
+
+    if arguments.serve:
+        # the event loop and the server are only imported to serve
+        import asyncio
+        from main.server import run_server, DEFAULT_HOST, DEFAULT_PORT
+        host = arguments.host if arguments.host is not None else DEFAULT_HOST
+        port = arguments.port if arguments.port is not None else DEFAULT_PORT
+        asyncio.run(run_server(host, port, arguments.unix_socket, arguments.workers, arguments.engine,
+                               None if arguments.no_cache else arguments.cache_size))
+        return
+
+    evaluate = ENGINES[arguments.engine]
+    if not arguments.no_cache:
+        evaluate = EvaluationCache(arguments.cache_size, evaluate).evaluate
+
+    if arguments.batch == "-":
+        evaluate_stream(sys.stdin.buffer, sys.stdout.buffer, evaluate)
+        return
+    if arguments.batch is not None:
+        with open(arguments.batch, "rb") as input_file:
+            evaluate_stream(input_file, sys.stdout.buffer, evaluate)
+        return
+
     PROMPT = ">>> "
+    STATS_COMMAND = ":stats"
+    session = SpreadsheetSession()
     while True:
-        user_input = input(PROMPT)
-        lexer_result: LexerResult = scan_and_tokenize_input(user_input)
-        if not lexer_result.was_successful:
-            print(lexer_result.error_message)
+        try:
+            user_input = input(PROMPT)
+        except EOFError:
+            print()
+            return
+        if user_input.strip() == STATS_COMMAND:
+            if not instrumentation.enabled:
+                print("Instrumentation is disabled; start the REPL with --instrument")
+                continue
+            print(instrumentation.prometheus_text(), end="")
             continue
-
-        parser_result: ParserResult = parse_list_of_tokens(lexer_result.tokens)
-        if (not parser_result.was_successful) or (parser_result.syntax_tree is None):
-            print(parser_result.error_message)
+        # assignments and lines naming a formula need the session's values; the rest go to the engine and its cache
+        if session.handles(user_input):
+            print_statement_result(session, session.execute(user_input))
             continue
-
-        interpreter_result: InterpreterResult = interpret_node(parser_result.syntax_tree)
-        if not interpreter_result.was_successful:
-            print(interpreter_result.error_message)
-            continue
-
-        print(interpreter_result.output)
+        print_result(evaluate(user_input))
 
 if __name__ == "__main__":
     main()
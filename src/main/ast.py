@@ -1,7 +1,9 @@
 from __future__ import annotations
+from array import array
 from dataclasses import dataclass, field
 from typing import List, Optional, Union
 from enum import Enum
+from types import MappingProxyType
 
 # token type constants (shared)
 NUMBER_TOKEN_TYPE = "NUMBER"
@@ -12,11 +14,42 @@ DIVIDE_TOKEN_TYPE = "DIVIDE"
 WHITESPACE_TOKEN_TYPE = "WHITESPACE"
 LPAREN_TOKEN_TYPE = "LPAREN"
 RPAREN_TOKEN_TYPE = "RPAREN"
+IDENTIFIER_TOKEN_TYPE = "IDENTIFIER"
+ASSIGN_TOKEN_TYPE = "ASSIGN"
 
 TokenType = str
 
-
-@dataclass
+# integer token kinds used by token streams, in the same order as the token types above
+NUMBER_TOKEN_KIND = 0
+PLUS_TOKEN_KIND = 1
+MINUS_TOKEN_KIND = 2
+MULTIPLY_TOKEN_KIND = 3
+DIVIDE_TOKEN_KIND = 4
+WHITESPACE_TOKEN_KIND = 5
+LPAREN_TOKEN_KIND = 6
+RPAREN_TOKEN_KIND = 7
+IDENTIFIER_TOKEN_KIND = 8
+ASSIGN_TOKEN_KIND = 9
+# kind given to token types that have no kind of their own
+UNKNOWN_TOKEN_KIND = 255
+
+TOKEN_TYPE_BY_KIND = (
+    NUMBER_TOKEN_TYPE,
+    PLUS_TOKEN_TYPE,
+    MINUS_TOKEN_TYPE,
+    MULTIPLY_TOKEN_TYPE,
+    DIVIDE_TOKEN_TYPE,
+    WHITESPACE_TOKEN_TYPE,
+    LPAREN_TOKEN_TYPE,
+    RPAREN_TOKEN_TYPE,
+    IDENTIFIER_TOKEN_TYPE,
+    ASSIGN_TOKEN_TYPE,
+)
+TOKEN_KIND_BY_TYPE = MappingProxyType({token_type: kind for kind, token_type in enumerate(TOKEN_TYPE_BY_KIND)})
+
+# tokens and AST nodes are created once per token, so they use __slots__ instead of a per-instance __dict__
+
+@dataclass(slots=True)
 class Token:
     """
     Represents a lexical token with its type and value.
@@ -26,6 +59,30 @@ class Token:
     token_value: str = ""
 
 
+@dataclass(slots=True)
+class TokenStream:
+    """
+    Represents tokens as parallel arrays of integer kinds and source offsets that refer back into the source.
+
+    Token values are only copied out of the source when they are asked for. Indexing a stream materializes a Token, so a
+    stream can stand in wherever a list of tokens is read.
+    """
+
+    source: str
+    kinds: array = field(default_factory=lambda: array("B"))
+    starts: array = field(default_factory=lambda: array("q"))
+    ends: array = field(default_factory=lambda: array("q"))
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, index: int) -> Token:
+        return Token(TOKEN_TYPE_BY_KIND[self.kinds[index]], self.token_value(index))
+
+    def token_value(self, index: int) -> str:
+        return self.source[self.starts[index]:self.ends[index]]
+
+
 @dataclass
 class LexerResult:
     """
@@ -35,25 +92,27 @@ class LexerResult:
     """
 
     was_successful: bool
-    tokens: List[Token] = field(default_factory=list)
+    tokens: List[Token] | TokenStream = field(default_factory=list)
     error_message: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class FactorNode:
     """
-    Represents a factor in an arithmetic expression, which can be a number or a nested expression.
+    Represents a factor in an arithmetic expression, which can be a number, a variable or a nested expression.
 
-    Note that number is stored as a string opposed to an integer. It will be converted to an integer during interpretation.
+    number keeps the digits of the literal as a string; evaluation converts them with convert_literal_to_integer. Keeping
+    the text means parsing never converts huge literals, and trees compare and serialize by their source digits.
     """
 
     sign: int = 1  # 1 for positive, -1 for negative
     number: Optional[str] = None
-    nested_expression: Optional[ExpressionNode] = None
+    nested_expression: Optional[ExpressionNode | ExpressionChainNode] = None
+    variable: Optional[str] = None
 
 
 # allow nesting so we can build left-associative trees
-@dataclass
+@dataclass(slots=True)
 class TermNode:
     """
     Represents a term in an arithmetic expression, which can consist of factors combined by multiplication or division.
@@ -64,7 +123,7 @@ class TermNode:
     second_factor_node: Optional[FactorNode] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ExpressionNode:
     """
     Represents an arithmetic expression, which can consist of terms combined by addition or subtraction.
@@ -75,6 +134,48 @@ class ExpressionNode:
     additional_expression_node: Optional[ExpressionNode] = None
 
 
+@dataclass(slots=True)
+class TermChainNode:
+    """
+    Represents a run of two or more factors joined by multiplication or division as one flat node.
+
+    factor_nodes[0] operators[0] factor_nodes[1] operators[1] ... is evaluated left to right, exactly like the nested
+    left-associative TermNodes it replaces, but the tree stays one level deep however long the run is.
+    """
+
+    factor_nodes: List[FactorNode] = field(default_factory=list)
+    operators: List[ArithmeticOperator] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class ExpressionChainNode:
+    """
+    Represents a run of two or more terms joined by addition or subtraction as one flat node.
+
+    term_nodes[0] operators[0] term_nodes[1] operators[1] ... is evaluated left to right, exactly like the nested
+    left-associative ExpressionNodes it replaces.
+    """
+
+    term_nodes: List[TermNode | TermChainNode] = field(default_factory=list)
+    operators: List[ArithmeticOperator] = field(default_factory=list)
+
+
+# what parsing an expression produces: a single term in an ExpressionNode, or a run of terms in an ExpressionChainNode
+Expression = Union[ExpressionNode, ExpressionChainNode]
+
+SyntaxNode = Union[ExpressionNode, ExpressionChainNode, TermNode, TermChainNode, FactorNode]
+
+
+@dataclass(slots=True)
+class AssignmentNode:
+    """
+    Represents a statement that binds a name to the value of an expression (name = expression).
+    """
+
+    name: str
+    expression: Expression
+
+
 class ArithmeticOperator(Enum):
     """
     Represents arithmetic operators for expressions.
@@ -0,0 +1,150 @@
+from array import array
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Iterator, Sequence, Tuple
+from .interpreter import InterpreterResult
+from .parser import NESTING_TOO_DEEP
+from .pipeline import evaluate_expression
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+# threads share memory, so smaller chunks only cost a submit each and balance the load better
+DEFAULT_THREAD_CHUNK_SIZE = 1_000
+
+# bounds of the signed 64-bit 'q' array type
+SMALLEST_ARRAY_VALUE = -(2 ** 63)
+LARGEST_ARRAY_VALUE = 2 ** 63 - 1
+
+ChunkOutcome = Tuple[bytes, Dict[int, str], Dict[int, int]]
+
+
+@dataclass
+class BatchResult:
+    """
+    Represents the results of evaluating many expressions, in input order.
+
+    - outputs holds one value per expression; entries that failed or did not fit in 64 bits hold 0.
+    - errors maps the index of every failed expression to its error message.
+    - large_outputs maps the index of every output outside the 64-bit range to its value.
+    """
+
+    outputs: array = field(default_factory=lambda: array("q"))
+    errors: Dict[int, str] = field(default_factory=dict)
+    large_outputs: Dict[int, int] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.outputs)
+
+    def result_at(self, index: int) -> InterpreterResult:
+        """
+        Rebuilds the InterpreterResult for the expression at index.
+        """
+
+        if index in self.errors:
+            return InterpreterResult(False, error_message=self.errors[index])
+        return InterpreterResult(True, self.large_outputs.get(index, self.outputs[index]))
+
+
+def evaluate_chunk(expressions: Sequence[str]) -> ChunkOutcome:
+    """
+    Evaluates one chunk of expressions, returning its outputs packed as bytes plus chunk-relative sparse maps.
+
+    Packing the outputs keeps the payload sent back from a worker process small. A RecursionError is recorded as
+    NESTING_TOO_DEEP like any other error, so one expression cannot abort the rest of the batch.
+    """
+
+    outputs = array("q", bytes(8 * len(expressions)))
+    errors: Dict[int, str] = {}
+    large_outputs: Dict[int, int] = {}
+
+    for index, expression in enumerate(expressions):
+        try:
+            result = evaluate_expression(expression)
+        except RecursionError:
+            errors[index] = NESTING_TOO_DEEP
+            continue
+        if not result.was_successful:
+            errors[index] = result.error_message
+        elif SMALLEST_ARRAY_VALUE <= result.output <= LARGEST_ARRAY_VALUE:
+            outputs[index] = result.output
+        else:
+            large_outputs[index] = result.output
+
+    return outputs.tobytes(), errors, large_outputs
+
+
+def split_into_chunks(expressions: Sequence[str], chunk_size: int) -> Iterable[Sequence[str]]:
+    for start in range(0, len(expressions), chunk_size):
+        yield expressions[start:start + chunk_size]
+
+
+def evaluate_many(expressions: Sequence[str], workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE) -> BatchResult:
+    """
+    Evaluates many expressions and returns their results in input order.
+
+    With more than one worker the expressions are split into chunks of chunk_size and evaluated across a process pool;
+    with one worker they are evaluated in this process.
+    """
+
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    chunks: Iterable[Sequence[str]] = split_into_chunks(expressions, chunk_size)
+    if workers == 1:
+        outcomes: Iterable[ChunkOutcome] = map(evaluate_chunk, chunks)
+        return combine_chunk_outcomes(outcomes, chunk_size)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return combine_chunk_outcomes(map_chunks_in_order(executor, chunks, 2 * workers), chunk_size)
+
+
+def evaluate_concurrently(expressions: Sequence[str], threads: int = 4,
+                          chunk_size: int = DEFAULT_THREAD_CHUNK_SIZE) -> BatchResult:
+    """
+    Evaluates many expressions across a pool of threads in this process and returns their results in input order.
+
+    Nothing is pickled, unlike evaluate_many with several workers. The lexer, parser and interpreter keep no mutable
+    module state, so on free-threaded CPython the threads run in parallel; with the GIL they take turns.
+    """
+
+    if threads < 1:
+        raise ValueError("threads must be at least 1")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return combine_chunk_outcomes(map_chunks_in_order(executor, split_into_chunks(expressions, chunk_size),
+                                                          2 * threads), chunk_size)
+
+
+def map_chunks_in_order(executor: Executor, chunks: Iterable[Sequence[str]],
+                        chunks_in_flight: int) -> Iterator[ChunkOutcome]:
+    """
+    Like executor.map, but only keeps chunks_in_flight chunks submitted at a time so huge batches are not all pickled
+    up front. Outcomes are yielded in submission order, which keeps the results in input order.
+    """
+
+    pending: Deque[Future] = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(evaluate_chunk, chunk))
+        if len(pending) >= chunks_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def combine_chunk_outcomes(outcomes: Iterable[ChunkOutcome], chunk_size: int) -> BatchResult:
+    batch_result = BatchResult()
+
+    for chunk_number, (packed_outputs, errors, large_outputs) in enumerate(outcomes):
+        offset = chunk_number * chunk_size
+        batch_result.outputs.frombytes(packed_outputs)
+        for index, error_message in errors.items():
+            batch_result.errors[offset + index] = error_message
+        for index, output in large_outputs.items():
+            batch_result.large_outputs[offset + index] = output
+
+    return batch_result
@@ -0,0 +1,114 @@
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+from .interpreter import InterpreterResult
+from .pipeline import evaluate_expression
+
+DEFAULT_CACHE_CAPACITY = 4096
+
+# whitespace only matters when it separates two word characters, e.g. the two numbers in "1 2"
+whitespace_pattern = re.compile(r"\s+")
+
+
+@dataclass
+class CacheStatistics:
+    """
+    Represents a snapshot of the evaluation cache counters.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+    capacity: int = 0
+
+
+def normalize_source(user_input: str) -> str:
+    """
+    Normalizes an expression so that inputs differing only in whitespace share a cache key.
+
+    A run of whitespace between two word characters is kept as a single space because it separates tokens, every
+    other run is dropped.
+    """
+
+    def is_word_character(character: str) -> bool:
+        return character.isalnum() or character == "_"
+
+    def replace_whitespace(match: re.Match) -> str:
+        start, end = match.span()
+        if 0 < start and end < len(user_input) and is_word_character(user_input[start - 1]) \
+                and is_word_character(user_input[end]):
+            return " "
+        return ""
+
+    return whitespace_pattern.sub(replace_whitespace, user_input)
+
+
+class EvaluationCache:
+    """
+    A size-bounded least-recently-used cache in front of evaluate_expression (or another evaluate function with the
+    same results).
+
+    Both successful results and error results are cached, keyed by the normalized source. The cache can be shared by
+    many threads: its bookkeeping is guarded by a lock, and evaluations themselves run outside of it.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CACHE_CAPACITY,
+                 evaluate: Callable[[str], InterpreterResult] = evaluate_expression):
+        if capacity < 1:
+            raise ValueError("Cache capacity must be at least 1")
+        self.capacity = capacity
+        self.evaluate_uncached = evaluate
+        self.results: OrderedDict[str, InterpreterResult] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def evaluate(self, user_input: str) -> InterpreterResult:
+        """
+        Returns the cached result for user_input, running the pipeline on a miss.
+        """
+
+        key = normalize_source(user_input)
+        result = self.lookup(key)
+        if result is not None:
+            return result
+        result = self.evaluate_uncached(user_input)
+        self.store(key, result)
+        return result
+
+    def lookup(self, key: str) -> Optional[InterpreterResult]:
+        """
+        Returns the cached result for a key made by normalize_source, or None (counted as a miss).
+        """
+
+        with self.lock:
+            result = self.results.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.results.move_to_end(key)
+            return result
+
+    def store(self, key: str, result: InterpreterResult) -> None:
+        with self.lock:
+            self.results[key] = result
+            if len(self.results) > self.capacity:
+                self.results.popitem(last=False)
+                self.evictions += 1
+
+    def statistics(self) -> CacheStatistics:
+        with self.lock:
+            return CacheStatistics(self.hits, self.misses, self.evictions, len(self.results), self.capacity)
+
+    def clear(self) -> None:
+        """
+        Drops every cached result; the counters are kept.
+        """
+
+        with self.lock:
+            self.results.clear()
@@ -0,0 +1,116 @@
+from typing import Callable, List, Mapping, Optional
+from dataclasses import dataclass
+from types import MappingProxyType
+from .ast import (
+    SyntaxNode,
+    ArithmeticOperator,
+)
+from .interpreter import (
+    InterpreterResult,
+    NEGATE_INSTRUCTION,
+    UNDEFINED_VARIABLE,
+    VariableInstruction,
+    flatten_node_into_postfix,
+    report_error_for_interpreter,
+)
+
+# literals at least this large are passed in through a constants tuple instead of being written into the source
+LARGEST_INLINE_LITERAL = 10 ** 18
+
+OPERATOR_SOURCE = MappingProxyType({
+    ArithmeticOperator.PLUS: "{0} + {1}",
+    ArithmeticOperator.MINUS: "{0} - {1}",
+    ArithmeticOperator.MULTIPLY: "{0} * {1}",
+    # divide_truncating inlined, as a call per division would dominate the generated code; operands are always locals
+    # or literals, so repeating them is safe
+    ArithmeticOperator.DIVIDE: "({0} // {1} if ({0} >= 0) == ({1} > 0) else -(-{0} // {1}))",
+})
+
+
+@dataclass
+class CompiledExpression:
+    """
+    Represents an AST compiled into a Python function.
+
+    - source is the generated Python source, kept for debugging.
+    """
+
+    function: Callable[[Mapping[str, int]], int]
+    source: str = ""
+
+    def evaluate(self, variables: Optional[Mapping[str, int]] = None) -> InterpreterResult:
+        """
+        Runs the compiled function with the given variables, reporting errors the same way interpret_node does.
+        """
+
+        try:
+            return InterpreterResult(True, self.function(variables if variables is not None else {}))
+        except ZeroDivisionError:
+            return report_error_for_interpreter("You cannot divide by zero")
+        except KeyError as error:
+            return report_error_for_interpreter(UNDEFINED_VARIABLE.format(error.args[0]))
+
+
+@dataclass
+class CompilerResult:
+    """
+    Represents the result of compiling an AST.
+
+    - error_message will always be an empty string if was_successful is True.
+    """
+
+    was_successful: bool
+    compiled_expression: Optional[CompiledExpression] = None
+    error_message: str = ""
+
+
+def compile_syntax_tree(syntax_tree: SyntaxNode) -> CompilerResult:
+    """
+    Compiles an AST into a Python function that computes the same value as interpret_node.
+
+    The tree is emitted as straight-line code: every intermediate value lives in a local named after its depth on the
+    evaluation stack, so the generated source never nests and deep trees compile as easily as flat ones.
+    """
+
+    constants: List[int] = []
+    # each entry is the Python source for the value at that depth of the evaluation stack
+    operands: List[str] = []
+    lines: List[str] = []
+
+    for instruction in flatten_node_into_postfix(syntax_tree):
+        if type(instruction) is int:
+            if abs(instruction) < LARGEST_INLINE_LITERAL:
+                operands.append(f"({instruction})" if instruction < 0 else str(instruction))
+            else:
+                operands.append(f"c[{len(constants)}]")
+                constants.append(instruction)
+            continue
+
+        if isinstance(instruction, VariableInstruction):
+            register = f"s{len(operands)}"
+            lines.append(f"{register} = {'-' if instruction.sign != 1 else ''}v[{instruction.name!r}]")
+            operands.append(register)
+            continue
+
+        register = f"s{len(operands) - 1}"
+        if instruction is NEGATE_INSTRUCTION:
+            lines.append(f"{register} = -{operands[-1]}")
+            operands[-1] = register
+            continue
+
+        if instruction not in OPERATOR_SOURCE:
+            return CompilerResult(False, error_message="Compiler reached unreachable code")
+
+        right = operands.pop()
+        register = f"s{len(operands) - 1}"
+        lines.append(f"{register} = " + OPERATOR_SOURCE[instruction].format(operands[-1], right))
+        operands[-1] = register
+
+    if len(operands) != 1:
+        return CompilerResult(False, error_message="Compiler reached unreachable code")
+    lines.append(f"return {operands[0]}")
+
+    source = "def compiled_expression(v):\n    " + "\n    ".join(lines) + "\n"
+    namespace = {"c": tuple(constants)}
+    exec(compile(source, "<compiled expression>", "exec"), namespace)
+    return CompilerResult(True, CompiledExpression(namespace["compiled_expression"], source))
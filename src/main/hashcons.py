@@ -0,0 +1,70 @@
+from typing import Dict, List, Tuple
+from .ast import ExpressionNode, TermNode, FactorNode, TermChainNode, ExpressionChainNode, SyntaxNode
+
+
+def child_nodes(node: SyntaxNode) -> Tuple[object, ...]:
+    if isinstance(node, FactorNode):
+        return (node.nested_expression,)
+    if isinstance(node, TermNode):
+        return node.first_factor_node, node.second_factor_node
+    if isinstance(node, ExpressionNode):
+        return node.single_term_node, node.additional_expression_node
+    if isinstance(node, TermChainNode):
+        return tuple(node.factor_nodes)
+    return tuple(node.term_nodes)
+
+
+def intern_syntax_tree(syntax_tree: SyntaxNode) -> Tuple[SyntaxNode, int]:
+    """
+    Hash-conses an AST: structurally identical subtrees are replaced by one shared node.
+
+    Returns the interned tree and the number of nodes that were deduplicated away. Nodes are rewritten in place, so the
+    tree must not be mutated afterwards; a change to a shared node shows up at every place it is used. The tree is
+    walked with an explicit stack, so trees of any depth can be interned.
+    """
+
+    # each structure key holds the ids of already interned children, which stay alive in interned_nodes
+    interned_nodes: Dict[tuple, SyntaxNode] = {}
+    deduplicated_node_count = 0
+
+    pending: List[Tuple[object, bool]] = [(syntax_tree, False)]
+    # interned node (or None) for every finished subtree, in the order the subtrees finished
+    finished: List[object] = []
+
+    while pending:
+        node, children_are_finished = pending.pop()
+        if node is None:
+            finished.append(None)
+            continue
+
+        children = child_nodes(node)
+        if not children_are_finished:
+            pending.append((node, True))
+            pending.extend((child, False) for child in reversed(children))
+            continue
+
+        interned_children = finished[len(finished) - len(children):]
+        del finished[len(finished) - len(children):]
+
+        if isinstance(node, FactorNode):
+            node.nested_expression, = interned_children
+            key = (FactorNode, node.sign, node.number, node.variable, id(node.nested_expression))
+        elif isinstance(node, TermNode):
+            node.first_factor_node, node.second_factor_node = interned_children
+            key = (TermNode, id(node.first_factor_node), node.operator, id(node.second_factor_node))
+        elif isinstance(node, ExpressionNode):
+            node.single_term_node, node.additional_expression_node = interned_children
+            key = (ExpressionNode, id(node.single_term_node), node.operator, id(node.additional_expression_node))
+        elif isinstance(node, TermChainNode):
+            node.factor_nodes = interned_children
+            key = (TermChainNode, tuple(map(id, interned_children)), tuple(node.operators))
+        else:
+            node.term_nodes = interned_children
+            key = (ExpressionChainNode, tuple(map(id, interned_children)), tuple(node.operators))
+
+        interned_node = interned_nodes.setdefault(key, node)
+        if interned_node is not node:
+            deduplicated_node_count += 1
+        finished.append(interned_node)
+
+    return finished[0], deduplicated_node_count
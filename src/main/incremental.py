@@ -0,0 +1,315 @@
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+from .ast import (
+    TokenStream,
+    ExpressionNode,
+    TermNode,
+    FactorNode,
+    TermChainNode,
+    ExpressionChainNode,
+    Expression,
+    ArithmeticOperator,
+    NUMBER_TOKEN_KIND,
+    PLUS_TOKEN_KIND,
+    MINUS_TOKEN_KIND,
+    MULTIPLY_TOKEN_KIND,
+    DIVIDE_TOKEN_KIND,
+    LPAREN_TOKEN_KIND,
+    RPAREN_TOKEN_KIND,
+    IDENTIFIER_TOKEN_KIND,
+)
+from .lexer import scan_input_into_token_stream
+from .parser import parse_list_of_tokens
+from .interpreter import (
+    interpret_node,
+    InterpreterResult,
+    UNDEFINED_VARIABLE,
+    report_error_for_interpreter,
+)
+from .integers import convert_literal_to_integer, divide_truncating
+
+DEFAULT_MAX_CACHED_GROUPS = 65536
+
+# change in parenthesis depth caused by each token kind, indexed by kind
+DEPTH_CHANGE_BY_KIND = tuple(1 if kind == LPAREN_TOKEN_KIND else -1 if kind == RPAREN_TOKEN_KIND else 0
+                             for kind in range(256))
+
+
+def compute_depths(kinds: List[int], initial_depth: int = 0) -> List[int]:
+    """
+    Returns the parenthesis depth after each token.
+    """
+
+    return list(accumulate(map(DEPTH_CHANGE_BY_KIND.__getitem__, kinds), initial=initial_depth))[1:]
+
+
+def shift_all(values: List[int], amount: int) -> List[int]:
+    return list(map(amount.__add__, values))
+
+
+@dataclass(frozen=True, slots=True)
+class EvaluationError:
+    """
+    Represents an interpreter error carried through incremental evaluation in place of a value.
+    """
+
+    error_message: str
+
+
+GroupValue = Union[int, EvaluationError]
+
+
+class ParseFailure(Exception):
+    """
+    Raised by the incremental parser when the tokens do not form a valid expression.
+
+    The session then re-parses from scratch with parse_list_of_tokens to report the exact parser error.
+    """
+
+
+@dataclass
+class EditStatistics:
+    """
+    Represents how much work the last edit needed.
+    """
+
+    relexed_token_count: int = 0
+    parsed_group_count: int = 0
+    reused_group_count: int = 0
+
+
+class IncrementalSession:
+    """
+    Keeps the tokens, syntax tree and value of an expression that is edited a little at a time.
+
+    Each edit only re-lexes the tokens around the edited text. Parenthesized groups are cached by their source text, so
+    groups the edit did not touch are reused along with their values instead of being parsed and evaluated again.
+    """
+
+    def __init__(self, source: str = "", max_cached_groups: int = DEFAULT_MAX_CACHED_GROUPS):
+        self.source = source
+        self.max_cached_groups = max_cached_groups
+        self.kinds: List[int] = []
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        # parenthesis depth after each token, used to find matching parentheses
+        self.depths: List[int] = []
+        self.tokens_are_valid = False
+        self.group_cache: Dict[str, Tuple[Expression, GroupValue]] = {}
+        self.syntax_tree: Optional[Expression] = None
+        self.statistics = EditStatistics()
+        self.result = self.relex_everything()
+
+    def apply_edit(self, offset: int, deleted_length: int, inserted_text: str) -> InterpreterResult:
+        """
+        Replaces deleted_length characters at offset with inserted_text and returns the new result.
+        """
+
+        if not (0 <= offset and 0 <= deleted_length and offset + deleted_length <= len(self.source)):
+            raise ValueError("Edit is outside of the source")
+
+        old_source = self.source
+        self.source = old_source[:offset] + inserted_text + old_source[offset + deleted_length:]
+        self.statistics = EditStatistics()
+
+        if not self.tokens_are_valid:
+            self.result = self.relex_everything()
+            return self.result
+
+        lexer_error = self.relex_around_edit(offset, offset + deleted_length, len(inserted_text) - deleted_length,
+                                             len(old_source))
+        if lexer_error is not None:
+            self.tokens_are_valid = False
+            self.syntax_tree = None
+            self.result = report_error_for_interpreter(lexer_error)
+            return self.result
+
+        self.result = self.parse_and_evaluate()
+        return self.result
+
+    def relex_everything(self) -> InterpreterResult:
+        lexer_result = scan_input_into_token_stream(self.source)
+        if not lexer_result.was_successful:
+            self.tokens_are_valid = False
+            self.syntax_tree = None
+            return report_error_for_interpreter(lexer_result.error_message)
+
+        token_stream: TokenStream = lexer_result.tokens
+        self.kinds = token_stream.kinds.tolist()
+        self.starts = token_stream.starts.tolist()
+        self.ends = token_stream.ends.tolist()
+        self.depths = compute_depths(self.kinds)
+        self.tokens_are_valid = True
+        self.statistics.relexed_token_count = len(self.kinds)
+        return self.parse_and_evaluate()
+
+    def relex_around_edit(self, edit_start: int, edit_end: int, length_change: int,
+                          old_length: int) -> Optional[str]:
+        """
+        Re-lexes the tokens touching the edited range (in old offsets) plus one token of context on each side.
+
+        Tokens outside that window keep their kinds; the ones after it are shifted by length_change (and their depths by
+        the change in depth across the window). Returns a lexer error message, or None on success.
+        """
+
+        kinds, starts, ends, depths = self.kinds, self.starts, self.ends, self.depths
+        number_of_tokens = len(kinds)
+
+        # the window runs from the end of the last untouched token before the edit to the start of the first one after
+        first = max(bisect_left(ends, edit_start) - 1, 0)
+        last = min(bisect_right(starts, edit_end) + 1, number_of_tokens)
+        window_start = ends[first - 1] if first > 0 else 0
+        window_end = starts[last] if last < number_of_tokens else old_length
+
+        lexer_result = scan_input_into_token_stream(self.source[window_start:window_end + length_change])
+        if not lexer_result.was_successful:
+            return lexer_result.error_message
+
+        window_tokens: TokenStream = lexer_result.tokens
+        window_kinds = window_tokens.kinds.tolist()
+        depth_before_window = depths[first - 1] if first > 0 else 0
+        old_depth_after_window = depths[last - 1] if last > 0 else 0
+        window_depths = compute_depths(window_kinds, depth_before_window)
+        depth_change = (window_depths[-1] if window_depths else depth_before_window) - old_depth_after_window
+
+        kinds[first:last] = window_kinds
+        starts[first:last] = shift_all(window_tokens.starts.tolist(), window_start)
+        ends[first:last] = shift_all(window_tokens.ends.tolist(), window_start)
+        depths[first:last] = window_depths
+
+        shifted_from = first + len(window_kinds)
+        if length_change:
+            starts[shifted_from:] = shift_all(starts[shifted_from:], length_change)
+            ends[shifted_from:] = shift_all(ends[shifted_from:], length_change)
+        if depth_change:
+            depths[shifted_from:] = shift_all(depths[shifted_from:], depth_change)
+
+        self.statistics.relexed_token_count = len(window_tokens)
+        return None
+
+    def parse_and_evaluate(self) -> InterpreterResult:
+        if len(self.group_cache) > self.max_cached_groups:
+            self.group_cache.clear()
+
+        try:
+            syntax_tree, value = self.parse_expression_and_value()
+        except (ParseFailure, RecursionError):
+            # let the regular parser report the exact error (NESTING_TOO_DEEP included); it uses fewer frames per group
+            # than this one, so groups nested too deep here may still parse there, and are then evaluated by the
+            # interpreter
+            token_stream = TokenStream(self.source, array("B", self.kinds), array("q", self.starts),
+                                       array("q", self.ends))
+            parser_result = parse_list_of_tokens(token_stream)
+            self.syntax_tree = parser_result.syntax_tree
+            if not parser_result.was_successful or parser_result.syntax_tree is None:
+                return report_error_for_interpreter(parser_result.error_message)
+            return interpret_node(parser_result.syntax_tree)
+
+        self.syntax_tree = syntax_tree
+        if isinstance(value, EvaluationError):
+            return report_error_for_interpreter(value.error_message)
+        return InterpreterResult(True, value)
+
+    def parse_expression_and_value(self) -> Tuple[Expression, GroupValue]:
+        """
+        Parses the tokens into a syntax tree and evaluates it in the same pass, reusing cached groups.
+
+        Follows the grammar and tree shape of parse_list_of_tokens; any error is raised as ParseFailure.
+        """
+
+        kinds, starts, ends, depths, source = self.kinds, self.starts, self.ends, self.depths, self.source
+        number_of_tokens = len(kinds)
+        group_cache = self.group_cache
+        statistics = self.statistics
+
+        def combine(left: GroupValue, operator: ArithmeticOperator, right: GroupValue) -> GroupValue:
+            # the left operand is evaluated first, so its error wins
+            if isinstance(left, EvaluationError):
+                return left
+            if isinstance(right, EvaluationError):
+                return right
+            if operator is ArithmeticOperator.PLUS:
+                return left + right
+            if operator is ArithmeticOperator.MINUS:
+                return left - right
+            if operator is ArithmeticOperator.MULTIPLY:
+                return left * right
+            if right == 0:
+                return EvaluationError("You cannot divide by zero")
+            return divide_truncating(left, right)
+
+        def parse_expression(position: int) -> Tuple[Expression, GroupValue, int]:
+            term_node, value, position = parse_term(position)
+            if position >= number_of_tokens or kinds[position] not in (PLUS_TOKEN_KIND, MINUS_TOKEN_KIND):
+                return ExpressionNode(term_node), value, position
+            expression_chain_node = ExpressionChainNode([term_node])
+            while position < number_of_tokens and kinds[position] in (PLUS_TOKEN_KIND, MINUS_TOKEN_KIND):
+                operator = ArithmeticOperator.PLUS if kinds[position] == PLUS_TOKEN_KIND else ArithmeticOperator.MINUS
+                next_term_node, next_value, position = parse_term(position + 1)
+                expression_chain_node.term_nodes.append(next_term_node)
+                expression_chain_node.operators.append(operator)
+                value = combine(value, operator, next_value)
+            return expression_chain_node, value, position
+
+        def parse_term(position: int) -> Tuple[TermNode | TermChainNode, GroupValue, int]:
+            factor_node, value, position = parse_factor(position)
+            if position >= number_of_tokens or kinds[position] not in (MULTIPLY_TOKEN_KIND, DIVIDE_TOKEN_KIND):
+                return TermNode(factor_node), value, position
+            term_chain_node = TermChainNode([factor_node])
+            while position < number_of_tokens and kinds[position] in (MULTIPLY_TOKEN_KIND, DIVIDE_TOKEN_KIND):
+                operator = ArithmeticOperator.MULTIPLY if kinds[position] == MULTIPLY_TOKEN_KIND \
+                    else ArithmeticOperator.DIVIDE
+                next_factor_node, next_value, position = parse_factor(position + 1)
+                term_chain_node.factor_nodes.append(next_factor_node)
+                term_chain_node.operators.append(operator)
+                value = combine(value, operator, next_value)
+            return term_chain_node, value, position
+
+        def parse_factor(position: int) -> Tuple[FactorNode, GroupValue, int]:
+            sign = 1
+            while position < number_of_tokens and kinds[position] in (PLUS_TOKEN_KIND, MINUS_TOKEN_KIND):
+                if kinds[position] == MINUS_TOKEN_KIND:
+                    sign = -sign
+                position += 1
+            if position >= number_of_tokens:
+                raise ParseFailure()
+
+            kind = kinds[position]
+            if kind == NUMBER_TOKEN_KIND:
+                number = source[starts[position]:ends[position]]
+                return FactorNode(sign, number=number), convert_literal_to_integer(number) * sign, position + 1
+            if kind == IDENTIFIER_TOKEN_KIND:
+                name = source[starts[position]:ends[position]]
+                return FactorNode(sign, variable=name), EvaluationError(UNDEFINED_VARIABLE.format(name)), position + 1
+            if kind != LPAREN_TOKEN_KIND:
+                raise ParseFailure()
+
+            nested_expression, value, position = parse_group(position)
+            if sign != 1 and not isinstance(value, EvaluationError):
+                value = -value
+            return FactorNode(sign, nested_expression=nested_expression), value, position
+
+        def parse_group(opening: int) -> Tuple[Expression, GroupValue, int]:
+            try:
+                closing = depths.index(depths[opening] - 1, opening + 1)
+            except ValueError:
+                raise ParseFailure()
+
+            key = source[starts[opening]:ends[closing]]
+            cached = group_cache.get(key)
+            if cached is not None:
+                statistics.reused_group_count += 1
+                return cached[0], cached[1], closing + 1
+
+            nested_expression, value, position = parse_expression(opening + 1)
+            if position != closing:
+                raise ParseFailure()
+            statistics.parsed_group_count += 1
+            group_cache[key] = (nested_expression, value)
+            return nested_expression, value, closing + 1
+
+        syntax_tree, value, _ = parse_expression(0)
+        return syntax_tree, value
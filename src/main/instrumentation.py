@@ -0,0 +1,223 @@
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Callable, Dict, List, Tuple, TypeVar
+from .ast import SyntaxNode
+from .hashcons import child_nodes
+
+LEXER_STAGE = "lexer"
+PARSER_STAGE = "parser"
+INTERPRETER_STAGE = "interpreter"
+STAGES = (LEXER_STAGE, PARSER_STAGE, INTERPRETER_STAGE)
+
+# upper bounds, in seconds, of the latency histogram buckets; a final +Inf bucket catches the rest
+LATENCY_BUCKET_BOUNDS = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, 10.0)
+
+StageFunction = TypeVar("StageFunction", bound=Callable)
+
+
+@dataclass
+class StageEvent:
+    """
+    Represents one run of a pipeline stage, as passed to instrumentation hooks.
+
+    - token_count is only set for the lexer, node_count and tree_depth only for the parser.
+    """
+
+    stage: str
+    seconds: float
+    was_successful: bool
+    token_count: int = 0
+    node_count: int = 0
+    tree_depth: int = 0
+
+
+@dataclass
+class StageStatistics:
+    """
+    Represents the counters collected for one pipeline stage.
+
+    - bucket_counts[i] counts the runs whose latency fell at or below LATENCY_BUCKET_BOUNDS[i] but above the previous
+      bound; the last entry counts the runs slower than every bound.
+    """
+
+    run_count: int = 0
+    error_count: int = 0
+    total_seconds: float = 0.0
+    bucket_counts: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKET_BOUNDS) + 1))
+    token_count: int = 0
+    node_count: int = 0
+    max_tree_depth: int = 0
+
+
+def measure_syntax_tree(syntax_tree: SyntaxNode) -> Tuple[int, int]:
+    """
+    Returns the number of nodes in an AST and its depth, without recursion.
+    """
+
+    node_count = 0
+    max_depth = 0
+    pending: List[Tuple[object, int]] = [(syntax_tree, 1)]
+    while pending:
+        node, depth = pending.pop()
+        if node is None:
+            continue
+        node_count += 1
+        max_depth = max(max_depth, depth)
+        pending.extend((child, depth + 1) for child in child_nodes(node))
+    return node_count, max_depth
+
+
+class PipelineInstrumentation:
+    """
+    Collects per-stage latency histograms and counters, and forwards every StageEvent to registered hooks.
+
+    Collection is off until enable() is called; while it is off the instrumented stages only pay for one attribute
+    check per call.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.hooks: List[Callable[[StageEvent], None]] = []
+        self.lock = threading.Lock()
+        # hook calls that raised; a failing exporter must not break the stage it observes
+        self.failed_hook_count = 0
+        self.stage_statistics: Dict[str, StageStatistics] = {stage: StageStatistics() for stage in STAGES}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def add_hook(self, hook: Callable[[StageEvent], None]) -> None:
+        """
+        Registers a callable that receives every StageEvent, e.g. to export it elsewhere.
+
+        An exception raised by a hook is swallowed and counted in failed_hook_count, so it cannot fail the lexing,
+        parsing or interpreting that triggered it.
+        """
+
+        with self.lock:
+            self.hooks = self.hooks + [hook]
+
+    def remove_hook(self, hook: Callable[[StageEvent], None]) -> None:
+        """
+        Unregisters hook. Hooks are compared by equality, so a bound method such as events.append matches the one that
+        was added even though every attribute access creates a new method object.
+        """
+
+        with self.lock:
+            self.hooks = [registered for registered in self.hooks if registered != hook]
+
+    def reset(self) -> None:
+        with self.lock:
+            self.stage_statistics = {stage: StageStatistics() for stage in STAGES}
+
+    def record(self, event: StageEvent) -> None:
+        with self.lock:
+            statistics = self.stage_statistics[event.stage]
+            statistics.run_count += 1
+            statistics.total_seconds += event.seconds
+            statistics.bucket_counts[bisect_left(LATENCY_BUCKET_BOUNDS, event.seconds)] += 1
+            if not event.was_successful:
+                statistics.error_count += 1
+            statistics.token_count += event.token_count
+            statistics.node_count += event.node_count
+            statistics.max_tree_depth = max(statistics.max_tree_depth, event.tree_depth)
+            hooks = self.hooks
+
+        for hook in hooks:
+            try:
+                hook(event)
+            except Exception:
+                with self.lock:
+                    self.failed_hook_count += 1
+
+    def statistics(self) -> Dict[str, StageStatistics]:
+        """
+        Returns a copy of the counters of every stage.
+        """
+
+        with self.lock:
+            return {stage: StageStatistics(statistics.run_count, statistics.error_count, statistics.total_seconds,
+                                           list(statistics.bucket_counts), statistics.token_count,
+                                           statistics.node_count, statistics.max_tree_depth)
+                    for stage, statistics in self.stage_statistics.items()}
+
+    def prometheus_text(self) -> str:
+        """
+        Renders the counters in the Prometheus text exposition format.
+        """
+
+        statistics = self.statistics()
+        lines = [
+            "# HELP calculator_stage_duration_seconds Time spent in each pipeline stage.",
+            "# TYPE calculator_stage_duration_seconds histogram",
+        ]
+        for stage, stage_statistics in statistics.items():
+            cumulative_count = 0
+            for bound, bucket_count in zip(LATENCY_BUCKET_BOUNDS + (float("inf"),), stage_statistics.bucket_counts):
+                cumulative_count += bucket_count
+                label = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'calculator_stage_duration_seconds_bucket{{stage="{stage}",le="{label}"}} '
+                             f'{cumulative_count}')
+            lines.append(f'calculator_stage_duration_seconds_sum{{stage="{stage}"}} {stage_statistics.total_seconds!r}')
+            lines.append(f'calculator_stage_duration_seconds_count{{stage="{stage}"}} {stage_statistics.run_count}')
+
+        lines += [
+            "# HELP calculator_stage_errors_total Runs of each pipeline stage that reported an error.",
+            "# TYPE calculator_stage_errors_total counter",
+        ]
+        lines += [f'calculator_stage_errors_total{{stage="{stage}"}} {stage_statistics.error_count}'
+                  for stage, stage_statistics in statistics.items()]
+        lines += [
+            "# HELP calculator_tokens_total Tokens produced by the lexer.",
+            "# TYPE calculator_tokens_total counter",
+            f"calculator_tokens_total {statistics[LEXER_STAGE].token_count}",
+            "# HELP calculator_ast_nodes_total AST nodes built by the parser.",
+            "# TYPE calculator_ast_nodes_total counter",
+            f"calculator_ast_nodes_total {statistics[PARSER_STAGE].node_count}",
+            "# HELP calculator_ast_max_depth Deepest AST built by the parser.",
+            "# TYPE calculator_ast_max_depth gauge",
+            f"calculator_ast_max_depth {statistics[PARSER_STAGE].max_tree_depth}",
+            "# HELP calculator_failed_hooks_total Instrumentation hook calls that raised.",
+            "# TYPE calculator_failed_hooks_total counter",
+            f"calculator_failed_hooks_total {self.failed_hook_count}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+# process-wide instrumentation used by the pipeline entry points
+instrumentation = PipelineInstrumentation()
+
+
+def describe_stage_result(stage: str, result, seconds: float) -> StageEvent:
+    event = StageEvent(stage, seconds, result.was_successful)
+    if stage == LEXER_STAGE and result.was_successful:
+        event.token_count = len(result.tokens)
+    elif stage == PARSER_STAGE and result.was_successful and result.syntax_tree is not None:
+        event.node_count, event.tree_depth = measure_syntax_tree(result.syntax_tree)
+    return event
+
+
+def instrument_stage(stage: str) -> Callable[[StageFunction], StageFunction]:
+    """
+    Decorates a pipeline entry point so that each call is timed and recorded while instrumentation is enabled.
+    """
+
+    def decorate(function: StageFunction) -> StageFunction:
+        @wraps(function)
+        def instrumented_function(*arguments, **keyword_arguments):
+            if not instrumentation.enabled:
+                return function(*arguments, **keyword_arguments)
+            start = time.perf_counter()
+            result = function(*arguments, **keyword_arguments)
+            instrumentation.record(describe_stage_result(stage, result, time.perf_counter() - start))
+            return result
+
+        return instrumented_function
+
+    return decorate
@@ -0,0 +1,76 @@
+from typing import List, Union
+
+"""
+Exact integer helpers shared by every evaluation engine.
+
+CPython refuses to convert strings of more than 4300 digits to int (and back), and does so in quadratic time. The
+conversions below split long numbers into blocks small enough for the built-ins and combine the blocks with big-integer
+multiplication, which has no digit limit and is subquadratic.
+"""
+
+# numbers with at most this many digits are converted by the built-ins directly
+DIRECT_CONVERSION_DIGITS = 2048
+
+
+def divide_truncating(dividend: int, divisor: int) -> int:
+    """
+    Divides exactly, truncating toward zero. Raises ZeroDivisionError when divisor is zero.
+    """
+
+    if (dividend >= 0) == (divisor > 0):
+        return dividend // divisor
+    return -(-dividend // divisor)
+
+
+def convert_literal_to_integer(digits: Union[str, bytes]) -> int:
+    """
+    Converts a run of decimal digits of any length to an int.
+    """
+
+    length = len(digits)
+    if length <= DIRECT_CONVERSION_DIGITS:
+        return int(digits)
+
+    # powers_of_ten[level] == 10 ** (DIRECT_CONVERSION_DIGITS * 2 ** level)
+    powers_of_ten: List[int] = [10 ** DIRECT_CONVERSION_DIGITS]
+    while DIRECT_CONVERSION_DIGITS << len(powers_of_ten) < length:
+        powers_of_ten.append(powers_of_ten[-1] * powers_of_ten[-1])
+
+    def convert(start: int, end: int, level: int) -> int:
+        # the low part is exactly DIRECT_CONVERSION_DIGITS * 2 ** level digits long
+        while level >= 0 and end - start <= DIRECT_CONVERSION_DIGITS << level:
+            level -= 1
+        if level < 0:
+            return int(digits[start:end])
+        split = end - (DIRECT_CONVERSION_DIGITS << level)
+        return convert(start, split, level - 1) * powers_of_ten[level] + convert(split, end, level - 1)
+
+    return convert(0, length, len(powers_of_ten) - 1)
+
+
+def format_integer(value: int) -> str:
+    """
+    Converts an int of any size to its decimal string.
+    """
+
+    if value < 0:
+        return "-" + format_integer(-value)
+
+    powers_of_ten: List[int] = [10 ** DIRECT_CONVERSION_DIGITS]
+    if value < powers_of_ten[0]:
+        return str(value)
+    while powers_of_ten[-1].bit_length() * 2 - 1 <= value.bit_length():
+        powers_of_ten.append(powers_of_ten[-1] * powers_of_ten[-1])
+
+    def format_block(block: int, level: int, width: int) -> str:
+        # block < 10 ** (DIRECT_CONVERSION_DIGITS * 2 ** (level + 1)); width > 0 zero-pads to that many digits
+        if level < 0:
+            return str(block).zfill(width)
+        high, low = divmod(block, powers_of_ten[level])
+        low_width = DIRECT_CONVERSION_DIGITS << level
+        if high == 0 and width == 0:
+            return format_block(low, level - 1, 0)
+        high_text = format_block(high, level - 1, max(width - low_width, 0))
+        return high_text + format_block(low, level - 1, low_width)
+
+    return format_block(value, len(powers_of_ten) - 1, 0)
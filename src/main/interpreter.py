@@ -1,11 +1,16 @@
-from typing import Union
+from typing import Dict, Iterator, List, Mapping, Optional, Union
 from dataclasses import dataclass
 from .ast import (
     ExpressionNode,
     TermNode,
     FactorNode,
+    TermChainNode,
+    ExpressionChainNode,
+    SyntaxNode,
     ArithmeticOperator,
 )
+from .integers import convert_literal_to_integer, divide_truncating
+from .instrumentation import instrument_stage, INTERPRETER_STAGE
 
 
 @dataclass
@@ -29,62 +34,156 @@ def report_error_for_interpreter(reason_for_error: str) -> InterpreterResult:
     return InterpreterResult(False, error_message=reason_for_error)
 
 
-def interpret_node(node: Union[ExpressionNode, TermNode, FactorNode]) -> InterpreterResult:
+# marker placed in the postfix stream after a nested expression whose factor carries a negative sign
+NEGATE_INSTRUCTION = "NEGATE"
+
+UNDEFINED_VARIABLE = "Undefined variable, '{0}'"
+
+
+@dataclass(frozen=True, slots=True)
+class VariableInstruction:
     """
-    The primary interpreter function that recursively evaluates AST nodes.
+    Represents a reference to a named variable in the postfix stream, together with the sign of its factor.
     """
 
-    # handle factor nodes
-    if isinstance(node, FactorNode):
-        if node.nested_expression is not None:
-            nested_result = interpret_node(node.nested_expression)
-            if not nested_result.was_successful:
-                return nested_result
+    name: str
+    sign: int = 1
 
-            value = nested_result.output * node.sign
-        else:
-            value = int(node.number) * node.sign
 
-        return InterpreterResult(True, int(value))
+@dataclass(frozen=True, slots=True)
+class MemoizeInstruction:
+    """
+    Represents the end of a nested expression in the postfix stream; the value on top of the stack is its value.
+    """
+
+    node_id: int
 
-    # handle term nodes
-    if isinstance(node, TermNode):
-        first_factor = interpret_node(node.first_factor_node)
-        if not first_factor.was_successful:
-            return first_factor
-        if (node.operator is None) or (node.second_factor_node is None):
-            return InterpreterResult(True, first_factor.output)
 
-        second_factor = interpret_node(node.second_factor_node)
-        if not second_factor.was_successful:
-            return second_factor
+PostfixInstruction = Union[int, ArithmeticOperator, VariableInstruction, MemoizeInstruction, str]
+
+
+def flatten_node_into_postfix(node: SyntaxNode,
+                              memoized_values: Optional[Dict[int, int]] = None) -> Iterator[PostfixInstruction]:
+    """
+    Walks an AST with an explicit stack and yields it in postfix order.
+
+    Literals are yielded as signed ints, variables as VariableInstruction, binary operators as ArithmeticOperator members
+    and the sign of a nested expression as NEGATE_INSTRUCTION after its operands. Left operands always come before right operands, so the
+    stream evaluates in the same order as the tree; a chain node yields its first operand, then each further operand
+    followed by its operator, which is the stream of the nested binary nodes it stands for. Anything that is not a known
+    node is yielded unchanged.
+
+    When memoized_values is given, every nested expression is followed by a MemoizeInstruction, and a nested expression
+    whose id is already in memoized_values is yielded as that value instead of being walked again. The consumer fills
+    memoized_values as it reads the stream.
+    """
+
+    pending: List[object] = [node]
+    push_pending = pending.append
+
+    while pending:
+        current = pending.pop()
+
+        if isinstance(current, FactorNode):
+            if current.variable is not None:
+                yield VariableInstruction(current.variable, current.sign)
+                continue
+            if current.nested_expression is None:
+                yield convert_literal_to_integer(current.number) * current.sign
+                continue
+            if memoized_values is not None:
+                node_id = id(current.nested_expression)
+                if node_id in memoized_values:
+                    yield memoized_values[node_id] * current.sign
+                    continue
+            if current.sign != 1:
+                push_pending(NEGATE_INSTRUCTION)
+            if memoized_values is not None:
+                push_pending(MemoizeInstruction(node_id))
+            push_pending(current.nested_expression)
+
+        elif isinstance(current, TermNode):
+            if (current.operator is not None) and (current.second_factor_node is not None):
+                push_pending(current.operator)
+                push_pending(current.second_factor_node)
+            push_pending(current.first_factor_node)
+
+        elif isinstance(current, ExpressionNode):
+            if current.additional_expression_node is not None:
+                push_pending(ArithmeticOperator.PLUS if current.operator == ArithmeticOperator.PLUS
+                             else ArithmeticOperator.MINUS)
+                push_pending(current.additional_expression_node)
+            push_pending(current.single_term_node)
+
+        elif isinstance(current, (ExpressionChainNode, TermChainNode)):
+            operands = current.term_nodes if isinstance(current, ExpressionChainNode) else current.factor_nodes
+            for index in range(len(operands) - 1, 0, -1):
+                push_pending(current.operators[index - 1])
+                push_pending(operands[index])
+            push_pending(operands[0])
 
-        # check division by zero
-        if node.operator == ArithmeticOperator.DIVIDE:
-            if second_factor.output == 0:
-                return report_error_for_interpreter("You cannot divide by zero")
-            output = first_factor.output / second_factor.output
         else:
-            output = first_factor.output * second_factor.output
+            yield current
 
-        return InterpreterResult(True, int(output))
 
-    # handle expression nodes
-    if isinstance(node, ExpressionNode):
-        left = interpret_node(node.single_term_node)
-        if not left.was_successful:
-            return left
-        if node.additional_expression_node is None:
-            return InterpreterResult(True, left.output)
+@instrument_stage(INTERPRETER_STAGE)
+def interpret_node(node: SyntaxNode,
+                   variables: Optional[Mapping[str, int]] = None,
+                   memoize_nested_expressions: bool = False) -> InterpreterResult:
+    """
+    The primary interpreter function that evaluates AST nodes.
+
+    The tree is consumed in postfix order against a stack of plain ints, so trees of any depth are evaluated without
+    recursion. Variables are looked up in the variables mapping.
 
-        right = interpret_node(node.additional_expression_node)
-        if not right.was_successful:
-            return right
+    With memoize_nested_expressions, each nested expression node is evaluated once per call however many times it is
+    shared, which makes trees interned by the parser cost time proportional to their number of distinct nodes.
+    """
 
-        if node.operator == ArithmeticOperator.PLUS:
-            return InterpreterResult(True, int(left.output + right.output))
+    if variables is None:
+        variables = {}
+    memoized_values: Optional[Dict[int, int]] = {} if memoize_nested_expressions else None
+
+    values: List[int] = []
+    push_value = values.append
+    pop_value = values.pop
+
+    for instruction in flatten_node_into_postfix(node, memoized_values):
+        if type(instruction) is int:
+            push_value(instruction)
+            continue
+
+        if type(instruction) is MemoizeInstruction:
+            memoized_values[instruction.node_id] = values[-1]
+            continue
+
+        if instruction is NEGATE_INSTRUCTION:
+            values[-1] = -values[-1]
+            continue
+
+        if isinstance(instruction, VariableInstruction):
+            if instruction.name not in variables:
+                return report_error_for_interpreter(UNDEFINED_VARIABLE.format(instruction.name))
+            push_value(variables[instruction.name] * instruction.sign)
+            continue
+
+        if not isinstance(instruction, ArithmeticOperator):
+            # Should be unreachable but never hurts to be safe
+            return InterpreterResult(False, error_message="Interpreter reached unreachable code")
+
+        right = pop_value()
+        if instruction is ArithmeticOperator.PLUS:
+            values[-1] += right
+        elif instruction is ArithmeticOperator.MINUS:
+            values[-1] -= right
+        elif instruction is ArithmeticOperator.DIVIDE:
+            # check division by zero
+            if right == 0:
+                return report_error_for_interpreter("You cannot divide by zero")
+            values[-1] = divide_truncating(values[-1], right)
         else:
-            return InterpreterResult(True, int(left.output - right.output))
+            values[-1] *= right
 
-    # Should be unreachable but never hurts to be safe
-    return InterpreterResult(False, error_message="Interpreter reached unreachable code")
+    if len(values) != 1:
+        return InterpreterResult(False, error_message="Interpreter reached unreachable code")
+    return InterpreterResult(True, values[0])
@@ -1,7 +1,9 @@
 import re
-from typing import List, Union
-from .ast import Token, LexerResult
+from types import MappingProxyType
+from typing import List
+from .ast import Token, TokenStream, LexerResult
 from .ast import (
+    TOKEN_KIND_BY_TYPE,
     NUMBER_TOKEN_TYPE,
     PLUS_TOKEN_TYPE,
     MINUS_TOKEN_TYPE,
@@ -10,48 +12,104 @@ from .ast import (
     WHITESPACE_TOKEN_TYPE,
     LPAREN_TOKEN_TYPE,
     RPAREN_TOKEN_TYPE,
-    TokenType,
+    IDENTIFIER_TOKEN_TYPE,
+    ASSIGN_TOKEN_TYPE,
 )
+from .instrumentation import instrument_stage, LEXER_STAGE
 
-# ordered patterns; whitespace is skipped
-token_patterns = {
+# ordered patterns; whitespace is skipped. Read-only, so lexing from many threads shares no mutable state
+token_patterns = MappingProxyType({
     r"\d+": NUMBER_TOKEN_TYPE,
+    r"[A-Za-z_][A-Za-z0-9_]*": IDENTIFIER_TOKEN_TYPE,
     r"\+": PLUS_TOKEN_TYPE,
     r"\-": MINUS_TOKEN_TYPE,
     r"\*": MULTIPLY_TOKEN_TYPE,
     r"/": DIVIDE_TOKEN_TYPE,
     r"\(": LPAREN_TOKEN_TYPE,
     r"\)": RPAREN_TOKEN_TYPE,
-    r"\s": WHITESPACE_TOKEN_TYPE,
-}
+    r"=": ASSIGN_TOKEN_TYPE,
+    r"\s+": WHITESPACE_TOKEN_TYPE,
+})
 
+# group name used for the catch-all alternative that flags unknown characters
+UNKNOWN_CHARACTER_GROUP = "UNKNOWN"
+
+# every pattern above folded into a single alternation, so one regex call per token decides its type;
+# the catch-all alternative comes last and only matches when nothing else does
+combined_token_pattern = re.compile(
+    "|".join(f"(?P<{token_type}>{pattern})" for pattern, token_type in token_patterns.items())
+    + f"|(?P<{UNKNOWN_CHARACTER_GROUP}>.)",
+    re.DOTALL,
+)
+
+# variant of the combined pattern for token streams: leading whitespace is folded into each match, and an empty
+# alternative consumes trailing whitespace, so whitespace never costs a match of its own
+stream_token_patterns = tuple((pattern, token_type) for pattern, token_type in token_patterns.items()
+                              if token_type != WHITESPACE_TOKEN_TYPE)
+stream_token_pattern = re.compile(
+    r"\s*(?:" + "|".join(f"({pattern})" for pattern, _ in stream_token_patterns) + "|(.)|$)",
+    re.DOTALL,
+)
+
+# token kind for each group index of the stream pattern (groups are numbered from 1, in pattern order)
+token_kind_by_group_index = (None,) + tuple(TOKEN_KIND_BY_TYPE[token_type] for _, token_type in stream_token_patterns)
+unknown_character_group_index = len(stream_token_patterns) + 1
+
+
+def report_unknown_character(unknown_character: str) -> LexerResult:
+    """
+    Clarity function to report an error from the lexer.
+    """
+
+    ERROR_MESSAGE = "Found an unknown character, '{0}'"
+    return LexerResult(False, error_message=ERROR_MESSAGE.format(unknown_character))
+
+
+@instrument_stage(LEXER_STAGE)
 def scan_and_tokenize_input(user_input: str) -> LexerResult:
-    def report_error(unknown_character: str) -> LexerResult:
-        ERROR_MESSAGE = "Found an unknown character, '{0}'"
-        return LexerResult(False, error_message=ERROR_MESSAGE.format(unknown_character))
+    """
+    Scans the user input into a list of tokens.
+
+    The input is walked once by the combined token pattern, so lexing is linear in the length of the input.
+    """
 
     tokens: List[Token] = []
-    position = 0
-    length_of_input = len(user_input)
-
-    while position < length_of_input:
-        match: Union[re.Match[str], None] = None
-        sliced_input = user_input[position:]
-
-        for pattern in token_patterns.keys():
-            match = re.match(pattern, sliced_input)
-            if match is not None:
-                token_type: TokenType = token_patterns[pattern]
-                if token_type == WHITESPACE_TOKEN_TYPE:
-                    # skip whitespace
-                    break
-                token_value = match.group(0)
-                tokens.append(Token(token_type, token_value))
-                break
-
-        if match is None:
-            return report_error(user_input[position])
-        position += match.end()
+    append_token = tokens.append
+
+    for match in combined_token_pattern.finditer(user_input):
+        token_type = match.lastgroup
+        if token_type == WHITESPACE_TOKEN_TYPE:
+            # skip whitespace
+            continue
+        if token_type == UNKNOWN_CHARACTER_GROUP:
+            return report_unknown_character(match.group())
+        append_token(Token(token_type, match.group()))
 
     return LexerResult(True, tokens)
 
+
+@instrument_stage(LEXER_STAGE)
+def scan_input_into_token_stream(user_input: str) -> LexerResult:
+    """
+    Scans the user input into a TokenStream, whose tokens are integer kinds plus offsets into user_input.
+
+    Reports the same errors as scan_and_tokenize_input without creating a Token object or substring per token.
+    """
+
+    token_stream = TokenStream(user_input)
+    append_kind = token_stream.kinds.append
+    append_start = token_stream.starts.append
+    append_end = token_stream.ends.append
+
+    for match in stream_token_pattern.finditer(user_input):
+        group_index = match.lastindex
+        if group_index is None:
+            # trailing whitespace
+            continue
+        if group_index == unknown_character_group_index:
+            return report_unknown_character(match.group(group_index))
+        append_kind(token_kind_by_group_index[group_index])
+        append_start(match.start(group_index))
+        append_end(match.end())
+
+    return LexerResult(True, token_stream)
@@ -0,0 +1,137 @@
+"""
+Evaluator for one-shot command-line use (python src/main.py -e "<expression>").
+
+Interpreter startup dominates a single evaluation, so this module imports nothing and builds no dataclasses: it only
+handles plain, valid arithmetic on ASCII integers. Anything else (errors, variables, very large numbers, unusual
+characters) is handed to the full pipeline, which reports it exactly as the REPL does.
+"""
+
+DIGITS = "0123456789"
+WHITESPACE = " \t\n\r\f\v"
+OPERATORS = "+-*/()"
+
+# literals and results beyond this many digits are converted by the full pipeline
+LARGEST_FAST_DIGIT_COUNT = 4000
+
+
+class FallBack(Exception):
+    """
+    Raised when the fast path cannot decide the result by itself.
+    """
+
+
+def tokenize(expression):
+    """
+    Returns the tokens of expression as a list of operator characters and int literals.
+    """
+
+    tokens = []
+    position = 0
+    length = len(expression)
+    while position < length:
+        character = expression[position]
+        if character in WHITESPACE:
+            position += 1
+        elif character in OPERATORS:
+            tokens.append(character)
+            position += 1
+        elif character in DIGITS:
+            end = position + 1
+            while end < length and expression[end] in DIGITS:
+                end += 1
+            if end - position > LARGEST_FAST_DIGIT_COUNT:
+                raise FallBack()
+            tokens.append(int(expression[position:end]))
+            position = end
+        else:
+            raise FallBack()
+    return tokens
+
+
+def evaluate_tokens(tokens):
+    """
+    Parses and evaluates tokens with the grammar of parse_list_of_tokens; trailing tokens are ignored like there.
+
+    Any error raises FallBack, so error precedence (parser errors before division by zero) is left to the full pipeline.
+    """
+
+    number_of_tokens = len(tokens)
+
+    def expression(position):
+        value, position = term(position)
+        while position < number_of_tokens and (tokens[position] == "+" or tokens[position] == "-"):
+            operator = tokens[position]
+            right, position = term(position + 1)
+            value = value + right if operator == "+" else value - right
+        return value, position
+
+    def term(position):
+        value, position = factor(position)
+        while position < number_of_tokens and (tokens[position] == "*" or tokens[position] == "/"):
+            operator = tokens[position]
+            right, position = factor(position + 1)
+            if operator == "*":
+                value = value * right
+            elif right == 0:
+                raise FallBack()
+            else:
+                # divide_truncating, inlined so that this module imports nothing
+                value = value // right if (value >= 0) == (right > 0) else -(-value // right)
+        return value, position
+
+    def factor(position):
+        sign = 1
+        while position < number_of_tokens and (tokens[position] == "+" or tokens[position] == "-"):
+            if tokens[position] == "-":
+                sign = -sign
+            position += 1
+        if position >= number_of_tokens:
+            raise FallBack()
+        token = tokens[position]
+        if token.__class__ is int:
+            return sign * token, position + 1
+        if token != "(":
+            raise FallBack()
+        value, position = expression(position + 1)
+        if position >= number_of_tokens or tokens[position] != ")":
+            raise FallBack()
+        return sign * value, position + 1
+
+    try:
+        return expression(0)[0]
+    except RecursionError:
+        raise FallBack()
+
+
+def evaluate_with_full_pipeline(expression):
+    from .pipeline import evaluate_expression
+    from .integers import format_integer
+
+    interpreter_result = evaluate_expression(expression)
+    if not interpreter_result.was_successful:
+        return False, interpreter_result.error_message
+    return True, format_integer(interpreter_result.output)
+
+
+def evaluate_one_shot(expression):
+    """
+    Returns (was_successful, line to print) for expression.
+    """
+
+    try:
+        value = evaluate_tokens(tokenize(expression))
+        if value.bit_length() > LARGEST_FAST_DIGIT_COUNT * 3:
+            raise FallBack()
+        return True, str(value)
+    except FallBack:
+        return evaluate_with_full_pipeline(expression)
+
+
+def run_one_shot(expression):
+    """
+    Prints the result of expression like the REPL does and returns the process exit status.
+    """
+
+    was_successful, line = evaluate_one_shot(expression)
+    print(line)
+    return 0 if was_successful else 1
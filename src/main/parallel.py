@@ -0,0 +1,147 @@
+import os
+import re
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from .lexer import scan_input_into_token_stream
+from .parser import parse_list_of_tokens
+from .interpreter import interpret_node, InterpreterResult, report_error_for_interpreter
+
+# expressions shorter than this are evaluated in this process; a pool hand-off would cost more than it saves
+PARALLEL_THRESHOLD_LENGTH = 1_000_000
+
+# chunks per worker, so that uneven chunks still keep every worker busy
+CHUNKS_PER_WORKER = 4
+
+additive_operator_pattern = re.compile(r"[-+]")
+
+# outcome of one chunk: (lexer error, parser error, whether the chunk used all of its tokens, interpreter result)
+ChunkEvaluation = Tuple[Optional[str], Optional[str], bool, Optional[InterpreterResult]]
+
+shared_process_pool: Optional[ProcessPoolExecutor] = None
+shared_process_pool_lock = threading.Lock()
+
+
+def get_shared_process_pool() -> ProcessPoolExecutor:
+    """
+    Returns a process pool with one worker per core, created on first use and reused afterwards.
+    """
+
+    global shared_process_pool
+    with shared_process_pool_lock:
+        if shared_process_pool is None:
+            shared_process_pool = ProcessPoolExecutor()
+        return shared_process_pool
+
+
+def is_binary_operator_at(user_input: str, offset: int) -> bool:
+    """
+    Tells whether the + or - at offset follows an operand (a number, a name or a closing parenthesis).
+
+    Otherwise it is a unary sign.
+    """
+
+    previous = offset - 1
+    while previous >= 0 and user_input[previous].isspace():
+        previous -= 1
+    return previous >= 0 and (user_input[previous].isalnum() or user_input[previous] in "_)")
+
+
+def split_at_top_level_additions(user_input: str, chunk_count: int) -> List[str]:
+    """
+    Splits an expression into at most chunk_count pieces of similar length.
+
+    Every split is at a binary + or - outside any parentheses, and the operator starts the next piece. Each piece then
+    evaluates, as an expression of its own, to its signed contribution to the total. This holds because a leading
+    unary sign negates the whole first term when division truncates toward zero.
+    """
+
+    chunks: List[str] = []
+    chunk_start = 0
+    # parenthesis depth at depth_offset, advanced with str.count so that the scan runs at C speed
+    depth = 0
+    depth_offset = 0
+
+    for index in range(1, chunk_count):
+        target = max(chunk_start + 1, len(user_input) * index // chunk_count)
+        for match in additive_operator_pattern.finditer(user_input, target):
+            offset = match.start()
+            depth += user_input.count("(", depth_offset, offset) - user_input.count(")", depth_offset, offset)
+            depth_offset = offset
+            if depth == 0 and is_binary_operator_at(user_input, offset):
+                chunks.append(user_input[chunk_start:offset])
+                chunk_start = offset
+                break
+        else:
+            break
+
+    chunks.append(user_input[chunk_start:])
+    return chunks
+
+
+def evaluate_chunk_text(chunk: str) -> ChunkEvaluation:
+    """
+    Lexes, parses and interprets one chunk; runs in the worker processes.
+    """
+
+    lexer_result = scan_input_into_token_stream(chunk)
+    if not lexer_result.was_successful:
+        return lexer_result.error_message, None, False, None
+
+    parser_result = parse_list_of_tokens(lexer_result.tokens)
+    if not parser_result.was_successful or parser_result.syntax_tree is None:
+        return None, parser_result.error_message, False, None
+
+    used_all_tokens = parser_result.consumed_token_count == len(lexer_result.tokens)
+    return None, None, used_all_tokens, interpret_node(parser_result.syntax_tree)
+
+
+def combine_chunk_evaluations(evaluations: List[ChunkEvaluation]) -> InterpreterResult:
+    """
+    Adds up the chunks' values, reporting errors with the same precedence as the single-process pipeline.
+
+    A lexer error anywhere wins. Otherwise the expression ends at the first chunk that leaves tokens unused, as those
+    tokens are ignored, and chunks after that point are skipped. Within that range a parser error wins over the first
+    interpreter error.
+    """
+
+    for lexer_error, _, _, _ in evaluations:
+        if lexer_error is not None:
+            return report_error_for_interpreter(lexer_error)
+
+    included = len(evaluations)
+    for index, (_, parser_error, used_all_tokens, _) in enumerate(evaluations):
+        if parser_error is not None:
+            return report_error_for_interpreter(parser_error)
+        if not used_all_tokens:
+            included = index + 1
+            break
+
+    total = 0
+    for _, _, _, interpreter_result in evaluations[:included]:
+        if not interpreter_result.was_successful:
+            return interpreter_result
+        total += interpreter_result.output
+    return InterpreterResult(True, total)
+
+
+def evaluate_in_parallel(user_input: str, workers: Optional[int] = None, executor: Optional[Executor] = None,
+                         threshold_length: int = PARALLEL_THRESHOLD_LENGTH) -> InterpreterResult:
+    """
+    Evaluates one large expression by splitting it at top-level + and - and evaluating the pieces in a process pool.
+
+    Returns the same result as evaluate_expression. Expressions shorter than threshold_length are evaluated in this
+    process. The expression is cut into CHUNKS_PER_WORKER pieces per worker. Without an executor, the shared
+    pool (one worker per core) is used.
+    """
+
+    if len(user_input) < threshold_length:
+        return combine_chunk_evaluations([evaluate_chunk_text(user_input)])
+
+    if executor is None:
+        executor = get_shared_process_pool()
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    chunks = split_at_top_level_additions(user_input, workers * CHUNKS_PER_WORKER)
+    return combine_chunk_evaluations(list(executor.map(evaluate_chunk_text, chunks)))
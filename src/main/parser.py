@@ -1,60 +1,119 @@
-from typing import List, Optional, AnyStr
-from dataclasses import dataclass, field
+from typing import Callable, List, Optional, AnyStr, Sequence
+from dataclasses import dataclass
 from .ast import (
     Token,
+    TokenStream,
     ExpressionNode,
     TermNode,
     FactorNode,
+    TermChainNode,
+    ExpressionChainNode,
+    Expression,
+    AssignmentNode,
     ArithmeticOperator,
-    NUMBER_TOKEN_TYPE,
-    PLUS_TOKEN_TYPE,
-    MINUS_TOKEN_TYPE,
-    MULTIPLY_TOKEN_TYPE,
-    DIVIDE_TOKEN_TYPE,
-    LPAREN_TOKEN_TYPE,
-    RPAREN_TOKEN_TYPE,
+    NUMBER_TOKEN_KIND,
+    PLUS_TOKEN_KIND,
+    MINUS_TOKEN_KIND,
+    MULTIPLY_TOKEN_KIND,
+    DIVIDE_TOKEN_KIND,
+    LPAREN_TOKEN_KIND,
+    RPAREN_TOKEN_KIND,
+    IDENTIFIER_TOKEN_KIND,
+    ASSIGN_TOKEN_KIND,
+    UNKNOWN_TOKEN_KIND,
+    TOKEN_KIND_BY_TYPE,
+    TOKEN_TYPE_BY_KIND,
 )
+from .instrumentation import instrument_stage, PARSER_STAGE
+from .hashcons import intern_syntax_tree
+
+UNEXPECTED_TOKEN_TYPE = "Unexpected Token Type, {0}"
+
+# reported instead of raising RecursionError when parentheses nest deeper than the parser's recursion allows
+NESTING_TOO_DEEP = "Expression is nested too deeply"
 
 
 @dataclass
 class ParserResult:
     """
     Represents the result of the parsing process.
+
+    - error_position is the source offset of the token the parser failed on (or the length of the source when it ran
+      out of tokens). It is only set when the tokens came from a TokenStream, and not for NESTING_TOO_DEEP.
+    - deduplicated_node_count is the number of nodes replaced by a shared copy when subtrees were interned.
+    - consumed_token_count is the number of tokens the expression used; any tokens after them are ignored.
+    - syntax_tree is an ExpressionNode for a single term and an ExpressionChainNode for a run of terms, or an
+      AssignmentNode when it comes from parse_statement.
     """
 
     was_successful: bool
-    syntax_tree: Optional[ExpressionNode] = None
+    syntax_tree: Optional[Expression | AssignmentNode] = None
     error_message: str = ""
+    error_position: Optional[int] = None
+    deduplicated_node_count: int = 0
+    consumed_token_count: int = 0
 
 
 @dataclass
 class NodeResult:
     """
-    Represents the result of parsing a node, including remaining tokens and the parsed node.
+    Represents the result of parsing a node, including the position of the next unconsumed token and the parsed node.
     """
 
     was_successful: bool
-    tokens: Optional[List[Token]] = field(default_factory=list)
-    node: Optional[ExpressionNode | TermNode | FactorNode] = None
+    position: int = 0
+    node: Optional[Expression | TermNode | TermChainNode | FactorNode] = None
     error_message: str = ""
 
 
-def parse_list_of_tokens(tokens: List[Token]) -> ParserResult:
+@instrument_stage(PARSER_STAGE)
+def parse_list_of_tokens(tokens: List[Token] | TokenStream, intern_subtrees: bool = False,
+                         first_position: int = 0) -> ParserResult:
     """
-    Entrypoint to the parser. Parses a list of tokens into an abstract syntax tree (AST) representing the arithmetic
-    expression.
+    Entrypoint to the parser. Parses a list of tokens (or a TokenStream) into an abstract syntax tree (AST) representing
+    the arithmetic expression.
+
+    The tokens are shared by every parsing step, which only moves a position (cursor) forward, so parsing is linear in
+    the number of tokens. Tokens are compared by integer kind; a TokenStream is read directly, without materializing a
+    Token per entry.
+
+    With intern_subtrees, structurally identical subtrees are merged into one shared node after parsing (see
+    intern_syntax_tree), so repeated sub-expressions are stored once.
+
+    A run of operators of the same precedence becomes one flat ExpressionChainNode or TermChainNode, so the depth of the
+    tree only grows with parenthesis nesting, not with the length of the run.
+
+    Parsing starts at the token at first_position; consumed_token_count still counts from the first token.
     """
 
     # Parser error messages/reasons
-    UNEXPECTED_TOKEN_TYPE = "Unexpected Token Type, {0}"
     VALUE_IS_NULL = "Found A Null Value; {0} is Null"
     UNEXPECTED_TYPE = "Unexpected Node of Type, {0}"
 
-    def report_error(unexpected_token_type: Optional[str] = None,
+    number_of_tokens = len(tokens)
+
+    if isinstance(tokens, TokenStream):
+        # list indexing is cheaper than array indexing in the hot loops below
+        kinds: Sequence[int] = tokens.kinds.tolist()
+        token_value_at: Callable[[int], str] = tokens.token_value
+
+        def token_type_at(position: int) -> str:
+            return TOKEN_TYPE_BY_KIND[kinds[position]]
+    else:
+        kinds = [TOKEN_KIND_BY_TYPE.get(token.token_type, UNKNOWN_TOKEN_KIND) for token in tokens]
+
+        def token_value_at(position: int) -> str:
+            return tokens[position].token_value
+
+        def token_type_at(position: int) -> str:
+            return tokens[position].token_type
+
+    def report_error(position: int,
+                     unexpected_token_type: Optional[str] = None,
                      unexpected_null: Optional[AnyStr] = None,
                      unexpected_type: Optional[AnyStr] = None) -> NodeResult:
         """
-        Clarity function to report parser errors.
+        Clarity function to report parser errors at the given token position.
         """
 
         error_message = ""
@@ -68,107 +127,154 @@ def parse_list_of_tokens(tokens: List[Token]) -> ParserResult:
         elif unexpected_type is not None:
             error_message = UNEXPECTED_TYPE.format(unexpected_type)
 
-        return NodeResult(False, error_message=error_message)
+        return NodeResult(False, position, error_message=error_message)
 
     # forward declarations via nested functions
-    def parse_tokens_for_expression(tokens: List[Token]) -> NodeResult:
-        term_result: NodeResult = parse_tokens_for_term(tokens)
+    def parse_tokens_for_expression(position: int) -> NodeResult:
+        term_result: NodeResult = parse_tokens_for_term(position)
         if not term_result.was_successful:
             return term_result
 
-        if not isinstance(term_result.node, TermNode):
-            return report_error(unexpected_type=str(type(term_result.node)))
+        if not isinstance(term_result.node, (TermNode, TermChainNode)):
+            return report_error(position, unexpected_type=str(type(term_result.node)))
 
-        expr_node = ExpressionNode(term_result.node)
-        remaining: list[Token] = term_result.tokens if term_result.tokens is not None else []
+        position = term_result.position
+        if position >= number_of_tokens or kinds[position] not in (PLUS_TOKEN_KIND, MINUS_TOKEN_KIND):
+            return NodeResult(True, position, ExpressionNode(term_result.node))
 
-        while remaining and remaining[0].token_type in (PLUS_TOKEN_TYPE, MINUS_TOKEN_TYPE):
-            op_token = remaining[0]
-            remaining = remaining[1:]
-            op = ArithmeticOperator.PLUS if op_token.token_type == PLUS_TOKEN_TYPE else ArithmeticOperator.MINUS
+        # a run of + and - becomes one chain, evaluated left to right
+        term_nodes = [term_result.node]
+        operators: List[ArithmeticOperator] = []
+        while position < number_of_tokens and kinds[position] in (PLUS_TOKEN_KIND, MINUS_TOKEN_KIND):
+            op = ArithmeticOperator.PLUS if kinds[position] == PLUS_TOKEN_KIND else ArithmeticOperator.MINUS
 
-            next_term_result = parse_tokens_for_term(remaining)
+            next_term_result = parse_tokens_for_term(position + 1)
             if not next_term_result.was_successful:
                 return next_term_result
-            if not isinstance(next_term_result.node, TermNode):
-                return report_error(unexpected_type=str(type(next_term_result.node)))
+            if not isinstance(next_term_result.node, (TermNode, TermChainNode)):
+                return report_error(position + 1, unexpected_type=str(type(next_term_result.node)))
 
-            # build left-associative expression
-            expr_node = ExpressionNode(expr_node, op, ExpressionNode(next_term_result.node))
-            remaining = next_term_result.tokens or []
+            term_nodes.append(next_term_result.node)
+            operators.append(op)
+            position = next_term_result.position
 
-        return NodeResult(True, remaining, expr_node)
+        return NodeResult(True, position, ExpressionChainNode(term_nodes, operators))
 
-    def parse_tokens_for_term(tokens: List[Token]) -> NodeResult:
-        factor_result: NodeResult = parse_tokens_for_factor(tokens)
+    def parse_tokens_for_term(position: int) -> NodeResult:
+        factor_result: NodeResult = parse_tokens_for_factor(position)
         if not factor_result.was_successful:
             return factor_result
 
         if not isinstance(factor_result.node, FactorNode):
-            return report_error(unexpected_type=str(type(factor_result.node)))
+            return report_error(position, unexpected_type=str(type(factor_result.node)))
 
-        term_node = TermNode(factor_result.node)
-        remaining: list[Token] = factor_result.tokens if factor_result.tokens is not None else []
+        position = factor_result.position
+        if position >= number_of_tokens or kinds[position] not in (MULTIPLY_TOKEN_KIND, DIVIDE_TOKEN_KIND):
+            return NodeResult(True, position, TermNode(factor_result.node))
 
-        while remaining and remaining[0].token_type in (MULTIPLY_TOKEN_TYPE, DIVIDE_TOKEN_TYPE):
-            op_token: Token = remaining[0]
-            remaining: list[Token] = remaining[1:]
-            op: ArithmeticOperator = ArithmeticOperator.MULTIPLY if op_token.token_type == MULTIPLY_TOKEN_TYPE else ArithmeticOperator.DIVIDE
+        # a run of * and / becomes one chain, evaluated left to right
+        factor_nodes = [factor_result.node]
+        operators: List[ArithmeticOperator] = []
+        while position < number_of_tokens and kinds[position] in (MULTIPLY_TOKEN_KIND, DIVIDE_TOKEN_KIND):
+            op: ArithmeticOperator = ArithmeticOperator.MULTIPLY if kinds[position] == MULTIPLY_TOKEN_KIND else ArithmeticOperator.DIVIDE
 
-            second_factor_result = parse_tokens_for_factor(remaining)
+            second_factor_result = parse_tokens_for_factor(position + 1)
             if not second_factor_result.was_successful:
                 return second_factor_result
 
             if not isinstance(second_factor_result.node, FactorNode):
-                return report_error(unexpected_type=str(type(second_factor_result.node)))
-
-            term_node = TermNode(term_node, op, second_factor_result.node)
-            remaining = second_factor_result.tokens or []
-
-        return NodeResult(True, remaining, term_node)
-
-    def parse_tokens_for_primary(tokens: List[Token]) -> NodeResult:
-        if not tokens:
-            return report_error(unexpected_null="No tokens for primary")
-        current = tokens[0]
-        if current.token_type == NUMBER_TOKEN_TYPE:
-            return NodeResult(True, tokens[1:], FactorNode(sign=1, number=current.token_value))
-        if current.token_type == LPAREN_TOKEN_TYPE:
-            inner = tokens[1:]
-            expr_result = parse_tokens_for_expression(inner)
+                return report_error(position + 1, unexpected_type=str(type(second_factor_result.node)))
+
+            factor_nodes.append(second_factor_result.node)
+            operators.append(op)
+            position = second_factor_result.position
+
+        return NodeResult(True, position, TermChainNode(factor_nodes, operators))
+
+    def parse_tokens_for_primary(position: int) -> NodeResult:
+        if position >= number_of_tokens:
+            return report_error(position, unexpected_null="No tokens for primary")
+        kind = kinds[position]
+        if kind == NUMBER_TOKEN_KIND:
+            return NodeResult(True, position + 1, FactorNode(sign=1, number=token_value_at(position)))
+        if kind == IDENTIFIER_TOKEN_KIND:
+            return NodeResult(True, position + 1, FactorNode(sign=1, variable=token_value_at(position)))
+        if kind == LPAREN_TOKEN_KIND:
+            expr_result = parse_tokens_for_expression(position + 1)
             if not expr_result.was_successful:
                 return expr_result
-            if not expr_result.tokens:
-                return report_error(unexpected_null="Missing closing parenthesis")
-            if expr_result.tokens[0].token_type != RPAREN_TOKEN_TYPE:
-                return report_error(unexpected_token_type=expr_result.tokens[0].token_type)
-            return NodeResult(True, expr_result.tokens[1:], FactorNode(sign=1, nested_expression=expr_result.node))
-        return report_error(unexpected_token_type=current.token_type)
-
-    def parse_tokens_for_factor(tokens: List[Token]) -> NodeResult:
-        if not tokens:
-            return report_error(unexpected_null="No tokens for factor")
-        current = tokens[0]
-        if current.token_type in (PLUS_TOKEN_TYPE, MINUS_TOKEN_TYPE):
-            op_token = current
-            remaining = tokens[1:]
-            inner_result = parse_tokens_for_factor(remaining)
-            if not inner_result.was_successful:
-                return inner_result
-            if not isinstance(inner_result.node, FactorNode):
-                return report_error(unexpected_type=str(type(inner_result.node)))
-            inner_node: FactorNode = inner_result.node
-            sign = -inner_node.sign if op_token.token_type == MINUS_TOKEN_TYPE else inner_node.sign
-            return NodeResult(True, inner_result.tokens, FactorNode(sign=sign, number=inner_node.number,
-                                                                    nested_expression=inner_node.nested_expression))
+            closing_position = expr_result.position
+            if closing_position >= number_of_tokens:
+                return report_error(closing_position, unexpected_null="Missing closing parenthesis")
+            if kinds[closing_position] != RPAREN_TOKEN_KIND:
+                return report_error(closing_position, unexpected_token_type=token_type_at(closing_position))
+            return NodeResult(True, closing_position + 1, FactorNode(sign=1, nested_expression=expr_result.node))
+        return report_error(position, unexpected_token_type=token_type_at(position))
+
+    def parse_tokens_for_factor(position: int) -> NodeResult:
+        # fold any run of unary signs iteratively so long sign chains do not recurse
+        sign = 1
+        while position < number_of_tokens and kinds[position] in (PLUS_TOKEN_KIND, MINUS_TOKEN_KIND):
+            if kinds[position] == MINUS_TOKEN_KIND:
+                sign = -sign
+            position += 1
+        if position >= number_of_tokens:
+            return report_error(position, unexpected_null="No tokens for factor")
+
         # primary
-        return parse_tokens_for_primary(tokens)
+        primary_result = parse_tokens_for_primary(position)
+        if not primary_result.was_successful or sign == 1:
+            return primary_result
+        if not isinstance(primary_result.node, FactorNode):
+            return report_error(position, unexpected_type=str(type(primary_result.node)))
+        primary_result.node.sign = -primary_result.node.sign
+        return primary_result
+
+    def report_failure(node_result: NodeResult) -> ParserResult:
+        # source offsets are only known for token streams
+        error_position = None
+        if isinstance(tokens, TokenStream):
+            error_position = tokens.starts[node_result.position] if node_result.position < number_of_tokens \
+                else len(tokens.source)
+        return ParserResult(False, error_message=node_result.error_message, error_position=error_position)
 
     # start parse
-    root_node_result = parse_tokens_for_expression(tokens)
+    try:
+        root_node_result = parse_tokens_for_expression(first_position)
+    except RecursionError:
+        return ParserResult(False, error_message=NESTING_TOO_DEEP)
     if not root_node_result.was_successful:
-        return ParserResult(False, error_message=root_node_result.error_message)
-    if not isinstance(root_node_result.node, ExpressionNode):
-        err = report_error(unexpected_type=str(type(root_node_result.node)))
-        return ParserResult(False, error_message=err.error_message)
-    return ParserResult(True, root_node_result.node)
+        return report_failure(root_node_result)
+    if not isinstance(root_node_result.node, (ExpressionNode, ExpressionChainNode)):
+        return report_failure(report_error(first_position, unexpected_type=str(type(root_node_result.node))))
+    if intern_subtrees:
+        syntax_tree, deduplicated_node_count = intern_syntax_tree(root_node_result.node)
+        return ParserResult(True, syntax_tree, deduplicated_node_count=deduplicated_node_count,
+                            consumed_token_count=root_node_result.position)
+    return ParserResult(True, root_node_result.node, consumed_token_count=root_node_result.position)
+
+
+def parse_statement(tokens: List[Token] | TokenStream, intern_subtrees: bool = False) -> ParserResult:
+    """
+    Parses one statement: either an assignment (IDENTIFIER = expression) or a bare expression.
+
+    An assignment is returned as an AssignmentNode around the expression's tree, and any token left after its
+    expression is an error, so that a typo such as "b = 3 = 4" is not silently stored as 3. Anything else is parsed
+    exactly like parse_list_of_tokens, so bare expressions keep their results and errors (including ignored trailing
+    tokens).
+    """
+
+    if len(tokens) >= 2:
+        first_token, second_token = tokens[0], tokens[1]
+        if (TOKEN_KIND_BY_TYPE.get(first_token.token_type) == IDENTIFIER_TOKEN_KIND
+                and TOKEN_KIND_BY_TYPE.get(second_token.token_type) == ASSIGN_TOKEN_KIND):
+            parser_result = parse_list_of_tokens(tokens, intern_subtrees, first_position=2)
+            if parser_result.was_successful and parser_result.consumed_token_count < len(tokens):
+                position = parser_result.consumed_token_count
+                error_position = tokens.starts[position] if isinstance(tokens, TokenStream) else None
+                return ParserResult(False, error_message=UNEXPECTED_TOKEN_TYPE.format(tokens[position].token_type),
+                                    error_position=error_position)
+            if parser_result.was_successful:
+                parser_result.syntax_tree = AssignmentNode(first_token.token_value, parser_result.syntax_tree)
+            return parser_result
+    return parse_list_of_tokens(tokens, intern_subtrees)
@@ -0,0 +1,53 @@
+from types import MappingProxyType
+from .lexer import scan_input_into_token_stream
+from .parser import parse_list_of_tokens
+from .interpreter import interpret_node, InterpreterResult, report_error_for_interpreter
+from .stream_evaluator import evaluate_tokens_by_shunting_yard
+
+
+def evaluate_expression(user_input: str) -> InterpreterResult:
+    """
+    Runs the full pipeline (lexing, parsing, interpreting) on one expression.
+
+    Lexer and parser errors are reported through the InterpreterResult error_message, exactly as the REPL prints them.
+    """
+
+    lexer_result = scan_input_into_token_stream(user_input)
+    if not lexer_result.was_successful:
+        return report_error_for_interpreter(lexer_result.error_message)
+
+    parser_result = parse_list_of_tokens(lexer_result.tokens)
+    if (not parser_result.was_successful) or (parser_result.syntax_tree is None):
+        return report_error_for_interpreter(parser_result.error_message)
+
+    return interpret_node(parser_result.syntax_tree)
+
+
+def evaluate_expression_by_shunting_yard(user_input: str) -> InterpreterResult:
+    """
+    Same results as evaluate_expression, evaluating the tokens with an operand stack and an operator stack instead of
+    building and walking a syntax tree.
+    """
+
+    lexer_result = scan_input_into_token_stream(user_input)
+    if not lexer_result.was_successful:
+        return report_error_for_interpreter(lexer_result.error_message)
+    return evaluate_tokens_by_shunting_yard(lexer_result.tokens)
+
+
+def evaluate_expression_in_parallel(user_input: str) -> InterpreterResult:
+    """
+    The parallel engine. main.parallel, and the process pool machinery it imports, is only loaded once it is used, so
+    the one-shot CLI can fall back to this module cheaply.
+    """
+
+    from .parallel import evaluate_in_parallel
+    return evaluate_in_parallel(user_input)
+
+
+# evaluation engines selectable from the command line
+ENGINES = MappingProxyType({
+    "tree": evaluate_expression,
+    "shunting-yard": evaluate_expression_by_shunting_yard,
+    "parallel": evaluate_expression_in_parallel,
+})
@@ -0,0 +1,219 @@
+"""
+Compact binary format for parsed syntax trees.
+
+A serialized tree is a header followed by two sections:
+
+- tags: one byte per node, in postorder (children before their parent), so a tree is rebuilt with one stack and
+  no recursion. The high bit of a factor tag is its sign. A chain node is written as its first operand and a chain
+  tag, then every further operand followed by the tag of the operator before it, which appends it to the chain.
+- literals: the text of every number and variable factor in the same order, separated by spaces (which no literal
+  contains) and UTF-8 encoded, so that a single split recovers all of them.
+
+The header carries the format version and a fingerprint of the grammar (token patterns, token types, node fields and
+operators), so data written by a different grammar is rejected instead of being misread.
+"""
+
+import gc
+import hashlib
+import struct
+from dataclasses import fields
+from typing import List, Tuple
+from .ast import (
+    ExpressionNode,
+    TermNode,
+    FactorNode,
+    TermChainNode,
+    ExpressionChainNode,
+    Expression,
+    AssignmentNode,
+    ArithmeticOperator,
+    TOKEN_TYPE_BY_KIND,
+)
+from .lexer import token_patterns
+
+FORMAT_VERSION = 2
+MAGIC = b"CALCAST\0"
+
+# magic, format version, grammar fingerprint, consumed token count, node count, literal count, literals length
+HEADER = struct.Struct("<8sH16sQQQQ")
+
+FACTOR_NUMBER_TAG = 0
+FACTOR_VARIABLE_TAG = 1
+FACTOR_NESTED_TAG = 2
+TERM_TAG = 3
+TERM_MULTIPLY_TAG = 4
+TERM_DIVIDE_TAG = 5
+EXPRESSION_TAG = 6
+EXPRESSION_PLUS_TAG = 7
+EXPRESSION_MINUS_TAG = 8
+TERM_CHAIN_TAG = 9
+EXPRESSION_CHAIN_TAG = 10
+CHAIN_PLUS_TAG = 11
+CHAIN_MINUS_TAG = 12
+CHAIN_MULTIPLY_TAG = 13
+CHAIN_DIVIDE_TAG = 14
+NEGATIVE_SIGN_BIT = 0x80
+
+TERM_TAG_BY_OPERATOR = {None: TERM_TAG, ArithmeticOperator.MULTIPLY: TERM_MULTIPLY_TAG,
+                        ArithmeticOperator.DIVIDE: TERM_DIVIDE_TAG}
+EXPRESSION_TAG_BY_OPERATOR = {None: EXPRESSION_TAG, ArithmeticOperator.PLUS: EXPRESSION_PLUS_TAG,
+                              ArithmeticOperator.MINUS: EXPRESSION_MINUS_TAG}
+CHAIN_TAG_BY_OPERATOR = {ArithmeticOperator.PLUS: CHAIN_PLUS_TAG, ArithmeticOperator.MINUS: CHAIN_MINUS_TAG,
+                         ArithmeticOperator.MULTIPLY: CHAIN_MULTIPLY_TAG, ArithmeticOperator.DIVIDE: CHAIN_DIVIDE_TAG}
+
+
+def compute_grammar_fingerprint() -> bytes:
+    description = repr((
+        FORMAT_VERSION,
+        tuple(token_patterns.items()),
+        TOKEN_TYPE_BY_KIND,
+        tuple(tuple(node_field.name for node_field in fields(node_class))
+              for node_class in (ExpressionNode, TermNode, FactorNode, TermChainNode, ExpressionChainNode,
+                                 AssignmentNode)),
+        tuple(operator.value for operator in ArithmeticOperator),
+    ))
+    return hashlib.sha256(description.encode("utf-8")).digest()[:16]
+
+
+GRAMMAR_FINGERPRINT = compute_grammar_fingerprint()
+
+
+class InvalidSerializedTree(Exception):
+    """
+    Raised by deserialize_syntax_tree when the data is truncated, corrupt or written for another grammar.
+    """
+
+
+def serialize_syntax_tree(syntax_tree: Expression, consumed_token_count: int = 0) -> bytes:
+    """
+    Encodes a syntax tree (and the number of tokens it was parsed from) in the compact binary format.
+
+    The tree is walked with an explicit stack, so trees of any depth can be serialized. A subtree shared by
+    intern_syntax_tree is written out once for every place it is used.
+    """
+
+    tags = bytearray()
+    literals: List[str] = []
+    # nodes still to be written, and the tags (ints) to write once the operands before them are written
+    pending: List[object] = [syntax_tree]
+    while pending:
+        node = pending.pop()
+        if node is None:
+            continue
+        if type(node) is int:
+            tags.append(node)
+        elif isinstance(node, FactorNode):
+            sign_bit = NEGATIVE_SIGN_BIT if node.sign < 0 else 0
+            if node.nested_expression is not None:
+                pending.append(FACTOR_NESTED_TAG | sign_bit)
+                pending.append(node.nested_expression)
+                continue
+            tags.append((FACTOR_NUMBER_TAG if node.number is not None else FACTOR_VARIABLE_TAG) | sign_bit)
+            literals.append(node.number if node.number is not None else node.variable)
+        elif isinstance(node, TermNode):
+            pending.extend((TERM_TAG_BY_OPERATOR[node.operator], node.second_factor_node, node.first_factor_node))
+        elif isinstance(node, ExpressionNode):
+            pending.extend((EXPRESSION_TAG_BY_OPERATOR[node.operator], node.additional_expression_node,
+                            node.single_term_node))
+        else:
+            is_term_chain = isinstance(node, TermChainNode)
+            operands = node.factor_nodes if is_term_chain else node.term_nodes
+            for index in range(len(operands) - 1, 0, -1):
+                pending.append(CHAIN_TAG_BY_OPERATOR[node.operators[index - 1]])
+                pending.append(operands[index])
+            pending.append(TERM_CHAIN_TAG if is_term_chain else EXPRESSION_CHAIN_TAG)
+            pending.append(operands[0])
+
+    literal_text = " ".join(literals).encode("utf-8")
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, GRAMMAR_FINGERPRINT, consumed_token_count, len(tags), len(literals),
+                         len(literal_text))
+    return b"".join((header, tags, literal_text))
+
+
+def deserialize_syntax_tree(buffer) -> Tuple[Expression, int]:
+    """
+    Rebuilds a syntax tree from a bytes-like buffer (such as an mmap) and returns it with its consumed token count.
+
+    Raises InvalidSerializedTree if the buffer was not written by serialize_syntax_tree for the current grammar. The
+    cyclic garbage collector is paused while the nodes are created: they cannot form cycles, and on large trees the
+    collections it would trigger otherwise cost more than building the tree.
+    """
+
+    if len(buffer) < HEADER.size:
+        raise InvalidSerializedTree("Truncated header")
+    magic, version, fingerprint, consumed_token_count, node_count, literal_count, literal_text_length = \
+        HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise InvalidSerializedTree("Not a serialized syntax tree")
+    if version != FORMAT_VERSION or fingerprint != GRAMMAR_FINGERPRINT:
+        raise InvalidSerializedTree("Written for another grammar")
+
+    literals_offset = HEADER.size + node_count
+    if len(buffer) != literals_offset + literal_text_length:
+        raise InvalidSerializedTree("Section sizes do not match the data")
+
+    tags = buffer[HEADER.size:literals_offset]
+    try:
+        literals = bytes(buffer[literals_offset:]).decode("utf-8").split(" ") if literal_count else []
+    except UnicodeDecodeError as error:
+        raise InvalidSerializedTree("Literals are not UTF-8") from error
+    if len(literals) != literal_count:
+        raise InvalidSerializedTree("Literal count does not match the data")
+
+    next_literal = iter(literals).__next__
+    stack: List[object] = []
+    push = stack.append
+    pop = stack.pop
+    plus, minus = ArithmeticOperator.PLUS, ArithmeticOperator.MINUS
+    multiply, divide = ArithmeticOperator.MULTIPLY, ArithmeticOperator.DIVIDE
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        # the most frequent tags are tested first
+        for tag in tags:
+            if tag == FACTOR_NUMBER_TAG:
+                push(FactorNode(1, next_literal()))
+            elif tag == TERM_TAG:
+                push(TermNode(pop()))
+            elif tag == CHAIN_PLUS_TAG or tag == CHAIN_MINUS_TAG:
+                term_node = pop()
+                expression_chain_node = stack[-1]
+                expression_chain_node.term_nodes.append(term_node)
+                expression_chain_node.operators.append(plus if tag == CHAIN_PLUS_TAG else minus)
+            elif tag == CHAIN_MULTIPLY_TAG or tag == CHAIN_DIVIDE_TAG:
+                factor_node = pop()
+                term_chain_node = stack[-1]
+                term_chain_node.factor_nodes.append(factor_node)
+                term_chain_node.operators.append(multiply if tag == CHAIN_MULTIPLY_TAG else divide)
+            elif tag == TERM_CHAIN_TAG:
+                push(TermChainNode([pop()]))
+            elif tag == EXPRESSION_CHAIN_TAG:
+                push(ExpressionChainNode([pop()]))
+            elif tag == EXPRESSION_TAG:
+                push(ExpressionNode(pop()))
+            elif tag == EXPRESSION_PLUS_TAG or tag == EXPRESSION_MINUS_TAG:
+                additional_expression_node = pop()
+                push(ExpressionNode(pop(), plus if tag == EXPRESSION_PLUS_TAG else minus, additional_expression_node))
+            elif tag == TERM_MULTIPLY_TAG or tag == TERM_DIVIDE_TAG:
+                second_factor_node = pop()
+                push(TermNode(pop(), multiply if tag == TERM_MULTIPLY_TAG else divide, second_factor_node))
+            else:
+                sign = -1 if tag & NEGATIVE_SIGN_BIT else 1
+                kind = tag & ~NEGATIVE_SIGN_BIT
+                if kind == FACTOR_NUMBER_TAG:
+                    push(FactorNode(sign, next_literal()))
+                elif kind == FACTOR_VARIABLE_TAG:
+                    push(FactorNode(sign, variable=next_literal()))
+                elif kind == FACTOR_NESTED_TAG:
+                    push(FactorNode(sign, nested_expression=pop()))
+                else:
+                    raise InvalidSerializedTree(f"Unknown node tag {tag}")
+    except (IndexError, StopIteration, AttributeError) as error:
+        raise InvalidSerializedTree("Node data does not form a tree") from error
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    if len(stack) != 1 or not isinstance(stack[0], (ExpressionNode, ExpressionChainNode)):
+        raise InvalidSerializedTree("Node data does not form a tree")
+    return stack[0], consumed_token_count
@@ -0,0 +1,204 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, List, Optional, Set
+from .interpreter import InterpreterResult
+from .parser import NESTING_TOO_DEEP
+from .pipeline import ENGINES
+from .cache import EvaluationCache, normalize_source
+from .integers import format_integer
+
+"""
+Line-delimited evaluation server.
+
+Every request is one expression terminated by a newline. Every response is one line, either "OK <value>" or
+"ERROR <message>", and responses are written in request order, so clients may pipeline as many requests as they like
+on a connection.
+"""
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7341
+
+# expressions at least this long are evaluated in the worker pool so they do not stall the event loop
+LARGE_EXPRESSION_LENGTH = 10_000
+
+# longest request line accepted, in bytes
+MAX_REQUEST_LENGTH = 64 * 1024 * 1024
+
+# responses a connection may have pending before the server stops reading its requests
+MAX_PIPELINED_REQUESTS = 1024
+
+OK_PREFIX = b"OK "
+ERROR_PREFIX = b"ERROR "
+REQUEST_TOO_LONG = "Request is longer than the maximum length"
+EVALUATION_FAILED = "Could not evaluate the expression"
+
+
+def format_response(interpreter_result: InterpreterResult) -> bytes:
+    if not interpreter_result.was_successful:
+        return ERROR_PREFIX + interpreter_result.error_message.encode("utf-8") + b"\n"
+    return OK_PREFIX + format_integer(interpreter_result.output).encode("ascii") + b"\n"
+
+
+def format_failure(error: Exception) -> bytes:
+    """
+    Formats the response line for a request whose evaluation raised instead of returning a result.
+    """
+
+    message = NESTING_TOO_DEEP if isinstance(error, RecursionError) else EVALUATION_FAILED
+    return ERROR_PREFIX + message.encode("utf-8") + b"\n"
+
+
+def evaluate_with_engine(engine: str, expression: str) -> InterpreterResult:
+    """
+    Evaluates one expression with the engine of that name; runs in worker processes for large expressions, which is
+    why the engine is passed by name.
+    """
+
+    return ENGINES[engine](expression)
+
+
+class EvaluationServer:
+    """
+    Serves the calculator over TCP and Unix domain sockets.
+
+    Small expressions are evaluated directly on the event loop, which is faster than any hand-off for them. Expressions
+    of at least large_expression_length characters are sent to a process pool, so one huge request does not delay the
+    small requests of other connections. Both go through the named engine of ENGINES and, when cache_capacity is given,
+    through one result cache. A request whose evaluation raises gets an ERROR line; the connection keeps being served.
+    """
+
+    def __init__(self, workers: Optional[int] = None, large_expression_length: int = LARGE_EXPRESSION_LENGTH,
+                 engine: str = "tree", cache_capacity: Optional[int] = None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}")
+        self.workers = workers
+        self.large_expression_length = large_expression_length
+        self.engine = engine
+        self.cache = EvaluationCache(cache_capacity, ENGINES[engine]) if cache_capacity is not None else None
+        self.evaluate: Callable[[str], InterpreterResult] = \
+            self.cache.evaluate if self.cache is not None else ENGINES[engine]
+        self.executor: Optional[Executor] = None
+        self.servers: List[asyncio.AbstractServer] = []
+        self.connection_tasks: Set[asyncio.Task] = set()
+
+    async def start(self, host: Optional[str] = DEFAULT_HOST, port: Optional[int] = DEFAULT_PORT,
+                    unix_path: Optional[str] = None) -> None:
+        """
+        Starts listening on host and port (unless host is None) and on unix_path (if given).
+        """
+
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        if host is not None:
+            self.servers.append(await asyncio.start_server(self.handle_connection, host, port,
+                                                           limit=MAX_REQUEST_LENGTH))
+        if unix_path is not None:
+            self.servers.append(await asyncio.start_unix_server(self.handle_connection, unix_path,
+                                                                limit=MAX_REQUEST_LENGTH))
+
+    def addresses(self) -> List[object]:
+        return [socket.getsockname() for server in self.servers for socket in server.sockets]
+
+    async def serve_forever(self) -> None:
+        await asyncio.gather(*(server.serve_forever() for server in self.servers))
+
+    async def close(self) -> None:
+        for server in self.servers:
+            server.close()
+        for task in self.connection_tasks:
+            task.cancel()
+        await asyncio.gather(*self.connection_tasks, return_exceptions=True)
+        for server in self.servers:
+            await server.wait_closed()
+        self.servers = []
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # responses are queued in request order; a separate task writes each one as soon as it is ready
+        pending_responses: asyncio.Queue = asyncio.Queue(MAX_PIPELINED_REQUESTS)
+        writer_task = asyncio.create_task(self.write_responses(pending_responses, writer))
+        connection_task = asyncio.current_task()
+        self.connection_tasks.add(connection_task)
+
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as error:
+                    line = error.partial
+                except asyncio.LimitOverrunError:
+                    await pending_responses.put(ERROR_PREFIX + REQUEST_TOO_LONG.encode("utf-8") + b"\n")
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                await pending_responses.put(self.respond(line.decode("utf-8", errors="replace").rstrip("\r\n")))
+            await pending_responses.put(None)
+            await writer_task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            writer_task.cancel()
+            writer.close()
+            self.connection_tasks.discard(connection_task)
+
+    def respond(self, expression: str):
+        """
+        Returns the response line for a small or cached expression, or a task resolving to it for a large one.
+        """
+
+        try:
+            if len(expression) < self.large_expression_length:
+                return format_response(self.evaluate(expression))
+            cache_key = None
+            if self.cache is not None:
+                cache_key = normalize_source(expression)
+                cached_result = self.cache.lookup(cache_key)
+                if cached_result is not None:
+                    return format_response(cached_result)
+            return asyncio.ensure_future(self.evaluate_in_pool(expression, cache_key))
+        except Exception as error:
+            return format_failure(error)
+
+    async def evaluate_in_pool(self, expression: str, cache_key: Optional[str]) -> bytes:
+        result = await asyncio.get_running_loop().run_in_executor(self.executor, evaluate_with_engine, self.engine,
+                                                                  expression)
+        if cache_key is not None:
+            self.cache.store(cache_key, result)
+        return format_response(result)
+
+    @staticmethod
+    async def write_responses(pending_responses: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        connection_is_open = True
+        while True:
+            response = await pending_responses.get()
+            if response is None:
+                break
+            if not isinstance(response, bytes):
+                try:
+                    response = await response
+                except Exception as error:
+                    response = format_failure(error)
+            if not connection_is_open:
+                # keep consuming, so the reading side never blocks on a full queue
+                continue
+            try:
+                writer.write(response)
+                # only wait for the socket once nothing else is ready, so pipelined responses share a write
+                if pending_responses.empty():
+                    await writer.drain()
+            except ConnectionError:
+                connection_is_open = False
+        writer.close()
+
+
+async def run_server(host: Optional[str] = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_path: Optional[str] = None,
+                     workers: Optional[int] = None, engine: str = "tree", cache_capacity: Optional[int] = None) -> None:
+    server = EvaluationServer(workers, engine=engine, cache_capacity=cache_capacity)
+    await server.start(host, port, unix_path)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
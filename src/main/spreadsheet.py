@@ -0,0 +1,239 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from .ast import Expression, FactorNode, AssignmentNode, ASSIGN_TOKEN_KIND, IDENTIFIER_TOKEN_KIND
+from .lexer import scan_input_into_token_stream
+from .parser import parse_statement
+from .interpreter import interpret_node, InterpreterResult, UNDEFINED_VARIABLE, report_error_for_interpreter
+from .hashcons import child_nodes
+
+CIRCULAR_REFERENCE = "Found a circular reference, '{0}'"
+
+
+def collect_references(syntax_tree: Expression) -> Tuple[str, ...]:
+    """
+    Returns the distinct names a syntax tree refers to, in the order they first appear in the source.
+    """
+
+    references: Dict[str, None] = {}
+    pending: List[object] = [syntax_tree]
+    while pending:
+        node = pending.pop()
+        if node is None:
+            continue
+        if isinstance(node, FactorNode) and node.variable is not None:
+            references[node.variable] = None
+        pending.extend(reversed(child_nodes(node)))
+    return tuple(references)
+
+
+@dataclass
+class Formula:
+    """
+    Represents a named formula: its source, its parsed tree, the names it refers to and its current result.
+
+    - result is None only while a new formula waits for its first evaluation.
+    """
+
+    source: str
+    syntax_tree: Expression
+    references: Tuple[str, ...]
+    result: Optional[InterpreterResult] = None
+
+
+@dataclass
+class StatementResult:
+    """
+    Represents the outcome of one statement executed by a SpreadsheetSession.
+
+    - assigned_name is None for a bare expression and for a statement that did not lex, parse or fit the graph.
+    - recomputed_names lists the formulas evaluated by the update, in the (topological) order they were evaluated.
+    """
+
+    result: InterpreterResult
+    assigned_name: Optional[str] = None
+    recomputed_names: List[str] = field(default_factory=list)
+
+    @property
+    def recomputed_count(self) -> int:
+        return len(self.recomputed_names)
+
+
+class SpreadsheetSession:
+    """
+    Keeps named formulas that refer to each other, with the value of every formula cached.
+
+    Assigning a formula only re-evaluates the formulas downstream of it, in topological order, and stops at formulas
+    whose value did not change. An assignment that would make a formula depend on itself is rejected and leaves the
+    session unchanged. A formula that refers to a failing formula reports that formula's error, the way spreadsheet
+    errors propagate; a reference to a name that has no formula is an undefined variable until the name is assigned.
+    """
+
+    def __init__(self):
+        self.formulas: Dict[str, Formula] = {}
+        # reverse edges: every name (defined or not) mapped to the formulas that refer to it
+        self.dependents: Dict[str, Set[str]] = {}
+        # values of the formulas that evaluated successfully, used as the interpreter's variables
+        self.values: Dict[str, int] = {}
+
+    def execute(self, statement: str) -> StatementResult:
+        """
+        Runs one statement: an assignment (name = expression) updates the sheet; a bare expression is evaluated against
+        the current values.
+        """
+
+        lexer_result = scan_input_into_token_stream(statement)
+        if not lexer_result.was_successful:
+            return StatementResult(report_error_for_interpreter(lexer_result.error_message))
+
+        parser_result = parse_statement(lexer_result.tokens)
+        if not parser_result.was_successful or parser_result.syntax_tree is None:
+            return StatementResult(report_error_for_interpreter(parser_result.error_message))
+
+        syntax_tree = parser_result.syntax_tree
+        if isinstance(syntax_tree, AssignmentNode):
+            return self.assign_tree(syntax_tree.name, statement, syntax_tree.expression)
+        return StatementResult(self.evaluate_tree(syntax_tree, collect_references(syntax_tree)))
+
+    def handles(self, statement: str) -> bool:
+        """
+        Returns whether statement needs the session: an assignment, or an expression that refers to a formula.
+
+        Any other line gives the same result from the evaluation engines, which can cache it.
+        """
+
+        lexer_result = scan_input_into_token_stream(statement)
+        if not lexer_result.was_successful:
+            return False
+        tokens = lexer_result.tokens
+        for index, kind in enumerate(tokens.kinds):
+            if kind == ASSIGN_TOKEN_KIND:
+                return True
+            if kind == IDENTIFIER_TOKEN_KIND and tokens.token_value(index) in self.formulas:
+                return True
+        return False
+
+    def value_of(self, name: str) -> InterpreterResult:
+        formula = self.formulas.get(name)
+        if formula is None:
+            return report_error_for_interpreter(UNDEFINED_VARIABLE.format(name))
+        return formula.result
+
+    def assign_tree(self, name: str, source: str, syntax_tree: Expression) -> StatementResult:
+        references = collect_references(syntax_tree)
+        cycle = self.find_cycle(name, references)
+        if cycle is not None:
+            return StatementResult(report_error_for_interpreter(CIRCULAR_REFERENCE.format(" -> ".join(cycle))))
+
+        previous_formula = self.formulas.get(name)
+        if previous_formula is not None:
+            for reference in previous_formula.references:
+                self.dependents[reference].discard(name)
+        for reference in references:
+            self.dependents.setdefault(reference, set()).add(name)
+
+        previous_result = previous_formula.result if previous_formula is not None else None
+        self.formulas[name] = Formula(source, syntax_tree, references, previous_result)
+        recomputed_names = self.recompute_downstream_of(name)
+        return StatementResult(self.formulas[name].result, name, recomputed_names)
+
+    def find_cycle(self, name: str, references: Tuple[str, ...]) -> Optional[List[str]]:
+        """
+        Returns the names along a cycle (starting and ending with name) if name were given these references, else None.
+
+        Follows references depth-first with an explicit stack, so long chains of formulas do not recurse.
+        """
+
+        # name each visited name was reached from
+        reached_from: Dict[str, str] = {}
+        pending: List[str] = []
+        for reference in reversed(references):
+            reached_from.setdefault(reference, name)
+            pending.append(reference)
+
+        while pending:
+            current = pending.pop()
+            if current == name:
+                cycle = [name]
+                previous = reached_from[name]
+                while previous != name:
+                    cycle.append(previous)
+                    previous = reached_from[previous]
+                cycle.append(name)
+                cycle.reverse()
+                return cycle
+            formula = self.formulas.get(current)
+            if formula is None:
+                continue
+            for reference in reversed(formula.references):
+                if reference not in reached_from:
+                    reached_from[reference] = current
+                    pending.append(reference)
+        return None
+
+    def collect_downstream_of(self, name: str) -> Set[str]:
+        """
+        Returns name and every formula that depends on it, directly or through other formulas.
+        """
+
+        downstream = {name}
+        pending = [name]
+        while pending:
+            for dependent in self.dependents.get(pending.pop(), ()):
+                if dependent not in downstream:
+                    downstream.add(dependent)
+                    pending.append(dependent)
+        return downstream
+
+    def recompute_downstream_of(self, name: str) -> List[str]:
+        """
+        Re-evaluates name and the formulas downstream of it in topological order (Kahn's algorithm), and returns the
+        names that were evaluated.
+
+        A downstream formula is only evaluated when one of the formulas it refers to changed value, so an update whose
+        value stays the same stops there.
+        """
+
+        downstream = self.collect_downstream_of(name)
+        # references to other downstream formulas that have not been visited yet
+        waiting_on = {current: sum(reference in downstream for reference in self.formulas[current].references)
+                      for current in downstream}
+        # name is the only downstream formula that does not refer to another one, as the graph has no cycles
+        ready: Deque[str] = deque([name])
+        changed: Set[str] = set()
+        recomputed_names: List[str] = []
+
+        while ready:
+            current = ready.popleft()
+            formula = self.formulas[current]
+            if current == name or any(reference in changed for reference in formula.references):
+                recomputed_names.append(current)
+                result = self.evaluate_tree(formula.syntax_tree, formula.references)
+                if result != formula.result:
+                    changed.add(current)
+                formula.result = result
+                if result.was_successful:
+                    self.values[current] = result.output
+                else:
+                    self.values.pop(current, None)
+            for dependent in self.dependents.get(current, ()):
+                waiting_on[dependent] -= 1
+                if waiting_on[dependent] == 0:
+                    ready.append(dependent)
+
+        return recomputed_names
+
+    def evaluate_tree(self, syntax_tree: Expression, references: Tuple[str, ...]) -> InterpreterResult:
+        """
+        Interprets a tree against the current values; the first failing reference reports its formula's error.
+        """
+
+        result = interpret_node(syntax_tree, self.values)
+        if result.was_successful:
+            return result
+        for reference in references:
+            formula = self.formulas.get(reference)
+            if (formula is not None and formula.result is not None and not formula.result.was_successful
+                    and result.error_message == UNDEFINED_VARIABLE.format(reference)):
+                return formula.result
+        return result
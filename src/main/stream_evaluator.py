@@ -0,0 +1,248 @@
+import mmap
+import os
+import re
+from typing import AnyStr, Callable, Iterator, List, Mapping, Optional, Tuple, Union
+from .ast import (
+    Token,
+    TokenStream,
+    ArithmeticOperator,
+    TOKEN_KIND_BY_TYPE,
+    TOKEN_TYPE_BY_KIND,
+    NUMBER_TOKEN_KIND,
+    PLUS_TOKEN_KIND,
+    MINUS_TOKEN_KIND,
+    MULTIPLY_TOKEN_KIND,
+    DIVIDE_TOKEN_KIND,
+    LPAREN_TOKEN_KIND,
+    RPAREN_TOKEN_KIND,
+    IDENTIFIER_TOKEN_KIND,
+)
+from .lexer import stream_token_patterns, token_kind_by_group_index, unknown_character_group_index
+from .lexer import report_unknown_character
+from .interpreter import InterpreterResult, UNDEFINED_VARIABLE, report_error_for_interpreter
+from .integers import convert_literal_to_integer, divide_truncating
+
+# same messages as parse_list_of_tokens
+UNEXPECTED_TOKEN_TYPE = "Unexpected Token Type, {0}"
+NO_TOKENS_FOR_FACTOR = "Found A Null Value; No tokens for factor is Null"
+MISSING_CLOSING_PARENTHESIS = "Found A Null Value; Missing closing parenthesis is Null"
+
+# progress is reported after every this many tokens
+PROGRESS_INTERVAL_TOKENS = 1 << 20
+
+# the stream token pattern over bytes; \s only covers ASCII whitespace in bytes patterns, so the ASCII separators that
+# str.isspace() also accepts are added, and non-ASCII characters reach the unknown-character group
+byte_token_pattern = re.compile(
+    rb"[\s\x1c-\x1f]*(?:" + b"|".join(b"(" + pattern.encode("ascii") + b")" for pattern, _ in stream_token_patterns)
+    + rb"|(.)|$)",
+    re.DOTALL,
+)
+whitespace_character_pattern = re.compile(r"\s")
+
+Progress = Callable[[int, int], None]
+
+
+class LexerFailure(Exception):
+    """
+    Raised by scan_mapped_bytes on an unknown character; carries the lexer's error message.
+    """
+
+    def __init__(self, error_message: str):
+        super().__init__(error_message)
+        self.error_message = error_message
+
+
+def evaluate_token_sequence(tokens: Iterator[Tuple[int, AnyStr]],
+                            variables: Optional[Mapping[str, int]] = None) -> InterpreterResult:
+    """
+    Evaluates (token kind, token text) pairs as they arrive, with an operator-precedence (shunting-yard) parser.
+
+    Values are combined as soon as precedence allows, so the stacks only grow with the nesting depth, never with the
+    number of tokens. Results, errors and their precedence match the tree pipeline: a parser error wins over an
+    interpreter error, and tokens after a complete expression are not read. Text may be str or bytes.
+    """
+
+    if variables is None:
+        variables = {}
+
+    values: List[int] = []
+    # binary operators, and the sign (1 or -1) of every open parenthesis
+    operators: List[Union[ArithmeticOperator, int]] = []
+    interpreter_error: Optional[str] = None
+    sign = 1
+    expecting_operand = True
+    depth = 0
+
+    def apply_top_operator() -> None:
+        nonlocal interpreter_error
+        operator = operators.pop()
+        right = values.pop()
+        if interpreter_error is not None:
+            # after the first interpreter error only the parse continues
+            return
+        if operator is ArithmeticOperator.PLUS:
+            values[-1] += right
+        elif operator is ArithmeticOperator.MINUS:
+            values[-1] -= right
+        elif operator is ArithmeticOperator.MULTIPLY:
+            values[-1] *= right
+        elif right == 0:
+            interpreter_error = "You cannot divide by zero"
+        else:
+            values[-1] = divide_truncating(values[-1], right)
+
+    for kind, text in tokens:
+        if expecting_operand:
+            if kind == PLUS_TOKEN_KIND:
+                continue
+            if kind == MINUS_TOKEN_KIND:
+                sign = -sign
+                continue
+            if kind == LPAREN_TOKEN_KIND:
+                operators.append(sign)
+                sign = 1
+                depth += 1
+                continue
+            if kind == NUMBER_TOKEN_KIND:
+                values.append(convert_literal_to_integer(text) * sign if interpreter_error is None else 0)
+            elif kind == IDENTIFIER_TOKEN_KIND:
+                name = text if isinstance(text, str) else text.decode("ascii")
+                if interpreter_error is None and name not in variables:
+                    interpreter_error = UNDEFINED_VARIABLE.format(name)
+                values.append(variables[name] * sign if interpreter_error is None else 0)
+            else:
+                return report_error_for_interpreter(UNEXPECTED_TOKEN_TYPE.format(TOKEN_TYPE_BY_KIND[kind]))
+            sign = 1
+            expecting_operand = False
+            continue
+
+        if kind == PLUS_TOKEN_KIND or kind == MINUS_TOKEN_KIND:
+            while operators and type(operators[-1]) is not int:
+                apply_top_operator()
+            operators.append(ArithmeticOperator.PLUS if kind == PLUS_TOKEN_KIND else ArithmeticOperator.MINUS)
+            expecting_operand = True
+        elif kind == MULTIPLY_TOKEN_KIND or kind == DIVIDE_TOKEN_KIND:
+            while operators and (operators[-1] is ArithmeticOperator.MULTIPLY
+                                 or operators[-1] is ArithmeticOperator.DIVIDE):
+                apply_top_operator()
+            operators.append(ArithmeticOperator.MULTIPLY if kind == MULTIPLY_TOKEN_KIND else ArithmeticOperator.DIVIDE)
+            expecting_operand = True
+        elif depth == 0:
+            # the expression is complete; like parse_list_of_tokens, the remaining tokens are ignored
+            break
+        elif kind == RPAREN_TOKEN_KIND:
+            while type(operators[-1]) is not int:
+                apply_top_operator()
+            if operators.pop() != 1 and interpreter_error is None:
+                values[-1] = -values[-1]
+            depth -= 1
+        else:
+            return report_error_for_interpreter(UNEXPECTED_TOKEN_TYPE.format(TOKEN_TYPE_BY_KIND[kind]))
+
+    if expecting_operand:
+        return report_error_for_interpreter(NO_TOKENS_FOR_FACTOR)
+    if depth:
+        return report_error_for_interpreter(MISSING_CLOSING_PARENTHESIS)
+    while operators:
+        apply_top_operator()
+    if interpreter_error is not None:
+        return report_error_for_interpreter(interpreter_error)
+    return InterpreterResult(True, values[0])
+
+
+def pair_tokens_with_text(tokens: List[Token] | TokenStream) -> Iterator[Tuple[int, str]]:
+    """
+    Lazily yields (token kind, token text) for a list of Tokens or a TokenStream.
+    """
+
+    if isinstance(tokens, TokenStream):
+        return zip(tokens.kinds, map(tokens.source.__getitem__, map(slice, tokens.starts, tokens.ends)))
+    return ((TOKEN_KIND_BY_TYPE[token.token_type], token.token_value) for token in tokens)
+
+
+def evaluate_tokens_by_shunting_yard(tokens: List[Token] | TokenStream,
+                                     variables: Optional[Mapping[str, int]] = None) -> InterpreterResult:
+    """
+    Evaluates lexer output directly, without building a syntax tree, with the same results as parse_list_of_tokens
+    followed by interpret_node.
+    """
+
+    return evaluate_token_sequence(pair_tokens_with_text(tokens), variables)
+
+
+def decode_character_at(buffer, offset: int) -> str:
+    return bytes(buffer[offset:offset + 4]).decode("utf-8", errors="replace")[0]
+
+
+def scan_mapped_bytes(buffer, progress: Optional[Progress] = None) -> Iterator[Tuple[int, bytes]]:
+    """
+    Lazily yields (token kind, token bytes) pairs from a bytes-like buffer (such as an mmap) without decoding it.
+
+    Non-ASCII whitespace is skipped like the str lexer skips it; any other non-ASCII character, including non-ASCII
+    digits, raises LexerFailure. progress(offset, total) is called every PROGRESS_INTERVAL_TOKENS tokens.
+    """
+
+    total = len(buffer)
+    position = 0
+    token_count = 0
+
+    while True:
+        for match in byte_token_pattern.finditer(buffer, position):
+            group_index = match.lastindex
+            if group_index is None:
+                # trailing whitespace
+                continue
+            if group_index == unknown_character_group_index:
+                character = decode_character_at(buffer, match.start(group_index))
+                if not whitespace_character_pattern.match(character):
+                    raise LexerFailure(report_unknown_character(character).error_message)
+                # restart after the multi-byte whitespace character
+                position = match.start(group_index) + len(character.encode("utf-8"))
+                break
+            token_count += 1
+            if progress is not None and token_count % PROGRESS_INTERVAL_TOKENS == 0:
+                progress(match.end(), total)
+            yield token_kind_by_group_index[group_index], match.group(group_index)
+        else:
+            break
+
+    if progress is not None:
+        progress(total, total)
+
+
+def evaluate_buffer(buffer, variables: Optional[Mapping[str, int]] = None,
+                    progress: Optional[Progress] = None) -> InterpreterResult:
+    """
+    Evaluates the expression held in a bytes-like buffer, reporting the same result as evaluate_expression on the
+    decoded text, with one exception: non-ASCII digits (such as "٣"), which the str lexer accepts as numbers, are
+    reported here as unknown characters, because the buffer is never decoded.
+
+    The whole buffer is always scanned, because an unknown character anywhere takes precedence over every other error.
+    """
+
+    tokens = scan_mapped_bytes(buffer, progress)
+    try:
+        interpreter_result = evaluate_token_sequence(tokens, variables)
+        for _ in tokens:
+            pass
+    except LexerFailure as failure:
+        return report_error_for_interpreter(failure.error_message)
+    return interpreter_result
+
+
+def evaluate_mapped_file(path: Union[str, os.PathLike], variables: Optional[Mapping[str, int]] = None,
+                         progress: Optional[Progress] = None) -> InterpreterResult:
+    """
+    Memory-maps the file at path and evaluates the single expression it holds.
+
+    The file is never read into a str; peak memory depends on the nesting depth of the expression (and the size of its
+    values), not on the size of the file.
+    """
+
+    with open(path, "rb") as input_file:
+        if os.fstat(input_file.fileno()).st_size == 0:
+            return evaluate_buffer(b"", variables, progress)
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            return evaluate_buffer(mapped, variables, progress)
@@ -0,0 +1,63 @@
+from itertools import islice
+from typing import BinaryIO, Callable, Iterable, Iterator
+from .interpreter import InterpreterResult
+from .parser import NESTING_TOO_DEEP
+from .integers import format_integer
+
+# number of result lines gathered into one write call
+DEFAULT_WRITE_BATCH_SIZE = 4096
+
+
+def read_expressions(binary_stream: BinaryIO) -> Iterator[str]:
+    """
+    Lazily yields one expression per line of a buffered binary stream, without the line ending.
+    """
+
+    for line in binary_stream:
+        yield line.decode("utf-8", errors="replace").rstrip("\r\n")
+
+
+def format_results(expressions: Iterable[str], evaluate: Callable[[str], InterpreterResult]) -> Iterator[str]:
+    """
+    Lazily evaluates each expression and yields the line the REPL would print for it.
+
+    An evaluate function that raises RecursionError yields NESTING_TOO_DEEP for that line, so one line cannot end the
+    stream and lose the results still waiting to be written.
+    """
+
+    for expression in expressions:
+        try:
+            interpreter_result = evaluate(expression)
+        except RecursionError:
+            yield NESTING_TOO_DEEP
+            continue
+        if not interpreter_result.was_successful:
+            yield interpreter_result.error_message
+        else:
+            yield format_integer(interpreter_result.output)
+
+
+def write_in_batches(lines: Iterable[str], binary_stream: BinaryIO,
+                     batch_size: int = DEFAULT_WRITE_BATCH_SIZE) -> None:
+    """
+    Writes lines to a binary stream, joining up to batch_size of them into each write call.
+    """
+
+    iterator = iter(lines)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            break
+        binary_stream.write(("\n".join(batch) + "\n").encode("utf-8"))
+    binary_stream.flush()
+
+
+def evaluate_stream(input_stream: BinaryIO, output_stream: BinaryIO,
+                    evaluate: Callable[[str], InterpreterResult]) -> None:
+    """
+    Evaluates every line of input_stream and writes one result line per expression to output_stream.
+
+    Lines are read, evaluated and written through generators, so memory stays flat whatever the input size.
+    """
+
+    write_in_batches(format_results(read_expressions(input_stream), evaluate), output_stream)
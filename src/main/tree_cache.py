@@ -0,0 +1,186 @@
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+from typing import Optional, Union
+from .lexer import scan_input_into_token_stream
+from .parser import ParserResult, parse_list_of_tokens
+from .cache import CacheStatistics
+from .serialization import GRAMMAR_FINGERPRINT, InvalidSerializedTree, serialize_syntax_tree, deserialize_syntax_tree
+
+DEFAULT_MAX_CACHE_BYTES = 256 * 2 ** 20
+
+TREE_FILE_SUFFIX = ".tree"
+
+
+class SyntaxTreeCache:
+    """
+    An on-disk cache of parsed syntax trees, keyed by a SHA-256 hash of the source, that survives process restarts.
+
+    A hit memory-maps the stored tree and rebuilds it without lexing or parsing. The grammar fingerprint is part of the
+    key and of every file's header, so a grammar change turns old entries into misses, and they age out. When the files
+    grow past max_bytes, the least recently used ones are deleted. Several processes may share a directory: files are
+    written to a temporary name and renamed into place.
+
+    The directory is scanned once on creation; after that a running total of the stored bytes is kept, and the
+    directory is only scanned again when a store takes that total past max_bytes. Files written by other processes are
+    therefore counted at the next scan.
+    """
+
+    def __init__(self, directory: Union[str, os.PathLike], max_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        if max_bytes < 0:
+            raise ValueError("max_bytes cannot be negative")
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.stored_bytes = sum(size for _, size, _ in self.stored_entries())
+
+    def path_for(self, source: bytes) -> str:
+        key = hashlib.sha256(GRAMMAR_FINGERPRINT + source).hexdigest()
+        return os.path.join(self.directory, key + TREE_FILE_SUFFIX)
+
+    def parse_file(self, path: Union[str, os.PathLike]) -> ParserResult:
+        """
+        Returns the parsed tree of the expression held in the UTF-8 file at path, from the cache when it was parsed
+        before.
+        """
+
+        with open(path, "rb") as source_file:
+            return self.parse_source(source_file.read())
+
+    def parse_source(self, source: Union[bytes, str]) -> ParserResult:
+        """
+        Returns the parsed tree of source, loading it from the cache on a hit and parsing (then storing) it on a miss.
+
+        Lexer and parser errors are reported in error_message and are not cached.
+        """
+
+        if isinstance(source, str):
+            source = source.encode("utf-8")
+        path = self.path_for(source)
+
+        parser_result = self.load(path)
+        with self.lock:
+            if parser_result is not None:
+                self.hits += 1
+                return parser_result
+            self.misses += 1
+
+        lexer_result = scan_input_into_token_stream(source.decode("utf-8", errors="replace"))
+        if not lexer_result.was_successful:
+            return ParserResult(False, error_message=lexer_result.error_message)
+        parser_result = parse_list_of_tokens(lexer_result.tokens)
+        if parser_result.was_successful and parser_result.syntax_tree is not None:
+            self.store(path, serialize_syntax_tree(parser_result.syntax_tree, parser_result.consumed_token_count))
+        return parser_result
+
+    def load(self, path: str) -> Optional[ParserResult]:
+        """
+        Memory-maps and decodes the tree stored at path; returns None if there is none or it cannot be used.
+        """
+
+        try:
+            with open(path, "rb") as tree_file:
+                with mmap.mmap(tree_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    syntax_tree, consumed_token_count = deserialize_syntax_tree(mapped)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, InvalidSerializedTree):
+            # unreadable, empty (mmap cannot map an empty file), corrupt or written for another grammar
+            self.remove(path)
+            return None
+        try:
+            # the modification time orders entries for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return ParserResult(True, syntax_tree, consumed_token_count=consumed_token_count)
+
+    def store(self, path: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        try:
+            replaced_size = os.stat(path).st_size
+        except OSError:
+            replaced_size = 0
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as temporary_file:
+                temporary_file.write(data)
+            os.replace(temporary_path, path)
+        except OSError:
+            self.remove(temporary_path)
+            return
+        with self.lock:
+            self.stored_bytes += len(data) - replaced_size
+            is_over_budget = self.stored_bytes > self.max_bytes
+        if is_over_budget:
+            self.evict()
+
+    def remove(self, path: str) -> bool:
+        try:
+            size = os.stat(path).st_size
+            os.remove(path)
+        except OSError:
+            return False
+        if path.endswith(TREE_FILE_SUFFIX):
+            with self.lock:
+                self.stored_bytes -= size
+        return True
+
+    def stored_entries(self):
+        """
+        Returns (modification time, size, path) for every stored tree.
+        """
+
+        entries = []
+        with os.scandir(self.directory) as directory_entries:
+            for entry in directory_entries:
+                if not entry.name.endswith(TREE_FILE_SUFFIX):
+                    continue
+                try:
+                    status = entry.stat()
+                except OSError:
+                    continue
+                entries.append((status.st_mtime_ns, status.st_size, entry.path))
+        return entries
+
+    def evict(self) -> None:
+        """
+        Deletes the least recently used trees until the stored trees fit in max_bytes, and resets the running total to
+        what the scan found.
+        """
+
+        entries = sorted(self.stored_entries())
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            if self.remove(path):
+                with self.lock:
+                    self.evictions += 1
+            total_bytes -= size
+        with self.lock:
+            self.stored_bytes = total_bytes
+
+    def statistics(self) -> CacheStatistics:
+        """
+        Returns the counters of this cache object; size is the number of bytes stored in the directory.
+        """
+
+        size = sum(size for _, size, _ in self.stored_entries())
+        with self.lock:
+            return CacheStatistics(self.hits, self.misses, self.evictions, size, self.max_bytes)
+
+    def clear(self) -> None:
+        """
+        Deletes every stored tree; the counters are kept.
+        """
+
+        for _, _, path in self.stored_entries():
+            self.remove(path)
@@ -0,0 +1,109 @@
+from typing import List, Mapping, Optional, Union
+from dataclasses import dataclass
+import numpy as np
+from .ast import (
+    SyntaxNode,
+    ArithmeticOperator,
+)
+from .interpreter import (
+    NEGATE_INSTRUCTION,
+    UNDEFINED_VARIABLE,
+    VariableInstruction,
+    flatten_node_into_postfix,
+)
+
+"""
+Evaluates one AST over whole columns of variable values at once. Requires NumPy.
+"""
+
+INT64_LIMITS = np.iinfo(np.int64)
+
+
+@dataclass
+class VectorizedResult:
+    """
+    Represents the result of evaluating an AST over columns of variable values.
+
+    - output holds one int64 value per row; rows flagged in error_mask hold 0.
+    - error_mask is True for every row that divided by zero. Such rows do not fail the whole evaluation.
+    - error_message will always be an empty string if was_successful is True.
+    """
+
+    was_successful: bool
+    output: Optional[np.ndarray] = None
+    error_mask: Optional[np.ndarray] = None
+    error_message: str = ""
+
+
+def report_error_for_vectorized(reason_for_error: str) -> VectorizedResult:
+    """
+    Clarity function to report an error from the vectorized evaluator.
+    """
+
+    return VectorizedResult(False, error_message=reason_for_error)
+
+
+def evaluate_vectorized(syntax_tree: SyntaxNode,
+                        columns: Mapping[str, np.ndarray]) -> VectorizedResult:
+    """
+    Evaluates an AST once over whole columns, where columns maps every variable name to an array of int64 values.
+
+    Arithmetic is int64 and wraps on overflow. Division truncates toward zero like interpret_node; rows that divide
+    by zero are reported through the error mask of the result.
+    """
+
+    row_counts = {len(column) for column in columns.values()}
+    if len(row_counts) > 1:
+        return report_error_for_vectorized("Columns have different lengths")
+    row_count = row_counts.pop() if row_counts else 1
+
+    error_mask = np.zeros(row_count, dtype=bool)
+    values: List[Union[np.ndarray, np.int64]] = []
+    push_value = values.append
+    pop_value = values.pop
+
+    with np.errstate(all="ignore"):
+        for instruction in flatten_node_into_postfix(syntax_tree):
+            if type(instruction) is int:
+                if not INT64_LIMITS.min <= instruction <= INT64_LIMITS.max:
+                    return report_error_for_vectorized(f"Literal does not fit in 64 bits, {instruction}")
+                push_value(np.int64(instruction))
+                continue
+
+            if instruction is NEGATE_INSTRUCTION:
+                values[-1] = np.negative(values[-1])
+                continue
+
+            if isinstance(instruction, VariableInstruction):
+                if instruction.name not in columns:
+                    return report_error_for_vectorized(UNDEFINED_VARIABLE.format(instruction.name))
+                column = np.asarray(columns[instruction.name], dtype=np.int64)
+                push_value(column if instruction.sign == 1 else np.negative(column))
+                continue
+
+            if not isinstance(instruction, ArithmeticOperator):
+                # Should be unreachable but never hurts to be safe
+                return report_error_for_vectorized("Vectorized evaluator reached unreachable code")
+
+            right = pop_value()
+            left = values[-1]
+            if instruction is ArithmeticOperator.PLUS:
+                values[-1] = np.add(left, right)
+            elif instruction is ArithmeticOperator.MINUS:
+                values[-1] = np.subtract(left, right)
+            elif instruction is ArithmeticOperator.MULTIPLY:
+                values[-1] = np.multiply(left, right)
+            else:
+                # divide by 1 where the divisor is zero and mask those rows instead of failing the batch
+                is_zero = np.equal(right, 0)
+                error_mask |= is_zero
+                divisor = np.where(is_zero, 1, right)
+                quotient = np.floor_divide(np.abs(left), np.abs(divisor))
+                values[-1] = np.where(np.less(left, 0) != np.less(divisor, 0), np.negative(quotient), quotient)
+
+    if len(values) != 1:
+        return report_error_for_vectorized("Vectorized evaluator reached unreachable code")
+
+    output = np.array(np.broadcast_to(values[0], (row_count,)), dtype=np.int64)
+    output[error_mask] = 0
+    return VectorizedResult(True, output, error_mask)
@@ -1,7 +1,9 @@
 import unittest
-from main.lexer import scan_and_tokenize_input
+from main.lexer import scan_and_tokenize_input, scan_input_into_token_stream
 from main.parser import parse_list_of_tokens
 from main.interpreter import interpret_node
+from main.ast import ExpressionNode, TermNode, FactorNode, TermChainNode, ExpressionChainNode, ArithmeticOperator
+from main.instrumentation import measure_syntax_tree
 
 """
 Tests that show the full implementation of the calculator grammar is working as expected.
@@ -285,6 +287,94 @@ class CalculatorGrammarTests(unittest.TestCase):
         self.assertFalse(interpreter_result.was_successful)
         self.assertEqual(interpreter_result.error_message, "You cannot divide by zero")
 
+    def test_051_long_add_chain_beyond_recursion_limit(self):
+        _, _, result = self.run_full_pipeline("+".join(["1"] * 20000))
+        self.assertTrue(result.was_successful)
+        self.assertEqual(result.output, 20000)
+
+    def test_052_deeply_nested_tree(self):
+        node = ExpressionNode(TermNode(FactorNode(number="7")))
+        for depth in range(20000):
+            node = ExpressionNode(TermNode(FactorNode(sign=-1 if depth % 2 else 1, nested_expression=node)))
+        result = interpret_node(node)
+        self.assertTrue(result.was_successful)
+        self.assertEqual(result.output, 7)
+
+    def test_053_division_by_zero_inside_long_chain(self):
+        _, _, result = self.run_full_pipeline("1+" * 5000 + "(4/(2-2))")
+        self.assertFalse(result.was_successful)
+        self.assertEqual(result.error_message, "You cannot divide by zero")
+
+    def test_054_operator_runs_become_flat_chains(self):
+        _, parser_result, result = self.run_full_pipeline("1 - 2 * 3 / 4 + 5")
+        self.assertEqual(result.output, 5)
+        self.assertEqual(parser_result.syntax_tree, ExpressionChainNode(
+            [TermNode(FactorNode(number="1")),
+             TermChainNode([FactorNode(number="2"), FactorNode(number="3"), FactorNode(number="4")],
+                           [ArithmeticOperator.MULTIPLY, ArithmeticOperator.DIVIDE]),
+             TermNode(FactorNode(number="5"))],
+            [ArithmeticOperator.MINUS, ArithmeticOperator.PLUS]))
+
+    def test_055_chain_depth_does_not_grow_with_its_length(self):
+        _, parser_result, result = self.run_full_pipeline(" - ".join(["7 * 3 / 2"] * 10000))
+        self.assertEqual(result.output, -99980)
+        node_count, depth = measure_syntax_tree(parser_result.syntax_tree)
+        self.assertEqual(depth, 3)
+        self.assertEqual(node_count, 1 + 10000 * 4)
+
+    def test_056_chains_evaluate_like_nested_binary_nodes(self):
+        def nested_binary_tree(values, operators):
+            node = ExpressionNode(TermNode(FactorNode(number=values[0])))
+            for value, operator in zip(values[1:], operators):
+                node = ExpressionNode(node, operator, ExpressionNode(TermNode(FactorNode(number=value))))
+            return node
+
+        for expression, values, operators in (
+                ("100 - 10 - 1", ["100", "10", "1"], [ArithmeticOperator.MINUS] * 2),
+                ("1 - 2 + 3", ["1", "2", "3"], [ArithmeticOperator.MINUS, ArithmeticOperator.PLUS])):
+            with self.subTest(expression=expression):
+                _, _, result = self.run_full_pipeline(expression)
+                self.assertEqual(result, interpret_node(nested_binary_tree(values, operators)))
+        # truncation happens after every step, from left to right
+        self.assertEqual(self.run_full_pipeline("7 / 2 * 2")[2].output, 6)
+        self.assertEqual(self.run_full_pipeline("2 * 3 / 4 * 4")[2].output, 4)
+
+    def test_057_nesting_too_deep_for_the_parser_is_an_error(self):
+        lexer_result = scan_and_tokenize_input("(" * 3000 + "1" + ")" * 3000)
+        parser_result = parse_list_of_tokens(lexer_result.tokens)
+        self.assertFalse(parser_result.was_successful)
+        self.assertEqual(parser_result.error_message, "Expression is nested too deeply")
+        # the parser can be used again afterwards
+        self.assertEqual(self.run_full_pipeline("(((1 + 2)))")[2].output, 3)
+
+
+class TokenStreamTests(unittest.TestCase):
+
+    EXPRESSIONS = ["7 + 3 * (10 / (12 / (3 + 1) - 1))", "  -(2+3)*-4 ", "1 2", "", "(1", "2 * )", "(1 2)", "+"]
+
+    def test_stream_materializes_the_same_tokens(self):
+        for expression in self.EXPRESSIONS:
+            with self.subTest(expression=expression):
+                token_stream = scan_input_into_token_stream(expression).tokens
+                self.assertEqual(list(token_stream), scan_and_tokenize_input(expression).tokens)
+
+    def test_stream_reports_the_same_lexer_errors(self):
+        self.assertEqual(scan_input_into_token_stream("1 + $"), scan_and_tokenize_input("1 + $"))
+
+    def test_parser_accepts_token_streams(self):
+        for expression in self.EXPRESSIONS:
+            with self.subTest(expression=expression):
+                from_stream = parse_list_of_tokens(scan_input_into_token_stream(expression).tokens)
+                from_list = parse_list_of_tokens(scan_and_tokenize_input(expression).tokens)
+                self.assertEqual(from_stream.syntax_tree, from_list.syntax_tree)
+                self.assertEqual(from_stream.error_message, from_list.error_message)
+
+    def test_error_positions_point_into_the_source(self):
+        self.assertEqual(parse_list_of_tokens(scan_input_into_token_stream("2 * )").tokens).error_position, 4)
+        self.assertEqual(parse_list_of_tokens(scan_input_into_token_stream("(1 2)").tokens).error_position, 3)
+        self.assertEqual(parse_list_of_tokens(scan_input_into_token_stream("(1").tokens).error_position, 2)
+        self.assertIsNone(parse_list_of_tokens(scan_and_tokenize_input("(1").tokens).error_position)
+
 
 if __name__ == '__main__':
     unittest.main()
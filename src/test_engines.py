@@ -0,0 +1,300 @@
+import os
+import random
+import subprocess
+import sys
+import unittest
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from main.lexer import scan_and_tokenize_input
+from main.parser import parse_list_of_tokens
+from main.interpreter import interpret_node, InterpreterResult
+from main.hashcons import intern_syntax_tree, child_nodes
+from main.instrumentation import measure_syntax_tree
+from main.compiler import compile_syntax_tree
+from main.integers import convert_literal_to_integer, format_integer, divide_truncating
+from main.pipeline import ENGINES, evaluate_expression, evaluate_expression_by_shunting_yard
+from main.stream_evaluator import evaluate_tokens_by_shunting_yard
+from main.oneshot import evaluate_one_shot
+
+"""
+Tests that the alternative evaluation engines agree with interpret_node.
+Each expression is run through the reference pipeline and through the engine under test.
+"""
+
+EXPRESSIONS = [
+    "0",
+    "   42  ",
+    "--5",
+    "-+5",
+    "10-1-2-3",
+    "100/5/2",
+    "4/(2*3)",
+    "-(2+3)*-4",
+    "7 + 3 * (10 / (12 / (3 + 1) - 1))",
+    "1-2+3-4+5-6+7-8+9",
+    "-8/3",
+    "9/ -2",
+    "-(8/3)",
+    "(((((5)))))",
+    "2+3*4-5*(6-4)",
+    "123456789012345678901 * 3",
+    "1/0",
+    "5 + (3 - 3 / (1 - 1))",
+    "99999999999999999999999 / 3",
+    "-100000000000000000000001 / 7",
+    "12345678901234567890123456789 * 98765432109876543210 / -11",
+]
+
+
+def parse(expression: str):
+    lexer_result = scan_and_tokenize_input(expression)
+    parser_result = parse_list_of_tokens(lexer_result.tokens)
+    return parser_result.syntax_tree
+
+
+class CompilerTests(unittest.TestCase):
+
+    def test_compiled_expressions_match_interpreter(self):
+        for expression in EXPRESSIONS:
+            with self.subTest(expression=expression):
+                syntax_tree = parse(expression)
+                compiler_result = compile_syntax_tree(syntax_tree)
+                self.assertTrue(compiler_result.was_successful)
+                self.assertEqual(compiler_result.compiled_expression.evaluate(), interpret_node(syntax_tree))
+
+    def test_compiled_expression_can_run_repeatedly(self):
+        compiled_expression = compile_syntax_tree(parse("6*7")).compiled_expression
+        self.assertEqual(compiled_expression.evaluate().output, 42)
+        self.assertEqual(compiled_expression.evaluate().output, 42)
+
+    def test_deep_tree_compiles(self):
+        syntax_tree = parse("-".join(["3"] * 20000))
+        compiler_result = compile_syntax_tree(syntax_tree)
+        self.assertTrue(compiler_result.was_successful)
+        self.assertEqual(compiler_result.compiled_expression.evaluate().output, 3 - 3 * 19999)
+
+
+class BigIntegerTests(unittest.TestCase):
+
+    def test_division_is_exact_for_large_operands(self):
+        self.assertEqual(interpret_node(parse("99999999999999999999999 / 3")).output, 33333333333333333333333)
+        self.assertEqual(interpret_node(parse("-100000000000000000000001 / 7")).output, -14285714285714285714285)
+
+    def test_literals_beyond_the_string_conversion_limit(self):
+        digits = "7" * 100_000
+        result = interpret_node(parse(f"{digits} / {digits} + {digits} - {digits}"))
+        self.assertEqual(result.output, 1)
+
+    def test_conversions_round_trip(self):
+        for digits, value in (("0", 0), ("42", 42), ("1" + "0" * 5000, 10 ** 5000), ("9" * 12345, 10 ** 12345 - 1)):
+            with self.subTest(length=len(digits)):
+                self.assertEqual(convert_literal_to_integer(digits), value)
+                self.assertEqual(format_integer(value), digits)
+                self.assertEqual(format_integer(-value), "-" + digits if value else "0")
+
+    def test_every_division_truncates_like_divide_truncating(self):
+        large = 10 ** 30 + 7
+        for dividend in (0, 6, 7, -6, -7, large, -large):
+            for divisor in (1, 2, 3, 7, -1, -2, -3, -7, large, -large):
+                expression = f"({dividend}) / ({divisor})"
+                expected = divide_truncating(dividend, divisor)
+                with self.subTest(expression=expression):
+                    self.assertEqual(interpret_node(parse(expression)).output, expected)
+                    self.assertEqual(compile_syntax_tree(parse("a / b")).compiled_expression.evaluate(
+                        {"a": dividend, "b": divisor}).output, expected)
+                    self.assertEqual(evaluate_one_shot(expression), (True, str(expected)))
+                    self.assertEqual(evaluate_expression_by_shunting_yard(expression).output, expected)
+
+
+def generate_doubling_expression(levels: int) -> str:
+    expression = "(12/(3+1)-1)"
+    for level in range(levels):
+        expression = f"({expression} + {expression} * {level % 3})"
+    return expression
+
+
+def count_distinct_nodes(syntax_tree) -> int:
+    seen = set()
+    pending = [syntax_tree]
+    while pending:
+        node = pending.pop()
+        if node is None or id(node) in seen:
+            continue
+        seen.add(id(node))
+        pending.extend(child_nodes(node))
+    return len(seen)
+
+
+class HashConsingTests(unittest.TestCase):
+
+    def test_interned_trees_match_interpreter(self):
+        for expression in EXPRESSIONS + ["(12/(3+1)-1) * (12/(3+1)-1) - -(12/(3+1)-1)", "(1/0) + (1/0)"]:
+            with self.subTest(expression=expression):
+                tokens = scan_and_tokenize_input(expression).tokens
+                parser_result = parse_list_of_tokens(tokens, intern_subtrees=True)
+                self.assertTrue(parser_result.was_successful)
+                self.assertEqual(interpret_node(parser_result.syntax_tree, memoize_nested_expressions=True),
+                                 interpret_node(parse(expression)))
+
+    def test_repeated_groups_are_shared(self):
+        tokens = scan_and_tokenize_input("(12/(3+1)-1) + (12/(3+1)-1)").tokens
+        parser_result = parse_list_of_tokens(tokens, intern_subtrees=True)
+        left_group = parser_result.syntax_tree.term_nodes[0].first_factor_node
+        right_group = parser_result.syntax_tree.term_nodes[1].first_factor_node
+        self.assertIs(left_group, right_group)
+        node_count, _ = measure_syntax_tree(parse("(12/(3+1)-1) + (12/(3+1)-1)"))
+        self.assertEqual(parser_result.deduplicated_node_count,
+                         node_count - count_distinct_nodes(parser_result.syntax_tree))
+
+    def test_doubling_expression_has_linear_distinct_nodes(self):
+        levels = 10
+        syntax_tree = parse(generate_doubling_expression(levels))
+        expected = interpret_node(syntax_tree)
+        interned_tree, deduplicated_node_count = intern_syntax_tree(parse(generate_doubling_expression(levels)))
+        self.assertGreater(deduplicated_node_count, 2 ** levels)
+        self.assertLess(count_distinct_nodes(interned_tree), 20 * levels)
+        self.assertEqual(interpret_node(interned_tree, memoize_nested_expressions=True), expected)
+
+    def test_parser_does_not_intern_by_default(self):
+        parser_result = parse_list_of_tokens(scan_and_tokenize_input("(1+2) + (1+2)").tokens)
+        self.assertEqual(parser_result.deduplicated_node_count, 0)
+
+
+class ShuntingYardTests(unittest.TestCase):
+
+    def test_shunting_yard_matches_pipeline(self):
+        for expression in EXPRESSIONS + ["", "1 2", "(1))", "(1", "(1 2)", "*3", "1 + $", "x / 0", "1/0 + (",
+                                         "1 = 2", "(1 = 2)", "=1", "x = 1",
+                                         "(" * 200 + "1" + ")" * 200, "-".join(["3"] * 20000)]:
+            with self.subTest(expression=expression[:40]):
+                self.assertEqual(evaluate_expression_by_shunting_yard(expression), evaluate_expression(expression))
+
+    def test_nesting_deeper_than_the_parser_supports(self):
+        self.assertEqual(evaluate_expression_by_shunting_yard("-(" * 100000 + "7" + ")" * 100000).output, 7)
+
+    def test_token_lists_and_variables(self):
+        tokens = scan_and_tokenize_input("-a * (b - 10) / 3").tokens
+        self.assertEqual(evaluate_tokens_by_shunting_yard(tokens, {"a": 4, "b": 1}),
+                         interpret_node(parse("-a * (b - 10) / 3"), {"a": 4, "b": 1}))
+
+
+class OneShotTests(unittest.TestCase):
+    """
+    The one-shot evaluator is a separate tokenizer and parser for the grammar, so it is checked against the pipeline
+    on the shared corpus, on hand-picked errors and on random input.
+    """
+
+    def assert_matches_pipeline(self, expression: str):
+        interpreter_result = evaluate_expression(expression)
+        expected_line = format_integer(interpreter_result.output) if interpreter_result.was_successful \
+            else interpreter_result.error_message
+        self.assertEqual(evaluate_one_shot(expression), (interpreter_result.was_successful, expected_line))
+
+    def test_one_shot_matches_pipeline(self):
+        for expression in EXPRESSIONS + ["", "1 2", "(1))", "(1", "1 + $", "x * 2", "٣ + 1", "9" * 5000 + " * 3",
+                                         "2" + " * 2" * 20000, "x = 1", "1 = 2", "2 * (3 = 4)", "1 + 2 ="]:
+            with self.subTest(expression=expression[:40]):
+                self.assert_matches_pipeline(expression)
+
+    def test_one_shot_matches_pipeline_on_random_input(self):
+        generator = random.Random(17)
+        alphabet = "0123456789+-*/()= x"
+        for _ in range(2000):
+            expression = "".join(generator.choice(alphabet) for _ in range(generator.randint(0, 12)))
+            with self.subTest(expression=expression):
+                self.assert_matches_pipeline(expression)
+
+    def test_deep_nesting_falls_back_to_the_pipeline_error(self):
+        self.assertEqual(evaluate_one_shot("(" * 3000 + "1" + ")" * 3000), (False, "Expression is nested too deeply"))
+
+    def test_cli_fast_path_skips_heavy_imports(self):
+        main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        completed = subprocess.run([sys.executable, "-X", "importtime", main_script, "-e", "-(2+3)*-4"],
+                                   capture_output=True, text=True)
+        self.assertEqual(completed.stdout, "20\n")
+        imported = {line.split("|")[-1].strip() for line in completed.stderr.splitlines()}
+        for module in ("re", "dataclasses", "argparse", "main.pipeline"):
+            self.assertNotIn(module, imported)
+
+    def test_cli_has_one_one_shot_entry_point(self):
+        main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        completed = subprocess.run([sys.executable, main_script, "-e", "1 + 2", "--no-cache"],
+                                   capture_output=True, text=True)
+        self.assertEqual(completed.returncode, 2)
+        self.assertIn("-e must be the only option", completed.stderr)
+
+    def test_cli_only_imports_the_server_to_serve(self):
+        main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        completed = subprocess.run([sys.executable, "-X", "importtime", main_script, "--batch"], input="1 + 2\n",
+                                   capture_output=True, text=True)
+        self.assertEqual(completed.stdout, "3\n")
+        imported = {line.split("|")[-1].strip() for line in completed.stderr.splitlines()}
+        self.assertNotIn("asyncio", imported)
+        self.assertNotIn("main.server", imported)
+
+
+class NestingDepthTests(unittest.TestCase):
+
+    def test_every_engine_reports_deep_nesting(self):
+        expression = "(" * 3000 + "1" + ")" * 3000
+        self.assertEqual(evaluate_expression(expression).error_message, "Expression is nested too deeply")
+        # the shunting-yard engine keeps its stacks on the heap, so it has no depth limit
+        for engine, expected in (("tree", InterpreterResult(False, error_message="Expression is nested too deeply")),
+                                 ("parallel", InterpreterResult(False, error_message="Expression is nested too deeply")),
+                                 ("shunting-yard", InterpreterResult(True, 1))):
+            with self.subTest(engine=engine):
+                self.assertEqual(ENGINES[engine](expression), expected)
+
+
+class VariableTests(unittest.TestCase):
+
+    VARIABLES = {"x": 7, "y": -2, "rate_2": 0}
+
+    def test_interpreter_reads_variables(self):
+        self.assertEqual(interpret_node(parse("x * y - -x"), self.VARIABLES).output, -7)
+        self.assertEqual(interpret_node(parse("x / y"), self.VARIABLES).output, -3)
+
+    def test_undefined_variable(self):
+        result = interpret_node(parse("x + z"), self.VARIABLES)
+        self.assertFalse(result.was_successful)
+        self.assertEqual(result.error_message, "Undefined variable, 'z'")
+
+    def test_compiled_expressions_read_variables(self):
+        for expression in ("x * y - -x", "-(x + y) / 3", "x / rate_2", "x + z", "2x"):
+            with self.subTest(expression=expression):
+                syntax_tree = parse(expression)
+                compiled_expression = compile_syntax_tree(syntax_tree).compiled_expression
+                self.assertEqual(compiled_expression.evaluate(self.VARIABLES),
+                                 interpret_node(syntax_tree, self.VARIABLES))
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class VectorizedEvaluationTests(unittest.TestCase):
+
+    def test_matches_interpreter_row_by_row(self):
+        from main.vectorized import evaluate_vectorized
+        columns = {"a": numpy.array([7, -7, 7, -7, 0, 5]), "b": numpy.array([2, 2, -2, -2, 3, 0])}
+        syntax_tree = parse("(a + 1) * 3 / b - -a")
+        result = evaluate_vectorized(syntax_tree, columns)
+        self.assertTrue(result.was_successful)
+        for row in range(6):
+            expected = interpret_node(syntax_tree, {name: int(column[row]) for name, column in columns.items()})
+            self.assertEqual(bool(result.error_mask[row]), not expected.was_successful)
+            if expected.was_successful:
+                self.assertEqual(int(result.output[row]), expected.output)
+
+    def test_literal_only_tree_broadcasts(self):
+        from main.vectorized import evaluate_vectorized
+        result = evaluate_vectorized(parse("6 * 7"), {"a": numpy.arange(3)})
+        self.assertEqual(result.output.tolist(), [42, 42, 42])
+
+    def test_undefined_column(self):
+        from main.vectorized import evaluate_vectorized
+        result = evaluate_vectorized(parse("a + b"), {"a": numpy.arange(3)})
+        self.assertEqual(result.error_message, "Undefined variable, 'b'")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,633 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import io
+import os
+import tempfile
+import random
+import unittest
+from unittest import mock
+from main.lexer import scan_input_into_token_stream
+from main.parser import parse_list_of_tokens, parse_statement
+from main.pipeline import evaluate_expression
+from main.interpreter import interpret_node, report_error_for_interpreter, InterpreterResult
+from main.cache import EvaluationCache, normalize_source
+from main.batch import evaluate_many, evaluate_concurrently
+from main.streaming import evaluate_stream
+from main.incremental import IncrementalSession
+from main.spreadsheet import SpreadsheetSession
+from main.serialization import serialize_syntax_tree, deserialize_syntax_tree, InvalidSerializedTree
+from main.tree_cache import SyntaxTreeCache
+from main.server import EvaluationServer
+from main.parallel import evaluate_in_parallel, split_at_top_level_additions
+from main.stream_evaluator import evaluate_buffer, evaluate_mapped_file
+from main.instrumentation import instrumentation, PipelineInstrumentation, StageEvent, measure_syntax_tree
+
+"""
+Tests for the evaluation helpers built on top of the pipeline.
+"""
+
+
+class EvaluationCacheTests(unittest.TestCase):
+
+    def test_normalize_source_ignores_whitespace_between_symbols(self):
+        self.assertEqual(normalize_source(" 1 +\t2 * ( 3 ) "), "1+2*(3)")
+
+    def test_normalize_source_keeps_whitespace_between_numbers(self):
+        self.assertEqual(normalize_source("1  2"), "1 2")
+        self.assertNotEqual(normalize_source("1 2"), normalize_source("12"))
+
+    def test_hits_and_misses(self):
+        cache = EvaluationCache(capacity=8)
+        self.assertEqual(cache.evaluate("1 + 2").output, 3)
+        self.assertEqual(cache.evaluate("1+2").output, 3)
+        statistics = cache.statistics()
+        self.assertEqual((statistics.hits, statistics.misses, statistics.size), (1, 1, 1))
+
+    def test_error_results_are_cached(self):
+        cache = EvaluationCache(capacity=8)
+        self.assertEqual(cache.evaluate("1/0").error_message, "You cannot divide by zero")
+        self.assertEqual(cache.evaluate("1 / 0").error_message, "You cannot divide by zero")
+        self.assertEqual(cache.evaluate("1 $").error_message, "Found an unknown character, '$'")
+        self.assertEqual(cache.statistics().hits, 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = EvaluationCache(capacity=2)
+        cache.evaluate("1")
+        cache.evaluate("2")
+        cache.evaluate("1")
+        cache.evaluate("3")
+        statistics = cache.statistics()
+        self.assertEqual((statistics.evictions, statistics.size), (1, 2))
+        cache.evaluate("1")
+        self.assertEqual(cache.statistics().hits, 2)
+
+    def test_cached_results_match_pipeline(self):
+        cache = EvaluationCache(capacity=8)
+        for expression in ("1 2", "12", "(1))", "-(4/3)", "2 *", ""):
+            with self.subTest(expression=expression):
+                self.assertEqual(cache.evaluate(expression), evaluate_expression(expression))
+
+    def test_shared_cache_under_contention(self):
+        generator = random.Random(22)
+        expressions = [f"{generator.randint(-50, 50)} * (x - {generator.randint(0, 9)}) / {generator.randint(0, 3)}"
+                       .replace("x", str(generator.randint(0, 99))) for _ in range(300)]
+        expected = [evaluate_expression(expression) for expression in expressions]
+        # a small capacity keeps the threads evicting each other's entries
+        cache = EvaluationCache(capacity=32)
+
+        def evaluate_all(thread_number):
+            order = list(range(len(expressions)))
+            random.Random(thread_number).shuffle(order)
+            return [(index, cache.evaluate(expressions[index])) for index in order]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for results in executor.map(evaluate_all, range(16)):
+                for index, result in results:
+                    self.assertEqual(result, expected[index])
+
+        statistics = cache.statistics()
+        self.assertEqual(statistics.hits + statistics.misses, 16 * len(expressions))
+        self.assertLessEqual(statistics.size, 32)
+
+
+class BatchEvaluationTests(unittest.TestCase):
+
+    EXPRESSIONS = ["1+2", "5/0", "2*(3", "-7/2", "9" * 30, "x", "4*4"] * 5
+
+    def assert_matches_pipeline(self, batch_result):
+        self.assertEqual(len(batch_result), len(self.EXPRESSIONS))
+        for index, expression in enumerate(self.EXPRESSIONS):
+            self.assertEqual(batch_result.result_at(index), evaluate_expression(expression))
+
+    def test_single_worker(self):
+        self.assert_matches_pipeline(evaluate_many(self.EXPRESSIONS, workers=1, chunk_size=4))
+
+    def test_process_pool_keeps_input_order(self):
+        self.assert_matches_pipeline(evaluate_many(self.EXPRESSIONS, workers=2, chunk_size=3))
+
+    def test_thread_pool_keeps_input_order(self):
+        self.assert_matches_pipeline(evaluate_concurrently(self.EXPRESSIONS, threads=4, chunk_size=3))
+
+    def test_threads_agree_with_sequential_evaluation(self):
+        generator = random.Random(7)
+        expressions = ["".join(generator.choice("0123456789+-*/()x ") for _ in range(generator.randint(0, 12)))
+                       for _ in range(2000)]
+        concurrent_result = evaluate_concurrently(expressions, threads=8, chunk_size=16)
+        sequential_result = evaluate_many(expressions, chunk_size=16)
+        for index in range(len(expressions)):
+            self.assertEqual(concurrent_result.result_at(index), sequential_result.result_at(index))
+
+    def test_deep_nesting_is_recorded_as_an_error(self):
+        expressions = ["1+1", "(" * 400 + "1" + ")" * 400, "2*3"]
+        for batch_result in (evaluate_many(expressions), evaluate_many(expressions, workers=2, chunk_size=1),
+                             evaluate_concurrently(expressions, threads=2, chunk_size=1)):
+            self.assertEqual([batch_result.result_at(index) for index in range(3)],
+                             [InterpreterResult(True, 2),
+                              report_error_for_interpreter("Expression is nested too deeply"),
+                              InterpreterResult(True, 6)])
+
+    def test_results_are_compact(self):
+        batch_result = evaluate_many(self.EXPRESSIONS, chunk_size=100)
+        self.assertEqual(batch_result.outputs.typecode, "q")
+        self.assertEqual(len(batch_result.errors), 15)
+        self.assertEqual(len(batch_result.large_outputs), 5)
+
+
+class StreamingTests(unittest.TestCase):
+
+    def test_one_result_line_per_expression(self):
+        input_stream = io.BytesIO(b"1 + 2\r\n5/0\n(3\n7")
+        output_stream = io.BytesIO()
+        evaluate_stream(input_stream, output_stream, evaluate_expression)
+        self.assertEqual(output_stream.getvalue().decode().splitlines(), [
+            "3",
+            "You cannot divide by zero",
+            "Found A Null Value; Missing closing parenthesis is Null",
+            "7",
+        ])
+
+    def test_deep_nesting_between_valid_lines(self):
+        input_stream = io.BytesIO(b"1+1\n" + b"(" * 400 + b"1" + b")" * 400 + b"\n2*3\n")
+        output_stream = io.BytesIO()
+        evaluate_stream(input_stream, output_stream, evaluate_expression)
+        self.assertEqual(output_stream.getvalue().decode().splitlines(), ["2", "Expression is nested too deeply", "6"])
+
+    def test_empty_input_writes_nothing(self):
+        output_stream = io.BytesIO()
+        evaluate_stream(io.BytesIO(b""), output_stream, evaluate_expression)
+        self.assertEqual(output_stream.getvalue(), b"")
+
+
+class MappedFileTests(unittest.TestCase):
+
+    EXPRESSIONS = [
+        "7 + 3 * (10 / (12 / (3 + 1) - 1))", "-(2+3)*-4", "- - -(4/ -(2-2))", "-8/3", "1 2", "(1))", "", "  \n",
+        "(1", "1 +", "*1", "(1 2)", "1 + $", "1 2 $", "1/0 + (", "x + 1/0", "1/0 + x", "12345678901234567890 * 3 / 7",
+        "1\u00a0+\u20032", "\x1c1+1\n", "1 + é",
+    ]
+
+    def test_buffers_match_pipeline(self):
+        for expression in self.EXPRESSIONS:
+            with self.subTest(expression=expression):
+                self.assertEqual(evaluate_buffer(expression.encode("utf-8")), evaluate_expression(expression))
+
+    def test_random_expressions_match_pipeline(self):
+        generator = random.Random(5)
+        for _ in range(2000):
+            expression = "".join(generator.choice("12+-*/() 0=") for _ in range(generator.randint(0, 14)))
+            with self.subTest(expression=expression):
+                self.assertEqual(evaluate_buffer(expression.encode("utf-8")), evaluate_expression(expression))
+
+    def test_non_ascii_digits_are_unknown_characters(self):
+        # the documented difference from evaluate_expression, which reads "٣" as 3
+        self.assertEqual(evaluate_expression("٣ + 4").output, 7)
+        self.assertEqual(evaluate_buffer("٣ + 4".encode("utf-8")).error_message, "Found an unknown character, '٣'")
+
+    def test_variables(self):
+        self.assertEqual(evaluate_buffer(b"-x * (y + 1)", {"x": 3, "y": 4}).output, -15)
+
+    def test_mapped_file_reports_progress(self):
+        expression = "(1 + 2) * 3 - " * 1000 + "4"
+        reported = []
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "expression.txt")
+            with open(path, "w") as expression_file:
+                expression_file.write(expression + "\n")
+            interpreter_result = evaluate_mapped_file(path, progress=lambda offset, total: reported.append(offset))
+        self.assertEqual(interpreter_result, evaluate_expression(expression))
+        self.assertEqual(reported[-1], len(expression) + 1)
+
+    def test_empty_file(self):
+        with tempfile.NamedTemporaryFile() as empty_file:
+            self.assertEqual(evaluate_mapped_file(empty_file.name), evaluate_expression(""))
+
+
+class ParallelEvaluationTests(unittest.TestCase):
+
+    EXPRESSIONS = [
+        "1 - 2 * 3 / -4 - (5 - 6) - 7 + 8", "1 - -2 - 3", "-5 - 6 - 7", "1 2 + 3", "(1)) + 5", "1 2 + $", "1 + $ + 2",
+        "1/0 + (", "x + 1/0", "1/0 + x", "1 -", "", "(1 + 2) - (3 - (4 + 5)) - -(6) * 7",
+    ]
+
+    def test_chunks_are_split_at_top_level_binary_operators(self):
+        chunks = split_at_top_level_additions("1 + (2 - 3) - -4 * 5 - 6", 8)
+        self.assertEqual("".join(chunks), "1 + (2 - 3) - -4 * 5 - 6")
+        for chunk in chunks[1:]:
+            self.assertIn(chunk[0], "+-")
+            self.assertEqual(chunk.count("("), chunk.count(")"))
+
+    def test_chunk_sums_match_pipeline(self):
+        generator = random.Random(11)
+        expressions = self.EXPRESSIONS + ["".join(generator.choice("12+-*/() 0x") for _ in range(16))
+                                          for _ in range(500)]
+        with ThreadPoolExecutor(1) as executor:
+            for expression in expressions:
+                for chunk_count in (1, 3, 8):
+                    with self.subTest(expression=expression, chunk_count=chunk_count):
+                        self.assertEqual(evaluate_in_parallel(expression, workers=chunk_count, executor=executor,
+                                                              threshold_length=0),
+                                         evaluate_expression(expression))
+
+    def test_process_pool(self):
+        expression = " - ".join(f"{index} * 3 / 2" for index in range(5000)) + " + (1 - 2)"
+        with ProcessPoolExecutor(2) as executor:
+            self.assertEqual(evaluate_in_parallel(expression, workers=2, executor=executor, threshold_length=0),
+                             evaluate_expression(expression))
+
+
+class IncrementalSessionTests(unittest.TestCase):
+
+    def assert_matches_pipeline(self, session):
+        self.assertEqual(session.result, evaluate_expression(session.source), session.source)
+        if session.result.was_successful:
+            parser_result = parse_list_of_tokens(scan_input_into_token_stream(session.source).tokens)
+            self.assertEqual(session.syntax_tree, parser_result.syntax_tree)
+
+    def test_initial_source(self):
+        session = IncrementalSession("7 + 3 * (10 / (12 / (3 + 1) - 1))")
+        self.assertEqual(session.result.output, 22)
+
+    def test_edit_reuses_untouched_groups(self):
+        session = IncrementalSession("(1 + 2) * (3 + 4) + (5 * (6 - 7))")
+        session.apply_edit(2, 1, "9")
+        self.assert_matches_pipeline(session)
+        self.assertEqual(session.statistics.reused_group_count, 2)
+        self.assertEqual(session.statistics.parsed_group_count, 1)
+
+    def test_edits_that_merge_and_split_tokens(self):
+        session = IncrementalSession("12 + 34")
+        session.apply_edit(2, 3, "")
+        self.assertEqual(session.result.output, 1234)
+        session.apply_edit(2, 0, " * ")
+        self.assertEqual(session.result.output, 12 * 34)
+
+    def test_errors_are_reported_like_the_pipeline(self):
+        session = IncrementalSession("(1 + 2) * 3")
+        for offset, deleted_length, inserted_text in ((6, 1, ""), (0, 0, "$"), (0, 1, ""), (4, 1, "0"),
+                                                      (5, 0, " / 0"), (0, 0, "x + ")):
+            session.apply_edit(offset, deleted_length, inserted_text)
+            self.assert_matches_pipeline(session)
+
+    def test_random_edits_match_the_pipeline(self):
+        generator = random.Random(12)
+        session = IncrementalSession("(1 + (2 * 3)) - ((4 / 5) + 6) * (7 - (8 + 9))")
+        alphabet = "0123456789+-*/()= "
+        for _ in range(300):
+            offset = generator.randint(0, len(session.source))
+            deleted_length = generator.randint(0, min(2, len(session.source) - offset))
+            inserted_text = "".join(generator.choice(alphabet) for _ in range(generator.randint(0, 2)))
+            session.apply_edit(offset, deleted_length, inserted_text)
+            self.assert_matches_pipeline(session)
+
+    def test_deep_nesting_is_reported_instead_of_raised(self):
+        session = IncrementalSession("(" * 3000 + "1" + ")" * 3000)
+        self.assertEqual(session.result.error_message, "Expression is nested too deeply")
+        self.assertIsNone(session.syntax_tree)
+        self.assertEqual(session.apply_edit(0, 6000, "1 + 2").output, 3)
+        self.assertEqual(session.apply_edit(0, 0, "(" * 3000).error_message, "Expression is nested too deeply")
+
+
+class SpreadsheetSessionTests(unittest.TestCase):
+
+    def test_parse_statement(self):
+        syntax_tree = parse_statement(scan_input_into_token_stream("total = price * 2").tokens).syntax_tree
+        self.assertEqual(syntax_tree.name, "total")
+        self.assertEqual(syntax_tree.expression,
+                         parse_list_of_tokens(scan_input_into_token_stream("price * 2").tokens).syntax_tree)
+        for statement in ("1 = 2", "x", "x = ", "x = = 1", "(x = 1)"):
+            with self.subTest(statement=statement):
+                tokens = scan_input_into_token_stream(statement).tokens
+                parser_result = parse_statement(tokens)
+                if statement.startswith("x ="):
+                    self.assertFalse(parser_result.was_successful)
+                else:
+                    self.assertEqual(parser_result, parse_list_of_tokens(tokens))
+
+    def test_tokens_after_an_assignment_are_errors(self):
+        session = SpreadsheetSession()
+        for statement, error_message in (("b = 3 = 4", "Unexpected Token Type, ASSIGN"),
+                                         ("b = 3 4", "Unexpected Token Type, NUMBER"),
+                                         ("b = (1) x", "Unexpected Token Type, IDENTIFIER"),
+                                         ("b = 2)", "Unexpected Token Type, RPAREN")):
+            with self.subTest(statement=statement):
+                statement_result = session.execute(statement)
+                self.assertIsNone(statement_result.assigned_name)
+                self.assertEqual(statement_result.result.error_message, error_message)
+        self.assertEqual(session.value_of("b").error_message, "Undefined variable, 'b'")
+        parser_result = parse_statement(scan_input_into_token_stream("b = 3 = 4").tokens)
+        self.assertEqual(parser_result.error_position, 6)
+        # bare expressions still ignore trailing tokens
+        self.assertEqual(session.execute("3 = 4").result.output, 3)
+
+    def test_handles_only_assignments_and_formula_references(self):
+        session = SpreadsheetSession()
+        session.execute("price = 10")
+        for statement, handled in (("total = price * 2", True), ("1 = 2", True), ("price + 1", True),
+                                   ("2 * 3", False), ("quantity * 2", False), ("1 + $", False), ("", False)):
+            with self.subTest(statement=statement):
+                self.assertEqual(session.handles(statement), handled)
+                if not handled:
+                    self.assertEqual(session.execute(statement).result, evaluate_expression(statement))
+
+    def test_updates_recompute_only_downstream_formulas(self):
+        session = SpreadsheetSession()
+        for statement in ("price = 10", "quantity = 3", "subtotal = price * quantity", "shipping = 5",
+                          "total = subtotal + shipping", "unrelated = 2 * 21"):
+            session.execute(statement)
+        self.assertEqual(session.value_of("total").output, 35)
+
+        statement_result = session.execute("quantity = 4")
+        self.assertEqual(statement_result.recomputed_names, ["quantity", "subtotal", "total"])
+        self.assertEqual(session.value_of("total").output, 45)
+        self.assertEqual(session.execute("shipping = 5").recomputed_count, 1)
+        self.assertEqual(session.execute("total - unrelated").result.output, 3)
+
+    def test_unchanged_values_stop_recomputation(self):
+        session = SpreadsheetSession()
+        for statement in ("a = 7", "b = a / 2", "c = b * 10"):
+            session.execute(statement)
+        self.assertEqual(session.execute("a = 6").recomputed_names, ["a", "b"])
+        self.assertEqual(session.value_of("c").output, 30)
+
+    def test_diamond_is_recomputed_once_in_topological_order(self):
+        session = SpreadsheetSession()
+        for statement in ("d = b + c", "b = a * 2", "c = a + 1", "a = 1"):
+            session.execute(statement)
+        statement_result = session.execute("a = 5")
+        self.assertEqual(statement_result.recomputed_names[0], "a")
+        self.assertEqual(statement_result.recomputed_names[-1], "d")
+        self.assertEqual(statement_result.recomputed_count, 4)
+        self.assertEqual(session.value_of("d").output, 16)
+
+    def test_cycles_are_rejected(self):
+        session = SpreadsheetSession()
+        for statement in ("a = b + 1", "b = c * 2", "c = 3"):
+            session.execute(statement)
+        statement_result = session.execute("c = a")
+        self.assertIsNone(statement_result.assigned_name)
+        self.assertEqual(statement_result.result.error_message, "Found a circular reference, 'c -> a -> b -> c'")
+        self.assertEqual(session.execute("x = x").result.error_message, "Found a circular reference, 'x -> x'")
+        self.assertEqual(session.value_of("a").output, 7)
+        self.assertEqual(session.execute("c = 4").recomputed_count, 3)
+
+    def test_errors_propagate_and_recover(self):
+        session = SpreadsheetSession()
+        for statement in ("ratio = 100 / count", "percent = ratio * 2 + missing", "count = 0"):
+            session.execute(statement)
+        self.assertEqual(session.value_of("percent").error_message, "You cannot divide by zero")
+        session.execute("count = 4")
+        self.assertEqual(session.value_of("percent").error_message, "Undefined variable, 'missing'")
+        session.execute("missing = 1")
+        self.assertEqual(session.value_of("percent").output, 51)
+        self.assertEqual(session.execute("count = (").result.error_message,
+                         "Found A Null Value; No tokens for factor is Null")
+        self.assertEqual(session.value_of("count").output, 4)
+
+    def test_long_chains_do_not_recurse(self):
+        session = SpreadsheetSession()
+        session.execute("cell0 = 1")
+        for index in range(1, 5000):
+            session.execute(f"cell{index} = cell{index - 1} + 1")
+        self.assertEqual(session.execute("cell0 = 2").recomputed_count, 5000)
+        self.assertEqual(session.value_of("cell4999").output, 5001)
+        self.assertIn("cell0 -> cell4999", session.execute("cell0 = cell4999").result.error_message)
+
+
+class SyntaxTreeCacheTests(unittest.TestCase):
+
+    EXPRESSIONS = ["0", "-(2 + 3) * -x / 7", "1 2", "--(+a_1 - -9)", "٣ + 4", "9" * 500 + " - 1", "(1/0)"]
+
+    def parse(self, expression):
+        return parse_list_of_tokens(scan_input_into_token_stream(expression).tokens)
+
+    def test_serialization_round_trip(self):
+        for expression in self.EXPRESSIONS:
+            with self.subTest(expression=expression):
+                parser_result = self.parse(expression)
+                data = serialize_syntax_tree(parser_result.syntax_tree, parser_result.consumed_token_count)
+                self.assertEqual(deserialize_syntax_tree(data),
+                                 (parser_result.syntax_tree, parser_result.consumed_token_count))
+
+    def test_deep_trees_round_trip_without_recursion(self):
+        syntax_tree = self.parse("1" + " - 2 * 3" * 20000).syntax_tree
+        data = serialize_syntax_tree(syntax_tree)
+        self.assertEqual(serialize_syntax_tree(deserialize_syntax_tree(data)[0]), data)
+        self.assertEqual(interpret_node(deserialize_syntax_tree(data)[0]), interpret_node(syntax_tree))
+
+    def test_invalid_data_is_rejected(self):
+        data = serialize_syntax_tree(self.parse("1 + 2 * x").syntax_tree)
+        other_grammar = data[:10] + bytes(16) + data[26:]
+        for invalid_data in (b"", data[:-1], data + b"0", b"X" + data[1:], other_grammar,
+                             data.replace(b"x", b" ")):
+            with self.subTest(invalid_data=invalid_data):
+                with self.assertRaises(InvalidSerializedTree):
+                    deserialize_syntax_tree(invalid_data)
+
+    def test_hits_skip_parsing(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "expression.txt")
+            with open(path, "w", encoding="utf-8") as expression_file:
+                expression_file.write("7 + 3 * (10 / (12 / (3 + 1) - 1))")
+
+            first_result = SyntaxTreeCache(os.path.join(directory, "trees")).parse_file(path)
+            # a new cache object stands in for a restarted process
+            cache = SyntaxTreeCache(os.path.join(directory, "trees"))
+            with mock.patch("main.tree_cache.parse_list_of_tokens") as parse:
+                second_result = cache.parse_file(path)
+                parse.assert_not_called()
+            self.assertEqual(second_result, first_result)
+            self.assertEqual(interpret_node(second_result.syntax_tree).output, 22)
+            self.assertEqual((cache.statistics().hits, cache.statistics().misses), (1, 0))
+
+    def test_errors_are_reported_and_not_stored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SyntaxTreeCache(directory)
+            for expression in ("1 +", "1 $", "(1"):
+                with self.subTest(expression=expression):
+                    self.assertEqual(report_error_for_interpreter(cache.parse_source(expression).error_message),
+                                     evaluate_expression(expression))
+            self.assertEqual(cache.statistics().size, 0)
+
+    def test_corrupt_entries_are_replaced(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SyntaxTreeCache(directory)
+            cache.parse_source("6 * 7")
+            with open(cache.path_for(b"6 * 7"), "r+b") as tree_file:
+                tree_file.truncate(10)
+            self.assertEqual(interpret_node(cache.parse_source("6 * 7").syntax_tree).output, 42)
+            self.assertEqual(interpret_node(cache.parse_source("6 * 7").syntax_tree).output, 42)
+            self.assertEqual((cache.statistics().hits, cache.statistics().misses), (1, 2))
+
+    def test_stores_within_budget_do_not_scan_the_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            SyntaxTreeCache(directory).parse_source("1 + 1")
+            cache = SyntaxTreeCache(directory)
+            with mock.patch.object(cache, "stored_entries", wraps=cache.stored_entries) as stored_entries:
+                for number in range(20):
+                    cache.parse_source(f"{number} * 2")
+                cache.parse_source("0 * 2")
+                stored_entries.assert_not_called()
+            self.assertEqual(cache.stored_bytes, cache.statistics().size)
+
+            cache.max_bytes = cache.stored_bytes - 1
+            cache.parse_source("2 + 2")
+            self.assertLessEqual(cache.stored_bytes, cache.max_bytes)
+            self.assertEqual(cache.stored_bytes, cache.statistics().size)
+
+    def test_least_recently_used_trees_are_evicted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            entry_size = len(serialize_syntax_tree(self.parse("10 + 1").syntax_tree))
+            cache = SyntaxTreeCache(directory, max_bytes=2 * entry_size)
+            cache.parse_source("10 + 1")
+            cache.parse_source("10 + 2")
+            # make the first entry the most recently used, whatever the file system's time resolution
+            os.utime(cache.path_for(b"10 + 2"), ns=(0, 0))
+            cache.parse_source("10 + 1")
+            cache.parse_source("10 + 3")
+            self.assertTrue(os.path.exists(cache.path_for(b"10 + 1")))
+            self.assertFalse(os.path.exists(cache.path_for(b"10 + 2")))
+            statistics = cache.statistics()
+            self.assertEqual((statistics.evictions, statistics.size), (1, 2 * entry_size))
+
+
+class InstrumentationTests(unittest.TestCase):
+
+    def setUp(self):
+        instrumentation.reset()
+        instrumentation.enable()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled_instrumentation_records_nothing(self):
+        instrumentation.disable()
+        evaluate_expression("1 + 2")
+        self.assertTrue(all(statistics.run_count == 0 for statistics in instrumentation.statistics().values()))
+
+    def test_counts_every_stage(self):
+        self.assertEqual(evaluate_expression("(1 + 2) * 3").output, 9)
+        statistics = instrumentation.statistics()
+        self.assertEqual(statistics["lexer"].run_count, 1)
+        self.assertEqual(statistics["lexer"].token_count, 7)
+        self.assertEqual(statistics["parser"].run_count, 1)
+        self.assertEqual(statistics["parser"].node_count, 9)
+        self.assertEqual(statistics["parser"].max_tree_depth, 6)
+        self.assertEqual(statistics["interpreter"].run_count, 1)
+        self.assertEqual(sum(statistics["interpreter"].bucket_counts), 1)
+
+    def test_counts_errors_per_stage(self):
+        evaluate_expression("1 + $")
+        evaluate_expression("1 +")
+        evaluate_expression("1 / 0")
+        statistics = instrumentation.statistics()
+        self.assertEqual([statistics[stage].error_count for stage in ("lexer", "parser", "interpreter")], [1, 1, 1])
+        self.assertEqual(statistics["parser"].run_count, 2)
+
+    def test_hooks_receive_events(self):
+        events = []
+        instrumentation.add_hook(events.append)
+        try:
+            evaluate_expression("2 * 3")
+        finally:
+            instrumentation.remove_hook(events.append)
+        self.assertEqual(instrumentation.hooks, [])
+        self.assertEqual([event.stage for event in events], ["lexer", "parser", "interpreter"])
+        self.assertTrue(all(event.was_successful for event in events))
+
+    def test_failing_hook_does_not_break_evaluation(self):
+        events = []
+
+        def failing_hook(event):
+            raise ValueError("exporter is down")
+
+        failed_hook_count = instrumentation.failed_hook_count
+        instrumentation.add_hook(failing_hook)
+        instrumentation.add_hook(events.append)
+        try:
+            self.assertEqual(evaluate_expression("2 * 3").output, 6)
+        finally:
+            instrumentation.remove_hook(failing_hook)
+            instrumentation.remove_hook(events.append)
+        self.assertEqual(len(events), 3)
+        self.assertEqual(instrumentation.failed_hook_count, failed_hook_count + 3)
+        self.assertIn(f"calculator_failed_hooks_total {failed_hook_count + 3}", instrumentation.prometheus_text())
+
+    def test_prometheus_text_has_cumulative_buckets(self):
+        collector = PipelineInstrumentation()
+        collector.record(StageEvent("lexer", 0.00005, True, token_count=3))
+        collector.record(StageEvent("lexer", 0.5, False))
+        text = collector.prometheus_text()
+        self.assertIn('calculator_stage_duration_seconds_bucket{stage="lexer",le="0.0001"} 1', text)
+        self.assertIn('calculator_stage_duration_seconds_bucket{stage="lexer",le="+Inf"} 2', text)
+        self.assertIn('calculator_stage_errors_total{stage="lexer"} 1', text)
+        self.assertIn("calculator_tokens_total 3", text)
+
+    def test_measures_nested_trees(self):
+        syntax_tree = parse_list_of_tokens(scan_input_into_token_stream("(" * 200 + "1" + ")" * 200).tokens)
+        # every group adds an expression, a term and a factor on a single path
+        self.assertEqual(measure_syntax_tree(syntax_tree.syntax_tree), (603, 603))
+
+
+class EvaluationServerTests(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.socket_directory = tempfile.TemporaryDirectory()
+        self.unix_path = os.path.join(self.socket_directory.name, "calculator.sock")
+        self.server = EvaluationServer(workers=1, large_expression_length=1000)
+        await self.server.start("127.0.0.1", 0, self.unix_path)
+
+    async def asyncTearDown(self):
+        await self.server.close()
+        self.socket_directory.cleanup()
+
+    async def exchange(self, reader, writer, payload: bytes, response_count: int):
+        writer.write(payload)
+        await writer.drain()
+        responses = [await reader.readline() for _ in range(response_count)]
+        writer.close()
+        await writer.wait_closed()
+        return responses
+
+    async def test_answers_pipelined_requests_in_order_over_tcp(self):
+        host, port = self.server.addresses()[0][:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        large_expression = " + ".join(["1"] * 2000)
+        responses = await self.exchange(reader, writer,
+                                        f"1 + 2\n{large_expression}\n1 / 0\n1 + $\n-(2+3)*-4\n".encode(), 5)
+        self.assertEqual(responses, [b"OK 3\n", b"OK 2000\n", b"ERROR You cannot divide by zero\n",
+                                     b"ERROR Found an unknown character, '$'\n", b"OK 20\n"])
+
+    async def test_failing_request_between_good_ones(self):
+        host, port = self.server.addresses()[0][:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        # the first deep line recurses too far on the event loop, the second one in a worker process
+        deep_line, deeper_line = "(" * 300 + "1" + ")" * 300, "(" * 600 + "1" + ")" * 600
+        responses = await self.exchange(reader, writer, f"1+2\n{deep_line}\n{deeper_line}\n3*4\n".encode(), 4)
+        self.assertEqual(responses, [b"OK 3\n", b"ERROR Expression is nested too deeply\n",
+                                     b"ERROR Expression is nested too deeply\n", b"OK 12\n"])
+
+    async def test_large_requests_use_the_engine_and_cache(self):
+        server = EvaluationServer(workers=1, large_expression_length=1000, engine="shunting-yard", cache_capacity=8)
+        await server.start(None, None, os.path.join(self.socket_directory.name, "cached.sock"))
+        try:
+            reader, writer = await asyncio.open_unix_connection(server.addresses()[0])
+            # the shunting-yard engine does not recurse, so this nesting only evaluates with the selected engine
+            deep_line = f"{'(' * 600}1{')' * 600}\n".encode()
+            writer.write(deep_line)
+            first_response = await reader.readline()
+            # sent after the first response, so the pool result is in the cache by then
+            responses = [first_response] + await self.exchange(reader, writer, deep_line + b"1 + 1\n", 2)
+        finally:
+            await server.close()
+        self.assertEqual(responses, [b"OK 1\n", b"OK 1\n", b"OK 2\n"])
+        self.assertEqual((server.cache.statistics().hits, server.cache.statistics().misses), (1, 2))
+
+    async def test_answers_over_unix_socket(self):
+        reader, writer = await asyncio.open_unix_connection(self.unix_path)
+        responses = await self.exchange(reader, writer, b"7 + 3 * (10 / (12 / (3 + 1) - 1))\r\n", 1)
+        self.assertEqual(responses, [b"OK 22\n"])
+
+
+if __name__ == '__main__':
+    unittest.main()
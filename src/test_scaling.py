@@ -0,0 +1,143 @@
+import gc
+import math
+import os
+import statistics
+import unittest
+from typing import Callable, List, Sequence, Tuple
+from main.lexer import scan_and_tokenize_input, scan_input_into_token_stream
+from main.parser import parse_list_of_tokens
+from main.interpreter import interpret_node
+from main.stream_evaluator import evaluate_tokens_by_shunting_yard
+from main.cache import normalize_source
+from benchmarks.timing import time_best_of
+
+"""
+Complexity-scaling regression tests.
+
+Each pipeline stage is timed at geometrically increasing input sizes (n, 2n, 4n, ...), and the growth exponent is the
+slope of a least-squares line through log(time) against log(size). A stage fails when its exponent exceeds its bound,
+which catches accidental quadratic behaviour (an exponent near 2) while leaving room for timing noise around 1.
+
+To stay reliable on noisy machines every size is timed several times and the fastest run kept, the garbage collector is
+disabled while timing, and a stage that fails is measured again before the test fails. When the timings of every
+attempt were too noisy to tell linear from quadratic (for example on a busy single-core CI runner), the test is
+skipped instead of failed. SCALING_EXPONENT_BOUND overrides the bound of every stage.
+"""
+
+# bound on the growth exponent of the stages expected to be linear; quadratic stages measure close to 2
+LINEAR_EXPONENT_BOUND = float(os.environ.get("SCALING_EXPONENT_BOUND", "1.5"))
+
+# largest spread, as median over fastest run at any size, for which a failing exponent is trusted
+NOISE_TOLERANCE = 0.25
+
+# number of "12 + 3 * (45 - 6) / 7 - " chunks in the smallest input (8 tokens and 24 characters each)
+SMALLEST_CHUNK_COUNT = 500
+SIZE_DOUBLINGS = 5
+REPEATS = 5
+ATTEMPTS = 2
+
+
+def generate_expression(chunk_count: int) -> str:
+    return "12 + 3 * (45 - 6) / 7 - " * chunk_count + "1"
+
+
+def fit_growth_exponent(sizes: Sequence[int], seconds: Sequence[float]) -> float:
+    """
+    Returns the slope of the least-squares line through (log size, log seconds).
+    """
+
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(duration, 1e-9)) for duration in seconds]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+            / sum((x - mean_x) ** 2 for x in xs))
+
+
+def measure_growth_exponent(prepare: Callable[[str], object],
+                            stage: Callable[[object], object]) -> Tuple[float, float]:
+    """
+    Times stage(prepare(expression)) for expressions of geometrically increasing size and returns the fitted growth
+    exponent and the timing noise: the largest spread, at any size, of the median run over the fastest one.
+
+    Only the stage is timed; prepare builds its input beforehand.
+    """
+
+    sizes: List[int] = [SMALLEST_CHUNK_COUNT * 2 ** doubling for doubling in range(SIZE_DOUBLINGS)]
+    stage_inputs = [prepare(generate_expression(size)) for size in sizes]
+
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        # warm up, so the smallest size does not pay for first-call costs
+        stage(stage_inputs[0])
+        runs = [[time_best_of(lambda: stage(stage_input), 1) for _ in range(REPEATS)] for stage_input in stage_inputs]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    noise = max(statistics.median(size_runs) / max(min(size_runs), 1e-9) - 1 for size_runs in runs)
+    return fit_growth_exponent(sizes, [min(size_runs) for size_runs in runs]), noise
+
+
+def lex_into_tokens(expression: str):
+    return scan_and_tokenize_input(expression).tokens
+
+
+def lex_into_token_stream(expression: str):
+    return scan_input_into_token_stream(expression).tokens
+
+
+def parse_into_tree(expression: str):
+    return parse_list_of_tokens(lex_into_token_stream(expression)).syntax_tree
+
+
+class FitGrowthExponentTests(unittest.TestCase):
+
+    def test_recovers_known_exponents(self):
+        sizes = [100, 200, 400, 800]
+        self.assertAlmostEqual(fit_growth_exponent(sizes, [size * 1e-6 for size in sizes]), 1.0)
+        self.assertAlmostEqual(fit_growth_exponent(sizes, [size ** 2 * 1e-9 for size in sizes]), 2.0)
+
+
+class ScalingTests(unittest.TestCase):
+
+    def assert_scales_within(self, prepare: Callable[[str], object], stage: Callable[[object], object],
+                             bound: float = LINEAR_EXPONENT_BOUND):
+        exponents = []
+        noises = []
+        for _ in range(ATTEMPTS):
+            exponent, noise = measure_growth_exponent(prepare, stage)
+            if exponent <= bound:
+                return
+            exponents.append(exponent)
+            noises.append(noise)
+        if min(noises) > NOISE_TOLERANCE:
+            self.skipTest(f"timings too noisy to judge growth exponent {min(exponents):.2f} "
+                          f"(spread {min(noises):.0%})")
+        self.fail(f"growth exponent {min(exponents):.2f} exceeds {bound} (measured {exponents})")
+
+    def test_lexer_scales_linearly(self):
+        self.assert_scales_within(lambda expression: expression, scan_and_tokenize_input)
+
+    def test_token_stream_lexer_scales_linearly(self):
+        self.assert_scales_within(lambda expression: expression, scan_input_into_token_stream)
+
+    def test_parser_scales_linearly_on_token_lists(self):
+        self.assert_scales_within(lex_into_tokens, parse_list_of_tokens)
+
+    def test_parser_scales_linearly_on_token_streams(self):
+        self.assert_scales_within(lex_into_token_stream, parse_list_of_tokens)
+
+    def test_interpreter_scales_linearly(self):
+        self.assert_scales_within(parse_into_tree, interpret_node)
+
+    def test_shunting_yard_scales_linearly(self):
+        self.assert_scales_within(lex_into_token_stream, evaluate_tokens_by_shunting_yard)
+
+    def test_cache_normalization_scales_linearly(self):
+        self.assert_scales_within(lambda expression: expression, normalize_source)
+
+
+if __name__ == '__main__':
+    unittest.main()